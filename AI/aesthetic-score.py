@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import logging
 
 from app.container import get_container
-from app.utils import load_image_from_source
+from app.fetch import ImageFetcher
+from app.utils import ImageSource
 
 LOGGER = logging.getLogger(__name__)
 
@@ -16,12 +18,19 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+async def fetch(fetcher: ImageFetcher, image: str) -> ImageSource:
+    try:
+        return await fetcher.fetch(image)
+    finally:
+        await fetcher.aclose()
+
+
 def main() -> None:
     args = parse_args()
     logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
     container = get_container()
-    image = load_image_from_source(args.image, timeout=container.settings.request_timeout_seconds)
-    result = container.aesthetic.score(image)
+    source = asyncio.run(fetch(container.fetcher, args.image))
+    result = container.aesthetic.score(source.decode(target_size=container.aesthetic.input_size))
     LOGGER.info("Score: %.4f (backend=%s)", result.score, result.backend)
 
 
@@ -1,9 +1,26 @@
 """Application package for the Teledeck AI microservice."""
 
-from .container import ServiceContainer, get_container
-from .http_api import create_http_app
-from .grpc_server import create_grpc_server
-from .settings import Settings
+from __future__ import annotations
+
+import importlib
+from typing import Any
+
+# Resolved on first access so that scripts importing ``app.<module>`` (backfill,
+# rescoring, benchmarks) do not pull in the HTTP and gRPC servers.
+_EXPORTS = {
+    "ServiceContainer": ".container",
+    "get_container": ".container",
+    "create_http_app": ".http_api",
+    "create_grpc_server": ".grpc_server",
+    "Settings": ".settings",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+
 
 __all__ = [
     "ServiceContainer",
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Callable, Generic, Sequence, TypeVar
+
+LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass(slots=True)
+class _PendingItem(Generic[T, R]):
+    item: T
+    future: asyncio.Future[R]
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesces concurrent submissions into batches for a single model call.
+
+    The first item to arrive opens a batch; the batch is dispatched once it holds
+    ``max_batch_size`` items or ``max_wait_ms`` has elapsed, whichever comes first.
+    ``fn`` runs off the event loop and must return one result per input item. If it
+    raises for a batch of several items, each item is retried on its own so that one
+    bad input only fails its own caller.
+    Up to ``max_concurrency`` batches run at once; while every slot is busy new items
+    keep queueing, so the next batch dispatched is a fuller one.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[Sequence[T]], Sequence[R]],
+        *,
+        max_batch_size: int,
+        max_wait_ms: float,
+        executor: Executor | None = None,
+        max_concurrency: int = 1,
+        name: str = "batcher",
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self._fn = fn
+        self._max_batch_size = max_batch_size
+        self._max_wait = max(max_wait_ms, 0.0) / 1000.0
+        self._executor = executor
+        self._name = name
+        self._pending: deque[_PendingItem[T, R]] = deque()
+        self._wakeup = asyncio.Event()
+        self._worker: asyncio.Task[None] | None = None
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._in_flight: set[asyncio.Task[None]] = set()
+
+    async def submit(self, item: T) -> R:
+        self._ensure_worker()
+        future: asyncio.Future[R] = asyncio.get_running_loop().create_future()
+        self._pending.append(_PendingItem(item=item, future=future))
+        self._wakeup.set()
+        return await future
+
+    async def close(self) -> None:
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        # Batches already handed to the executor finish and resolve their callers.
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            if self._pending:
+                self._wakeup.set()
+            self._worker = asyncio.create_task(self._run(), name=self._name)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            await self._slots.acquire()
+            try:
+                batch = await self._collect(loop)
+            except BaseException:
+                self._slots.release()
+                raise
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._dispatch(loop, batch), name=f"{self._name}-dispatch")
+            self._in_flight.add(task)
+            task.add_done_callback(self._dispatch_done)
+
+    async def _collect(self, loop: asyncio.AbstractEventLoop) -> list[_PendingItem[T, R]]:
+        deadline = loop.time() + self._max_wait
+        while len(self._pending) < self._max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+
+        batch: list[_PendingItem[T, R]] = []
+        while self._pending and len(batch) < self._max_batch_size:
+            pending = self._pending.popleft()
+            # Callers that gave up (cancelled RPCs, disconnected clients) do not need a slot.
+            if not pending.future.done():
+                batch.append(pending)
+        if not self._pending:
+            self._wakeup.clear()
+        return batch
+
+    def _dispatch_done(self, task: asyncio.Task[None]) -> None:
+        self._in_flight.discard(task)
+        self._slots.release()
+
+    async def _dispatch(self, loop: asyncio.AbstractEventLoop, batch: list[_PendingItem[T, R]]) -> None:
+        try:
+            results = await self._call(loop, batch)
+        except Exception as exc:  # noqa: BLE001
+            if len(batch) > 1:
+                LOGGER.warning("%s: batch of %d failed (%s); retrying items one by one", self._name, len(batch), exc)
+                for pending in batch:
+                    if not pending.future.done():
+                        await self._dispatch(loop, [pending])
+                return
+            LOGGER.exception("%s: item failed", self._name)
+            if not batch[0].future.done():
+                batch[0].future.set_exception(exc)
+            return
+
+        LOGGER.debug("%s: dispatched batch of %d", self._name, len(batch))
+        for pending, result in zip(batch, results):
+            if not pending.future.done():
+                pending.future.set_result(result)
+
+    async def _call(self, loop: asyncio.AbstractEventLoop, batch: list[_PendingItem[T, R]]) -> Sequence[R]:
+        results = await loop.run_in_executor(self._executor, self._fn, [pending.item for pending in batch])
+        if len(results) != len(batch):
+            raise RuntimeError(f"{self._name}: expected {len(batch)} results, got {len(results)}")
+        return results
+
+__all__ = ["MicroBatcher"]
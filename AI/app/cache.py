@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .settings import Settings
+
+LOGGER = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    digest TEXT NOT NULL,
+    model TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (digest, model)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed);
+"""
+
+
+class InferenceCache:
+    """Persistent LRU cache of raw model outputs keyed by image digest and model identity.
+
+    Entries are evicted least-recently-used first once the stored payloads exceed
+    ``max_bytes``. The connection is shared between threads behind a lock; every call
+    is a short single-row statement so contention stays low.
+    """
+
+    def __init__(self, path: Path, *, max_bytes: int) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._path = path
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        self._total_bytes: int = total
+        LOGGER.info("Inference cache at %s holds %.1f MiB", path, total / (1024 * 1024))
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "InferenceCache | None":
+        if settings.inference_cache_path is None:
+            return None
+        return cls(settings.inference_cache_path, max_bytes=settings.inference_cache_max_mb * 1024 * 1024)
+
+    def get(self, digest: str, model: str) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM results WHERE digest = ? AND model = ?", (digest, model)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE results SET accessed = ? WHERE digest = ? AND model = ?", (time.time(), digest, model)
+            )
+        return row[0]
+
+    def put(self, digest: str, model: str, payload: bytes) -> None:
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM results WHERE digest = ? AND model = ?", (digest, model)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (digest, model, payload, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                (digest, model, payload, len(payload), time.time()),
+            )
+            self._total_bytes += len(payload) - (previous[0] if previous else 0)
+            if self._total_bytes > self._max_bytes:
+                self._evict()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self) -> None:
+        # Trim to 90% of the budget so a full cache does not evict on every insert.
+        target = int(self._max_bytes * 0.9)
+        cursor = self._conn.execute("SELECT digest, model, size FROM results ORDER BY accessed")
+        doomed: list[tuple[str, str]] = []
+        for digest, model, size in cursor:
+            if self._total_bytes <= target:
+                break
+            doomed.append((digest, model))
+            self._total_bytes -= size
+        cursor.close()
+        self._conn.execute("BEGIN")
+        self._conn.executemany("DELETE FROM results WHERE digest = ? AND model = ?", doomed)
+        self._conn.execute("COMMIT")
+        LOGGER.debug("Evicted %d inference cache entries", len(doomed))
+
+
+def model_identity(name: str, *paths: Path) -> str:
+    """Fingerprint a model by the name, size and mtime of the files it was loaded from."""
+    digest = hashlib.sha1()
+    for path in paths:
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            if not file.exists():
+                continue
+            stat = file.stat()
+            digest.update(f"{file.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return f"{name}:{digest.hexdigest()[:16]}"
+
+
+__all__ = ["InferenceCache", "model_identity"]
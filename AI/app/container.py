@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass
 from functools import lru_cache
 
+from .cache import InferenceCache
+from .decoding import ImageDecoder
+from .embeddings import EmbeddingStore
+from .executor import InferenceExecutor
+from .fetch import ImageFetcher
+from .inference import InferenceService
 from .models.aesthetic import AestheticScorer
 from .models.tagger import TaggerModel
 from .settings import Settings
+from .similarity import SimilaritySearch
+
+LOGGER = logging.getLogger(__name__)
 
 
 @dataclass(slots=True)
@@ -13,14 +23,44 @@ class ServiceContainer:
     settings: Settings
     tagger: TaggerModel
     aesthetic: AestheticScorer
+    inference: InferenceService
+    fetcher: ImageFetcher
+    embeddings: EmbeddingStore | None
 
 
 @lru_cache(maxsize=1)
 def get_container() -> ServiceContainer:
     settings = Settings()
+    # Forks the decode workers, so it must come before the model weights are loaded.
+    decoder = ImageDecoder.from_settings(settings)
     tagger = TaggerModel.from_settings(settings)
     aesthetic = AestheticScorer.from_settings(settings)
-    return ServiceContainer(settings=settings, tagger=tagger, aesthetic=aesthetic)
+    # Decode just large enough for the biggest model input; unknown sizes get the full image.
+    decoder.target_size = max(tagger.input_size, aesthetic.input_size) if aesthetic.input_size else None
+    embeddings = EmbeddingStore.from_settings(settings) if aesthetic.supports_embeddings else None
+    if embeddings is None and settings.embedding_store_path is not None:
+        LOGGER.warning("EMBEDDING_STORE_PATH is set but the %s aesthetic backend has no CLIP embeddings", aesthetic.backend)
+    similarity = SimilaritySearch.from_settings(embeddings, settings) if embeddings is not None else None
+    if similarity is not None:
+        similarity.start()
+    inference = InferenceService(
+        settings,
+        tagger,
+        aesthetic,
+        decoder=decoder,
+        executor=InferenceExecutor.from_settings(settings),
+        cache=InferenceCache.from_settings(settings),
+        embeddings=embeddings,
+        similarity=similarity,
+    )
+    return ServiceContainer(
+        settings=settings,
+        tagger=tagger,
+        aesthetic=aesthetic,
+        inference=inference,
+        fetcher=ImageFetcher.from_settings(settings),
+        embeddings=embeddings,
+    )
 
 
 __all__ = ["ServiceContainer", "get_container"]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from PIL import Image
+
+from .settings import Settings
+from .utils import ImageSource, decode_image
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ImageDecoder:
+    """Decodes :class:`ImageSource` bytes in a bounded process pool, sized for the model inputs.
+
+    With ``workers=0`` decoding falls back to the default thread pool, which is cheaper
+    for small deployments but serializes on the GIL for large images.
+    Create it before loading any model, so the forked workers do not inherit the weights;
+    ``target_size`` can be set once the models report their input sizes.
+    """
+
+    def __init__(self, *, workers: int, target_size: int | None = None) -> None:
+        self._target_size = target_size
+        self._pool: ProcessPoolExecutor | None = None
+        if workers > 0:
+            # Fork every worker now, before the models load and the gRPC/uvicorn threads
+            # start: the fork start method launches the whole pool on first submit, and
+            # spawn/forkserver children would have to import torch just to unpickle decode_image.
+            self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+            self._pool.submit(int).result()
+        # Keep only a couple of images per worker queued so decoded frames don't pile up in memory.
+        self._slots = asyncio.Semaphore(max(workers, 1) * 2)
+        LOGGER.info("Image decoder: %d worker process(es)", workers)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ImageDecoder":
+        return cls(workers=settings.decode_workers)
+
+    @property
+    def target_size(self) -> int | None:
+        return self._target_size
+
+    @target_size.setter
+    def target_size(self, target_size: int | None) -> None:
+        LOGGER.info("Image decoder target size: %s", target_size)
+        self._target_size = target_size
+
+    async def decode(self, source: ImageSource) -> Image.Image:
+        if source.image is None:
+            decode = partial(decode_image, source.data, target_size=self._target_size)
+            async with self._slots:
+                source.image = await asyncio.get_running_loop().run_in_executor(self._pool, decode)
+        return source.image
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["ImageDecoder"]
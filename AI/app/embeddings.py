@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import logging
+import threading
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from .settings import Settings
+
+LOGGER = logging.getLogger(__name__)
+
+# media_items.id is a VARCHAR(36) uuid; ids are stored as fixed-width ASCII bytes.
+ID_DTYPE = np.dtype("S36")
+_VECTOR_DTYPE = np.dtype("<f2")
+
+
+class EmbeddingStore:
+    """Append-only on-disk store of normalized CLIP image embeddings keyed by media item id.
+
+    ``vectors.f16`` holds one little-endian float16 row per write and ``ids.s36`` the
+    matching ``media_items.id``. Rewriting an id appends a new row that shadows the old
+    one until :meth:`compact` runs. Both files are read back through ``np.memmap``, so
+    the whole library can be fed to a matrix multiply without loading it into memory.
+    """
+
+    def __init__(self, directory: Path, *, dim: int = 768) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self._directory = directory
+        self._dim = dim
+        self._vectors_path = directory / "vectors.f16"
+        self._ids_path = directory / "ids.s36"
+        self._lock = threading.Lock()
+        self._rows: dict[str, int] = {}
+        self._count = self._recover()
+        ids = self._read_ids()
+        # Later rows win, matching the append-to-overwrite semantics.
+        self._rows = {media_id.decode(): row for row, media_id in enumerate(ids.tolist())}
+        LOGGER.info("Embedding store at %s holds %d vectors for %d items", directory, self._count, len(self._rows))
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "EmbeddingStore | None":
+        if settings.embedding_store_path is None:
+            return None
+        return cls(settings.embedding_store_path)
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    @property
+    def row_count(self) -> int:
+        """Number of rows written, including shadowed ones; usable as a :meth:`rows_since` cursor."""
+        return self._count
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, media_item_id: object) -> bool:
+        return media_item_id in self._rows
+
+    def add(self, media_item_ids: Sequence[str], vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self._dim)
+        if len(media_item_ids) != len(vectors):
+            raise ValueError("media_item_ids and vectors must have the same length")
+        with self._lock:
+            # Vectors first: a crash between the two writes leaves a trailing vector
+            # without an id, which _recover() truncates on the next open.
+            with self._vectors_path.open("ab") as handle:
+                handle.write(vectors.astype(_VECTOR_DTYPE).tobytes())
+            with self._ids_path.open("ab") as handle:
+                handle.write(np.asarray(media_item_ids, dtype=ID_DTYPE).tobytes())
+            for offset, media_item_id in enumerate(media_item_ids):
+                self._rows[media_item_id] = self._count + offset
+            self._count += len(media_item_ids)
+
+    def get(self, media_item_id: str) -> np.ndarray | None:
+        row = self._rows.get(media_item_id)
+        if row is None:
+            return None
+        return np.asarray(self._read_vectors()[row], dtype=np.float32)
+
+    def snapshot(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(ids, vectors)`` for the live row of every item, with ``ids`` as ``ID_DTYPE`` bytes.
+
+        ``vectors`` is a read-only float16 memmap when the store has no shadowed rows and
+        a compacted in-memory copy otherwise.
+        """
+        with self._lock:
+            count = self._count
+            rows = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+        vectors = self._read_vectors(count)
+        ids = self._read_ids(count)
+        if len(rows) == count:
+            return ids, vectors
+        rows.sort()
+        return ids[rows], np.asarray(vectors[rows])
+
+    def rows_since(self, start: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(ids, vectors)`` for every row written at or after row ``start``."""
+        with self._lock:
+            count = self._count
+        return np.asarray(self._read_ids(count)[start:]), np.asarray(self._read_vectors(count)[start:])
+
+    def compact(self) -> None:
+        """Rewrite the store without shadowed rows."""
+        ids, vectors = self.snapshot()
+        with self._lock:
+            tmp_vectors = self._vectors_path.with_suffix(".tmp")
+            tmp_ids = self._ids_path.with_suffix(".tmp")
+            np.asarray(vectors, dtype=_VECTOR_DTYPE).tofile(tmp_vectors)
+            np.asarray(ids, dtype=ID_DTYPE).tofile(tmp_ids)
+            tmp_vectors.replace(self._vectors_path)
+            tmp_ids.replace(self._ids_path)
+            self._rows = {media_id.decode(): row for row, media_id in enumerate(ids.tolist())}
+            self._count = len(ids)
+
+    def _recover(self) -> int:
+        vector_bytes = self._dim * _VECTOR_DTYPE.itemsize
+        vector_rows = self._vectors_path.stat().st_size // vector_bytes if self._vectors_path.exists() else 0
+        id_rows = self._ids_path.stat().st_size // ID_DTYPE.itemsize if self._ids_path.exists() else 0
+        count = min(vector_rows, id_rows)
+        if vector_rows != id_rows:
+            LOGGER.warning("Embedding store files disagree (%d vectors, %d ids); truncating to %d", vector_rows, id_rows, count)
+        for path, row_bytes in ((self._vectors_path, vector_bytes), (self._ids_path, ID_DTYPE.itemsize)):
+            if path.exists() and path.stat().st_size != count * row_bytes:
+                with path.open("r+b") as handle:
+                    handle.truncate(count * row_bytes)
+        return count
+
+    def _read_vectors(self, count: int | None = None) -> np.ndarray:
+        count = self._count if count is None else count
+        if count == 0:
+            return np.empty((0, self._dim), dtype=_VECTOR_DTYPE)
+        return np.memmap(self._vectors_path, dtype=_VECTOR_DTYPE, mode="r", shape=(count, self._dim))
+
+    def _read_ids(self, count: int | None = None) -> np.ndarray:
+        count = self._count if count is None else count
+        if count == 0:
+            return np.empty(0, dtype=ID_DTYPE)
+        return np.memmap(self._ids_path, dtype=ID_DTYPE, mode="r", shape=(count,))
+
+
+__all__ = ["EmbeddingStore", "ID_DTYPE"]
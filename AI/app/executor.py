@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, TypeVar
+
+from .settings import Settings
+
+LOGGER = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+
+class InferenceOverloadedError(RuntimeError):
+    pass
+
+
+class InferenceExecutor:
+    """Dedicated thread pool for model forward passes plus an admission limit.
+
+    Blocking storage calls (inference cache, embedding store, similarity search) go
+    through :meth:`run_io` on a second, separate pool, so they neither wait behind a
+    forward pass nor spill onto asyncio's unbounded default executor.
+
+    ``admit`` is entered for every inference request and fails fast once
+    ``max_pending`` requests are already waiting or running, so overload shows up as
+    an error the caller can retry rather than as unbounded queueing latency.
+    It is only used from the event loop thread and therefore needs no lock.
+    """
+
+    def __init__(self, *, workers: int, max_pending: int, io_workers: int = 4) -> None:
+        self.workers = max(workers, 1)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self.io_pool = ThreadPoolExecutor(max_workers=max(io_workers, 1), thread_name_prefix="inference-io")
+        self._max_pending = max_pending
+        self._pending = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "InferenceExecutor":
+        return cls(
+            workers=settings.max_workers,
+            max_pending=settings.inference_max_pending,
+            io_workers=settings.io_workers,
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @contextlib.contextmanager
+    def admit(self) -> Iterator[None]:
+        if self._pending >= self._max_pending:
+            raise InferenceOverloadedError(f"Inference queue is full ({self._max_pending} pending requests)")
+        self._pending += 1
+        try:
+            yield
+        finally:
+            self._pending -= 1
+
+    async def run_io(self, fn: Callable[..., R], /, *args: Any, **kwargs: Any) -> R:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_pool, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["InferenceExecutor", "InferenceOverloadedError"]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import httpx
+
+from .settings import Settings
+from .utils import ImageSource, ImageSourceError, read_image_path
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ImageFetcher:
+    """Async image loader shared by the HTTP and gRPC entry points.
+
+    Remote URLs go through one keep-alive connection pool, with at most
+    ``max_per_host`` downloads running against any single host. Bodies are streamed
+    into memory and abandoned as soon as they exceed ``max_bytes``. Local paths are
+    read in a worker thread.
+    """
+
+    def __init__(self, *, timeout: float, max_connections: int, max_per_host: int, max_bytes: int) -> None:
+        self._timeout = timeout
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._max_bytes = max_bytes
+        self._host_slots: defaultdict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(max_per_host))
+        # Created on first use so the pool belongs to the serving event loop.
+        self._client: httpx.AsyncClient | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ImageFetcher":
+        return cls(
+            timeout=settings.request_timeout_seconds,
+            max_connections=settings.fetch_max_connections,
+            max_per_host=settings.fetch_max_per_host,
+            max_bytes=settings.fetch_max_mb * 1024 * 1024,
+        )
+
+    async def fetch(self, source: str) -> ImageSource:
+        if source.startswith("http://") or source.startswith("https://"):
+            return ImageSource(await self._download(source))
+        return await asyncio.to_thread(read_image_path, source)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _download(self, url: str) -> bytes:
+        LOGGER.debug("Fetching image from %s", url)
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self._timeout, limits=self._limits, follow_redirects=True)
+        try:
+            async with self._host_slots[urlsplit(url).netloc]:
+                async with self._client.stream("GET", url) as response:
+                    if response.status_code >= 400:
+                        raise ImageSourceError(f"Failed to fetch image: HTTP {response.status_code}")
+                    declared = response.headers.get("content-length")
+                    if declared and declared.isdigit() and int(declared) > self._max_bytes:
+                        raise ImageSourceError(f"Image exceeds {self._max_bytes} bytes: {declared}")
+                    body = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        body += chunk
+                        if len(body) > self._max_bytes:
+                            raise ImageSourceError(f"Image exceeds {self._max_bytes} bytes")
+                    return bytes(body)
+        except httpx.HTTPError as exc:
+            raise ImageSourceError(f"Failed to fetch image: {exc}") from exc
+
+
+__all__ = ["ImageFetcher"]
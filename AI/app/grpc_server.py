@@ -1,42 +1,63 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
-from typing import Any
+from collections import defaultdict
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator, TypeVar
 
 import grpc
 from grpc import aio
 
+from proto import ai_server_pb2, ai_server_pb2_grpc
+
 from .container import ServiceContainer, get_container
-from ..proto import ai_server_pb2, ai_server_pb2_grpc
-from .utils import ImageSourceError, load_image_from_source
+from .executor import InferenceOverloadedError
+from .similarity import MAX_SIMILAR_K, SimilarityUnavailableError, UnknownMediaItemError
+from .utils import ImageSource, ImageSourceError
 
 LOGGER = logging.getLogger(__name__)
 
+_Item = TypeVar("_Item")
+_Result = TypeVar("_Result")
+
+
+class _MethodLimiter:
+    """Caps the number of in-flight calls per RPC method so one caller cannot starve the rest."""
+
+    def __init__(self, limit: int) -> None:
+        self._limit = limit
+        self._active: defaultdict[str, int] = defaultdict(int)
+
+    @contextlib.contextmanager
+    def admit(self, method: str) -> Iterator[None]:
+        if self._active[method] >= self._limit:
+            raise InferenceOverloadedError(f"{method} is saturated ({self._limit} calls in flight)")
+        self._active[method] += 1
+        try:
+            yield
+        finally:
+            self._active[method] -= 1
+
 
 class ImageScorerService(ai_server_pb2_grpc.ImageScorerServicer):
     def __init__(self, container: ServiceContainer) -> None:
         self._container = container
+        self._limits = _MethodLimiter(container.settings.grpc_method_max_pending)
 
     async def PredictUrl(self, request: ai_server_pb2.ImageUrlRequest, context: aio.ServicerContext) -> ai_server_pb2.ScoreResult:
         try:
-            image = await asyncio.to_thread(
-                load_image_from_source,
-                request.image_url,
-                timeout=self._container.settings.request_timeout_seconds,
-            )
+            with self._limits.admit("PredictUrl"):
+                source = await self._read_source(request.image_url)
+                result = await self._container.inference.score(source, _media_item_id(request))
         except ImageSourceError as exc:
             context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
             context.set_details(str(exc))
             return ai_server_pb2.ScoreResult()
-        except Exception as exc:  # noqa: BLE001
-            LOGGER.exception("Unexpected error while loading image")
-            context.set_code(grpc.StatusCode.INTERNAL)
+        except InferenceOverloadedError as exc:
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
             context.set_details(str(exc))
             return ai_server_pb2.ScoreResult()
-
-        try:
-            result = await asyncio.to_thread(self._container.aesthetic.score, image)
         except Exception as exc:  # noqa: BLE001
             LOGGER.exception("Aesthetic scoring failed")
             context.set_code(grpc.StatusCode.INTERNAL)
@@ -47,23 +68,17 @@ class ImageScorerService(ai_server_pb2_grpc.ImageScorerServicer):
 
     async def TagUrl(self, request: ai_server_pb2.TagImageUrlRequest, context: aio.ServicerContext) -> ai_server_pb2.TagResult:
         try:
-            image = await asyncio.to_thread(
-                load_image_from_source,
-                request.image_url,
-                timeout=self._container.settings.request_timeout_seconds,
-            )
+            with self._limits.admit("TagUrl"):
+                source = await self._read_source(request.image_url)
+                predictions = await self._container.inference.tag(source, *_tag_options(request))
         except ImageSourceError as exc:
             context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
             context.set_details(str(exc))
             return ai_server_pb2.TagResult()
-        except Exception as exc:  # noqa: BLE001
-            LOGGER.exception("Unexpected error while loading image")
-            context.set_code(grpc.StatusCode.INTERNAL)
+        except InferenceOverloadedError as exc:
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
             context.set_details(str(exc))
             return ai_server_pb2.TagResult()
-
-        try:
-            predictions = await asyncio.to_thread(self._container.tagger.predict, image, request.cutoff if request.cutoff else None)
         except Exception as exc:  # noqa: BLE001
             LOGGER.exception("Tagging failed")
             context.set_code(grpc.StatusCode.INTERNAL)
@@ -73,12 +88,218 @@ class ImageScorerService(ai_server_pb2_grpc.ImageScorerServicer):
         tags = [ai_server_pb2.Tag(weight=item.weight, tag=item.tag) for item in predictions]
         return ai_server_pb2.TagResult(tags=tags)
 
+    async def Analyze(self, request: ai_server_pb2.TagImageUrlRequest, context: aio.ServicerContext) -> ai_server_pb2.AnalyzeResult:
+        try:
+            with self._limits.admit("Analyze"):
+                source = await self._read_source(request.image_url)
+                analysis = await self._container.inference.analyze(
+                    source, *_tag_options(request), media_item_id=_media_item_id(request)
+                )
+        except ImageSourceError as exc:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(exc))
+            return ai_server_pb2.AnalyzeResult()
+        except InferenceOverloadedError as exc:
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details(str(exc))
+            return ai_server_pb2.AnalyzeResult()
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.exception("Image analysis failed")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Image analysis failed")
+            return ai_server_pb2.AnalyzeResult()
+
+        tags = [ai_server_pb2.Tag(weight=item.weight, tag=item.tag) for item in analysis.tags]
+        return ai_server_pb2.AnalyzeResult(tags=tags, score=analysis.aesthetic.score)
+
+    async def SimilarItems(
+        self, request: ai_server_pb2.SimilarItemsRequest, context: aio.ServicerContext
+    ) -> ai_server_pb2.SimilarItemsResult:
+        k = request.k or 10
+        if k > MAX_SIMILAR_K:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"k must be at most {MAX_SIMILAR_K}")
+            return ai_server_pb2.SimilarItemsResult()
+        try:
+            with self._limits.admit("SimilarItems"):
+                if request.media_item_id:
+                    items = await self._container.inference.similar(media_item_id=request.media_item_id, k=k)
+                elif request.image_url:
+                    source = await self._read_source(request.image_url)
+                    items = await self._container.inference.similar(source=source, k=k)
+                else:
+                    raise ImageSourceError("media_item_id or image_url is required")
+        except ImageSourceError as exc:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(exc))
+            return ai_server_pb2.SimilarItemsResult()
+        except UnknownMediaItemError as exc:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(str(exc))
+            return ai_server_pb2.SimilarItemsResult()
+        except SimilarityUnavailableError as exc:
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details(str(exc))
+            return ai_server_pb2.SimilarItemsResult()
+        except InferenceOverloadedError as exc:
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details(str(exc))
+            return ai_server_pb2.SimilarItemsResult()
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.exception("Similarity search failed")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Similarity search failed")
+            return ai_server_pb2.SimilarItemsResult()
+
+        return ai_server_pb2.SimilarItemsResult(
+            items=[ai_server_pb2.SimilarItem(media_item_id=item.media_item_id, score=item.score) for item in items]
+        )
+
+    async def TagUrls(
+        self, request: ai_server_pb2.TagImageUrlsRequest, context: aio.ServicerContext
+    ) -> AsyncIterator[ai_server_pb2.TagUrlResult]:
+        options = _tag_options(request)
+        items = _aiter((image_url, options) for image_url in request.image_urls)
+        async for result in self._stream_results("TagUrls", items, self._tag_item, context):
+            yield result
+
+    async def ScoreUrls(
+        self, request: ai_server_pb2.ImageUrlsRequest, context: aio.ServicerContext
+    ) -> AsyncIterator[ai_server_pb2.ScoreUrlResult]:
+        async for result in self._stream_results("ScoreUrls", _aiter(request.image_urls), self._score_item, context):
+            yield result
+
+    async def TagUrlStream(
+        self, request_iterator: AsyncIterable[ai_server_pb2.TagImageUrlRequest], context: aio.ServicerContext
+    ) -> AsyncIterator[ai_server_pb2.TagUrlResult]:
+        async def items() -> AsyncIterator[tuple[str, _TagOptions]]:
+            async for request in request_iterator:
+                yield request.image_url, _tag_options(request)
+
+        async for result in self._stream_results("TagUrlStream", items(), self._tag_item, context):
+            yield result
+
+    async def _read_source(self, image_url: str) -> ImageSource:
+        return await self._container.fetcher.fetch(image_url)
+
+    async def _tag_item(self, index: int, item: tuple[str, _TagOptions]) -> ai_server_pb2.TagUrlResult:
+        image_url, options = item
+        try:
+            source = await self._read_source(image_url)
+            predictions = await self._container.inference.tag(source, *options)
+        except Exception as exc:  # noqa: BLE001
+            return ai_server_pb2.TagUrlResult(index=index, image_url=image_url, status=_item_error(exc, image_url))
+
+        tags = [ai_server_pb2.Tag(weight=prediction.weight, tag=prediction.tag) for prediction in predictions]
+        return ai_server_pb2.TagUrlResult(index=index, image_url=image_url, status=_OK, tags=tags)
+
+    async def _score_item(self, index: int, image_url: str) -> ai_server_pb2.ScoreUrlResult:
+        try:
+            source = await self._read_source(image_url)
+            result = await self._container.inference.score(source)
+        except Exception as exc:  # noqa: BLE001
+            return ai_server_pb2.ScoreUrlResult(index=index, image_url=image_url, status=_item_error(exc, image_url))
+
+        return ai_server_pb2.ScoreUrlResult(index=index, image_url=image_url, status=_OK, score=result.score)
+
+    async def _stream_results(
+        self,
+        method: str,
+        items: AsyncIterator[_Item],
+        handler: Callable[[int, _Item], Awaitable[_Result]],
+        context: aio.ServicerContext,
+    ) -> AsyncIterator[_Result]:
+        """Run ``handler`` over ``items`` concurrently and yield results as they complete.
+
+        At most ``stream_max_inflight`` items are in flight at once so a very large
+        request cannot decode the whole batch into memory before inference catches up.
+        The whole stream counts as one call against the per-method limit.
+        """
+        try:
+            with self._limits.admit(method):
+                async for result in self._run_stream(items, handler):
+                    yield result
+        except InferenceOverloadedError as exc:
+            # Item handlers report their own overloads, so this is the per-method limit.
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(exc))
+
+    async def _run_stream(
+        self,
+        items: AsyncIterator[_Item],
+        handler: Callable[[int, _Item], Awaitable[_Result]],
+    ) -> AsyncIterator[_Result]:
+        inflight = asyncio.Semaphore(self._container.settings.stream_max_inflight)
+        results: asyncio.Queue[Any] = asyncio.Queue()
+        tasks: set[asyncio.Task[None]] = set()
+        finished = object()
+
+        async def run(index: int, item: _Item) -> None:
+            try:
+                await results.put(await handler(index, item))
+            finally:
+                inflight.release()
+
+        async def produce() -> None:
+            try:
+                index = 0
+                async for item in items:
+                    await inflight.acquire()
+                    task = asyncio.create_task(run(index, item))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    index += 1
+                if tasks:
+                    await asyncio.gather(*tasks)
+            finally:
+                await results.put(finished)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (result := await results.get()) is not finished:
+                yield result
+            # Surfaces errors from the request stream itself (e.g. client cancellation).
+            await producer
+        finally:
+            producer.cancel()
+            for task in list(tasks):
+                task.cancel()
+
+
+_TagOptions = tuple[float | None, int | None]
+
+
+def _tag_options(request: ai_server_pb2.TagImageUrlRequest | ai_server_pb2.TagImageUrlsRequest) -> _TagOptions:
+    # proto3 scalars default to zero, which means "not set" for both fields.
+    return (request.cutoff if request.cutoff else None, request.top_k if request.top_k else None)
+
+
+def _media_item_id(request: ai_server_pb2.ImageUrlRequest | ai_server_pb2.TagImageUrlRequest) -> str | None:
+    return request.media_item_id or None
+
+
+_OK = ai_server_pb2.ItemStatus(code=grpc.StatusCode.OK.value[0])
+
+
+def _item_error(exc: Exception, image_url: str) -> ai_server_pb2.ItemStatus:
+    if isinstance(exc, ImageSourceError):
+        return ai_server_pb2.ItemStatus(code=grpc.StatusCode.INVALID_ARGUMENT.value[0], message=str(exc))
+    if isinstance(exc, InferenceOverloadedError):
+        return ai_server_pb2.ItemStatus(code=grpc.StatusCode.RESOURCE_EXHAUSTED.value[0], message=str(exc))
+    LOGGER.exception("Batch item failed: %s", image_url, exc_info=exc)
+    return ai_server_pb2.ItemStatus(code=grpc.StatusCode.INTERNAL.value[0], message=str(exc))
+
+
+async def _aiter(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
 
 async def create_grpc_server(container: ServiceContainer | None = None) -> aio.Server:
     if container is None:
         container = get_container()
 
-    server = aio.server()
+    # Calls beyond maximum_concurrent_rpcs are rejected by gRPC itself with RESOURCE_EXHAUSTED.
+    server = aio.server(maximum_concurrent_rpcs=container.settings.grpc_max_concurrent_rpcs)
     ai_server_pb2_grpc.add_ImageScorerServicer_to_server(ImageScorerService(container), server)
     listen_addr = f"[::]:{container.settings.grpc_port}"
     server.add_insecure_port(listen_addr)
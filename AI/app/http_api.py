@@ -3,19 +3,26 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-from fastapi import Depends, FastAPI, File, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import JSONResponse
 
 from .container import ServiceContainer, get_container
+from .executor import InferenceOverloadedError
+from .similarity import SimilarityUnavailableError, UnknownMediaItemError
 from .models.tagger import TagPrediction as ModelTagPrediction
 from .schemas import (
+    AnalyzeResponse,
     HealthResponse,
     ScoreRequest,
     ScoreResponse,
+    SimilarItem,
+    SimilarRequest,
+    SimilarResponse,
     TagPrediction,
     TagRequest,
     TagResponse,
 )
-from .utils import ImageSourceError, load_image_from_bytes, load_image_from_source
+from .utils import ImageSource, ImageSourceError
 
 LOGGER = logging.getLogger(__name__)
 
@@ -28,6 +35,11 @@ def create_http_app(container: ServiceContainer | None = None) -> FastAPI:
 
     app.dependency_overrides[_get_container] = lambda: container
 
+    @app.exception_handler(InferenceOverloadedError)
+    async def overloaded(request: Request, exc: InferenceOverloadedError) -> JSONResponse:
+        LOGGER.warning("Rejecting %s: %s", request.url.path, exc)
+        return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
     @app.get("/health", response_model=HealthResponse)
     async def health() -> HealthResponse:
         return HealthResponse()
@@ -37,11 +49,11 @@ def create_http_app(container: ServiceContainer | None = None) -> FastAPI:
         if not payload.image_url:
             raise HTTPException(status_code=400, detail="image_url is required")
         try:
-            image = load_image_from_source(payload.image_url, timeout=container.settings.request_timeout_seconds)
+            source = await container.fetcher.fetch(payload.image_url)
+            predictions = await container.inference.tag(source, cutoff=payload.cutoff, top_k=payload.top_k)
         except ImageSourceError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-        predictions = container.tagger.predict(image, cutoff=payload.cutoff)
         return _format_tag_response(predictions, cutoff=payload.cutoff, default_cutoff=container.settings.default_cutoff)
 
     @app.post("/v1/score", response_model=ScoreResponse)
@@ -49,38 +61,78 @@ def create_http_app(container: ServiceContainer | None = None) -> FastAPI:
         if not payload.image_url:
             raise HTTPException(status_code=400, detail="image_url is required")
         try:
-            image = load_image_from_source(payload.image_url, timeout=container.settings.request_timeout_seconds)
+            source = await container.fetcher.fetch(payload.image_url)
+            result = await container.inference.score(source, payload.media_item_id)
         except ImageSourceError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-        result = container.aesthetic.score(image)
         return ScoreResponse(score=result.score, backend=result.backend)
 
+    @app.post("/v1/analyze", response_model=AnalyzeResponse)
+    async def analyze_image(payload: TagRequest, container: ServiceContainer = Depends(_get_container)) -> AnalyzeResponse:
+        if not payload.image_url:
+            raise HTTPException(status_code=400, detail="image_url is required")
+        try:
+            source = await container.fetcher.fetch(payload.image_url)
+            analysis = await container.inference.analyze(
+                source, cutoff=payload.cutoff, top_k=payload.top_k, media_item_id=payload.media_item_id
+            )
+        except ImageSourceError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+        tags = _format_tag_response(analysis.tags, cutoff=payload.cutoff, default_cutoff=container.settings.default_cutoff)
+        return AnalyzeResponse(
+            tags=tags.tags,
+            cutoff=tags.cutoff,
+            score=analysis.aesthetic.score,
+            backend=analysis.aesthetic.backend,
+        )
+
+    @app.post("/v1/similar", response_model=SimilarResponse)
+    async def similar_items(payload: SimilarRequest, container: ServiceContainer = Depends(_get_container)) -> SimilarResponse:
+        try:
+            if payload.media_item_id is not None:
+                items = await container.inference.similar(media_item_id=payload.media_item_id, k=payload.k)
+            elif payload.image_url:
+                source = await container.fetcher.fetch(payload.image_url)
+                items = await container.inference.similar(source=source, k=payload.k)
+            else:
+                raise HTTPException(status_code=400, detail="media_item_id or image_url is required")
+        except ImageSourceError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except UnknownMediaItemError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except SimilarityUnavailableError as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+        return SimilarResponse(items=[SimilarItem(media_item_id=item.media_item_id, score=item.score) for item in items])
+
     @app.post("/predict/file", response_model=list[TagPrediction])
     async def legacy_predict_file(
         file: UploadFile = File(...),
         cutoff: float | None = None,
+        top_k: int | None = Query(None, ge=1),
         container: ServiceContainer = Depends(_get_container),
     ) -> list[TagPrediction]:
         contents = await file.read()
         try:
-            image = load_image_from_bytes(contents)
+            predictions = await container.inference.tag(ImageSource(contents), cutoff=cutoff, top_k=top_k)
         except ImageSourceError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
-        predictions = container.tagger.predict(image, cutoff=cutoff)
         return [TagPrediction(tag=item.tag, weight=item.weight) for item in predictions]
 
     @app.post("/predict/url", response_model=list[TagPrediction])
     async def legacy_predict_url(
         image_path: str,
         cutoff: float | None = None,
+        top_k: int | None = Query(None, ge=1),
         container: ServiceContainer = Depends(_get_container),
     ) -> list[TagPrediction]:
         try:
-            image = load_image_from_source(image_path, timeout=container.settings.request_timeout_seconds)
+            source = await container.fetcher.fetch(image_path)
+            predictions = await container.inference.tag(source, cutoff=cutoff, top_k=top_k)
         except ImageSourceError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
-        predictions = container.tagger.predict(image, cutoff=cutoff)
         return [TagPrediction(tag=item.tag, weight=item.weight) for item in predictions]
 
     return app
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import struct
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+import torch
+from PIL import Image
+
+from .batching import MicroBatcher
+from .cache import InferenceCache, model_identity
+from .decoding import ImageDecoder
+from .embeddings import EmbeddingStore
+from .executor import InferenceExecutor
+from .models.aesthetic import AestheticScore, AestheticScorer
+from .models.tagger import TaggerModel, TagPrediction
+from .settings import Settings
+from .similarity import SimilarItem, SimilaritySearch, SimilarityUnavailableError, UnknownMediaItemError
+from .utils import ImageSource
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class ImageAnalysis:
+    tags: list[TagPrediction]
+    aesthetic: AestheticScore
+
+
+class InferenceService:
+    """Async front-end to the models shared by the HTTP and gRPC entry points.
+
+    Requests are coalesced by a :class:`MicroBatcher` per model so that concurrent
+    callers share a single forward pass on the :class:`InferenceExecutor` pool; cutoff
+    filtering happens per caller afterwards. Requests beyond the executor's pending
+    limit fail with :class:`InferenceOverloadedError`. Each batcher may keep every
+    executor thread busy, so ``MAX_WORKERS`` batches run at once across both models.
+    When an :class:`InferenceCache` is configured, the full tag probability vector and
+    the aesthetic score are stored per image digest, and images are only decoded on a miss.
+    Scores requested for a ``media_item_id`` also record the CLIP embedding in the
+    :class:`EmbeddingStore`, if one is configured, and in the similarity index.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        tagger: TaggerModel,
+        aesthetic: AestheticScorer,
+        decoder: ImageDecoder,
+        executor: InferenceExecutor,
+        cache: InferenceCache | None = None,
+        embeddings: EmbeddingStore | None = None,
+        similarity: SimilaritySearch | None = None,
+    ) -> None:
+        self._tagger = tagger
+        self._decoder = decoder
+        self._executor = executor
+        self._aesthetic = aesthetic
+        self._analyze_concurrently = settings.analyze_concurrently
+        self._cache = cache
+        self._embeddings = embeddings
+        self._similarity = similarity
+        self._tagger_id = model_identity(
+            "tagger", settings.tagger_model_path(), settings.tagger_tags_path(), settings.tagger_extra_tags_path()
+        )
+        aesthetic_path = (
+            settings.aesthetic_pipeline_path() if aesthetic.backend == "pipeline" else settings.aesthetic_checkpoint_path()
+        )
+        self._aesthetic_id = model_identity(f"aesthetic-{aesthetic.backend}", aesthetic_path)
+        self._tag_batcher: MicroBatcher[Image.Image, torch.Tensor] = MicroBatcher(
+            self._tag_batch,
+            max_batch_size=settings.batch_max_size,
+            max_wait_ms=settings.batch_max_wait_ms,
+            executor=executor.pool,
+            max_concurrency=executor.workers,
+            name="tagger-batcher",
+        )
+        self._score_batcher: MicroBatcher[Image.Image, AestheticScore] = MicroBatcher(
+            aesthetic.score_batch,
+            max_batch_size=settings.batch_max_size,
+            max_wait_ms=settings.batch_max_wait_ms,
+            executor=executor.pool,
+            max_concurrency=executor.workers,
+            name="aesthetic-batcher",
+        )
+
+    async def tag(self, source: ImageSource, cutoff: float | None = None, top_k: int | None = None) -> list[TagPrediction]:
+        with self._executor.admit():
+            probabilities = await self._tag_probabilities(source, await self._cache_get(self._tagger_id, source))
+        return self._tagger.tags_from_probabilities(probabilities, cutoff, top_k)
+
+    async def score(self, source: ImageSource, media_item_id: str | None = None) -> AestheticScore:
+        with self._executor.admit():
+            return await self._score(source, await self._cached_score(source, media_item_id), media_item_id)
+
+    async def analyze(
+        self,
+        source: ImageSource,
+        cutoff: float | None = None,
+        top_k: int | None = None,
+        media_item_id: str | None = None,
+    ) -> ImageAnalysis:
+        with self._executor.admit():
+            return await self._analyze(source, cutoff, top_k, media_item_id)
+
+    async def similar(
+        self, *, media_item_id: str | None = None, source: ImageSource | None = None, k: int = 10
+    ) -> list[SimilarItem]:
+        """Return up to ``k`` stored items closest to a stored item or to a new image."""
+        if self._similarity is None or self._embeddings is None:
+            raise SimilarityUnavailableError("Similarity search needs the mlp aesthetic backend and EMBEDDING_STORE_PATH")
+        if media_item_id is not None:
+            query = await self._executor.run_io(self._embeddings.get, media_item_id)
+            if query is None:
+                raise UnknownMediaItemError(f"No embedding stored for media item {media_item_id}")
+        elif source is not None:
+            with self._executor.admit():
+                result = await self._score_batcher.submit(await self._decoder.decode(source))
+            query = result.embedding
+        else:
+            raise ValueError("media_item_id or source is required")
+        return await self._executor.run_io(self._similarity.search, query, k, exclude=media_item_id)
+
+    async def close(self) -> None:
+        await self._tag_batcher.close()
+        await self._score_batcher.close()
+        self._executor.shutdown()
+        self._decoder.close()
+        if self._cache is not None:
+            self._cache.close()
+
+    async def _analyze(
+        self, source: ImageSource, cutoff: float | None, top_k: int | None, media_item_id: str | None
+    ) -> ImageAnalysis:
+        cached_tags = await self._cache_get(self._tagger_id, source)
+        cached_score = await self._cached_score(source, media_item_id)
+        if cached_tags is None or cached_score is None:
+            # Decode up front so the two models share one decoded image.
+            await self._decoder.decode(source)
+
+        if self._analyze_concurrently:
+            probabilities, aesthetic = await asyncio.gather(
+                self._tag_probabilities(source, cached_tags), self._score(source, cached_score, media_item_id)
+            )
+        else:
+            probabilities = await self._tag_probabilities(source, cached_tags)
+            aesthetic = await self._score(source, cached_score, media_item_id)
+        tags = self._tagger.tags_from_probabilities(probabilities, cutoff, top_k)
+        return ImageAnalysis(tags=tags, aesthetic=aesthetic)
+
+    async def _tag_probabilities(self, source: ImageSource, cached: bytes | None) -> torch.Tensor:
+        if cached is not None:
+            return torch.from_numpy(np.frombuffer(cached, dtype=np.float32).copy())
+        probabilities = await self._tag_batcher.submit(await self._decoder.decode(source))
+        await self._cache_put(self._tagger_id, source, probabilities.numpy().astype(np.float32).tobytes())
+        return probabilities
+
+    async def _score(self, source: ImageSource, cached: bytes | None, media_item_id: str | None) -> AestheticScore:
+        if cached is not None:
+            (value,) = struct.unpack("<d", cached)
+            return AestheticScore(score=value, backend=self._aesthetic.backend)
+        result = await self._score_batcher.submit(await self._decoder.decode(source))
+        await self._cache_put(self._aesthetic_id, source, struct.pack("<d", result.score))
+        if self._embeddings is not None and media_item_id is not None and result.embedding is not None:
+            await self._executor.run_io(self._record_embedding, media_item_id, result.embedding[np.newaxis])
+        return result
+
+    def _record_embedding(self, media_item_id: str, embedding: np.ndarray) -> None:
+        assert self._embeddings is not None
+        self._embeddings.add([media_item_id], embedding)
+        if self._similarity is not None:
+            self._similarity.add(media_item_id, embedding)
+
+    async def _cached_score(self, source: ImageSource, media_item_id: str | None) -> bytes | None:
+        if self._embeddings is not None and media_item_id is not None and media_item_id not in self._embeddings:
+            # Recompute so the item's embedding gets stored alongside the score.
+            return None
+        return await self._cache_get(self._aesthetic_id, source)
+
+    async def _cache_get(self, model: str, source: ImageSource) -> bytes | None:
+        if self._cache is None:
+            return None
+        return await self._executor.run_io(self._cache.get, source.digest, model)
+
+    async def _cache_put(self, model: str, source: ImageSource, payload: bytes) -> None:
+        if self._cache is None:
+            return
+        await self._executor.run_io(self._cache.put, source.digest, model, payload)
+
+    def _tag_batch(self, images: Sequence[Image.Image]) -> list[torch.Tensor]:
+        return list(self._tagger.probabilities(images))
+
+
+__all__ = ["ImageAnalysis", "InferenceService"]
@@ -69,6 +69,9 @@ async def serve() -> None:
     if grpc_server is not None:
         await grpc_server.stop(grace=5)
 
+    await container.fetcher.aclose()
+    await container.inference.close()
+
 
 def main() -> None:
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
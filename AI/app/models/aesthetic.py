@@ -3,7 +3,7 @@ from __future__ import annotations
 import logging
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Sequence
 
 import numpy as np
 import torch
@@ -33,6 +33,23 @@ class _MLP(torch.nn.Module):
         return self.layers(x)
 
 
+def load_mlp(checkpoint_path: Path, device: torch.device) -> _MLP:
+    """Load an aesthetic MLP head that maps normalized CLIP ViT-L/14 embeddings to a score."""
+    mlp = _MLP()
+    state = torch.load(checkpoint_path, map_location=device)
+    mlp.load_state_dict(state)
+    mlp.to(device)
+    mlp.eval()
+    return mlp
+
+
+def score_embeddings(mlp: torch.nn.Module, embeddings: np.ndarray, device: torch.device) -> np.ndarray:
+    """Run ``mlp`` over an ``(N, 768)`` embedding matrix and return ``N`` float scores."""
+    tensor = torch.from_numpy(np.ascontiguousarray(embeddings, dtype=np.float32)).to(device)
+    with torch.no_grad():
+        return mlp(tensor).cpu().numpy()[:, 0]
+
+
 def _normalize(array: np.ndarray) -> np.ndarray:
     norms = np.linalg.norm(array, axis=-1, keepdims=True)
     norms[norms == 0] = 1
@@ -43,6 +60,8 @@ def _normalize(array: np.ndarray) -> np.ndarray:
 class AestheticScore:
     score: float
     backend: Literal["pipeline", "mlp"]
+    # Normalized CLIP image embedding the score was computed from (mlp backend only).
+    embedding: np.ndarray | None = None
 
 
 class AestheticScorer:
@@ -65,11 +84,7 @@ class AestheticScorer:
             if checkpoint_path is None or not checkpoint_path.exists():
                 raise FileNotFoundError("Aesthetic checkpoint not found.")
             LOGGER.info("Loading aesthetic MLP checkpoint from %s", checkpoint_path)
-            mlp = _MLP()
-            state = torch.load(checkpoint_path, map_location=device)
-            mlp.load_state_dict(state)
-            mlp.to(device)
-            mlp.eval()
+            mlp = load_mlp(checkpoint_path, device)
 
             clip_model = CLIPModel.from_pretrained("openai/clip-vit-large-patch14")
             clip_model.to(device)
@@ -95,27 +110,59 @@ class AestheticScorer:
 
         return cls(backend=backend, device=device, pipeline_dir=pipeline_dir, checkpoint_path=checkpoint)
 
+    @property
+    def backend(self) -> Literal["pipeline", "mlp"]:
+        return self._backend
+
+    @property
+    def input_size(self) -> int | None:
+        """Short side the backend resizes images to, or None if it cannot be determined."""
+        if self._backend == "pipeline":
+            processor = getattr(self._pipeline, "image_processor", None)
+        else:
+            processor = getattr(self._clip_processor, "image_processor", None)
+        size = getattr(processor, "size", None)
+        if not isinstance(size, dict):
+            return None
+        return size.get("shortest_edge") or size.get("height")
+
     def score(self, image: Image.Image) -> AestheticScore:
+        return self.score_batch([image])[0]
+
+    def score_batch(self, images: Sequence[Image.Image]) -> list[AestheticScore]:
         if self._backend == "pipeline":
             assert self._pipeline is not None
-            outputs = self._pipeline(images=[image])
-            result = outputs[0]
-            if isinstance(result, list):
-                hq = next((item for item in result if item["label"].lower() in {"hq", "high quality"}), result[0])
-                score = float(hq["score"])
-            else:
-                score = float(result["score"])
-            return AestheticScore(score=score, backend="pipeline")
-
-        assert self._mlp is not None and self._clip_model is not None and self._clip_processor is not None
-        processed = self._clip_processor(images=image, return_tensors="pt")
+            outputs = self._pipeline(images=list(images))
+            return [AestheticScore(score=_pipeline_score(result), backend="pipeline") for result in outputs]
+
+        assert self._mlp is not None
+        embeddings = self.embed(images)
+        predictions = score_embeddings(self._mlp, embeddings, self._device)
+        return [
+            AestheticScore(score=float(prediction), backend="mlp", embedding=embedding)
+            for prediction, embedding in zip(predictions, embeddings)
+        ]
+
+    @property
+    def supports_embeddings(self) -> bool:
+        return self._backend == "mlp"
+
+    def embed(self, images: Sequence[Image.Image]) -> np.ndarray:
+        """Return normalized CLIP ViT-L/14 image embeddings as an ``(N, 768)`` float32 array."""
+        if self._clip_model is None or self._clip_processor is None:
+            raise RuntimeError("CLIP embeddings are only available with the mlp aesthetic backend")
+        processed = self._clip_processor(images=list(images), return_tensors="pt")
         pixel_values = processed.to(self._device)
         with torch.no_grad():
             features = self._clip_model.get_image_features(**pixel_values)
-            embeddings = _normalize(features.cpu().numpy())
-            tensor = torch.from_numpy(embeddings).to(self._device)
-            prediction = self._mlp(tensor).cpu().numpy()[0][0]
-        return AestheticScore(score=float(prediction), backend="mlp")
+        return _normalize(features.cpu().numpy().astype(np.float32))
+
+
+def _pipeline_score(result: list[dict] | dict) -> float:
+    if isinstance(result, list):
+        hq = next((item for item in result if item["label"].lower() in {"hq", "high quality"}), result[0])
+        return float(hq["score"])
+    return float(result["score"])
 
 
-__all__ = ["AestheticScorer", "AestheticScore"]
+__all__ = ["AestheticScorer", "AestheticScore", "load_mlp", "score_embeddings"]
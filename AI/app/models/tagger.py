@@ -4,7 +4,7 @@ import json
 import logging
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Sequence
 
 import torch
 from PIL import Image
@@ -22,6 +22,8 @@ class TagPrediction:
 
 
 class TaggerModel:
+    input_size = 448
+
     def __init__(
         self,
         model: torch.nn.Module,
@@ -35,7 +37,7 @@ class TaggerModel:
         self._cutoff = cutoff
         self._transform = transforms.Compose(
             [
-                transforms.Resize((448, 448)),
+                transforms.Resize((self.input_size, self.input_size)),
                 transforms.ToTensor(),
                 transforms.Normalize(
                     mean=[0.48145466, 0.4578275, 0.40821073],
@@ -65,24 +67,54 @@ class TaggerModel:
         tags = _load_tags(settings.tagger_tags_path(), settings.tagger_extra_tags_path())
         return cls(model=model, allowed_tags=tags, device=device, cutoff=settings.default_cutoff)
 
-    def predict(self, image: Image.Image, cutoff: float | None = None) -> list[TagPrediction]:
-        probability_cutoff = cutoff if cutoff is not None else self._cutoff
+    def predict(self, image: Image.Image, cutoff: float | None = None, top_k: int | None = None) -> list[TagPrediction]:
+        return self.tags_from_batch(self.probabilities([image]), cutoff, top_k)[0]
 
-        tensor = self._transform(image).unsqueeze(0).to(self._device)
+    def probabilities(self, images: Sequence[Image.Image]) -> torch.Tensor:
+        """Run one forward pass over ``images`` and return an (N, tags) probability tensor on the CPU."""
+        tensor = torch.stack([self._transform(image) for image in images]).to(self._device)
         with torch.no_grad():
             logits = self._model(tensor)
-
-        probabilities = torch.sigmoid(logits[0])
-        selected = torch.where(probabilities >= probability_cutoff)[0]
-
-        results: list[TagPrediction] = []
-        for index in selected:
-            tag = self._tags[index]
-            weight = float(probabilities[index].item())
-            results.append(TagPrediction(tag=tag, weight=weight))
-
-        results.sort(key=lambda item: item.weight, reverse=True)
-        return results
+        return torch.sigmoid(logits).cpu()
+
+    def tags_from_probabilities(
+        self, probabilities: torch.Tensor, cutoff: float | None = None, top_k: int | None = None
+    ) -> list[TagPrediction]:
+        return self.tags_from_batch(probabilities.unsqueeze(0), cutoff, top_k)[0]
+
+    def tags_from_batch(
+        self, probabilities: torch.Tensor, cutoff: float | None = None, top_k: int | None = None
+    ) -> list[list[TagPrediction]]:
+        """Select tags at or above ``cutoff`` for each row of an (N, tags) probability tensor."""
+        return [
+            [TagPrediction(tag=self._tags[position], weight=weight) for position, weight in row]
+            for row in self.positions_from_batch(probabilities, cutoff, top_k)
+        ]
+
+    def positions_from_batch(
+        self, probabilities: torch.Tensor, cutoff: float | None = None, top_k: int | None = None
+    ) -> list[list[tuple[int, float]]]:
+        """Like :meth:`tags_from_batch`, but return ``(output position, weight)`` pairs.
+
+        Selection runs as one masked ``topk`` on the tensor's device followed by a single
+        transfer to NumPy; each row is sorted by descending weight and capped at ``top_k``
+        (``top_k <= 0`` selects no tags).
+        """
+        probability_cutoff = cutoff if cutoff is not None else self._cutoff
+        counts = (probabilities >= probability_cutoff).sum(dim=-1)
+        if top_k is not None:
+            counts = counts.clamp(max=max(top_k, 0))
+        width = int(counts.max().item()) if counts.numel() else 0
+        if width == 0:
+            return [[] for _ in range(probabilities.shape[0])]
+
+        values, indices = torch.topk(probabilities, width, dim=-1)
+        weights = values.cpu().numpy()
+        positions = indices.cpu().numpy()
+        return [
+            list(zip(row_positions[:count], row_weights[:count]))
+            for row_weights, row_positions, count in zip(weights.tolist(), positions.tolist(), counts.tolist())
+        ]
 
 
 def _load_tags(tags_path: Path, extra_path: Path) -> list[str]:
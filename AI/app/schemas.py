@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from typing import Literal, Optional
 
-from pydantic import BaseModel, Field, confloat
+from pydantic import BaseModel, Field, confloat, conint
+
+from .similarity import MAX_SIMILAR_K
 
 
 class HealthResponse(BaseModel):
@@ -12,6 +14,8 @@ class HealthResponse(BaseModel):
 class TagRequest(BaseModel):
     image_url: Optional[str] = Field(default=None, description="HTTP(S) URL or absolute path to the image")
     cutoff: confloat(ge=0.0, le=1.0) | None = Field(default=None, description="Probability threshold for returning tags")
+    top_k: conint(ge=1) | None = Field(default=None, description="Maximum number of tags to return")
+    media_item_id: Optional[str] = Field(default=None, description="Store the image embedding under this media item (analyze only)")
 
 
 class TagPrediction(BaseModel):
@@ -26,6 +30,7 @@ class TagResponse(BaseModel):
 
 class ScoreRequest(BaseModel):
     image_url: Optional[str] = None
+    media_item_id: Optional[str] = Field(default=None, description="Store the image embedding under this media item")
 
 
 class ScoreResponse(BaseModel):
@@ -33,6 +38,28 @@ class ScoreResponse(BaseModel):
     backend: str
 
 
+class SimilarRequest(BaseModel):
+    media_item_id: Optional[str] = Field(default=None, description="Find items similar to this stored item")
+    image_url: Optional[str] = Field(default=None, description="Find items similar to this image instead")
+    k: conint(ge=1, le=MAX_SIMILAR_K) = Field(default=10, description="Number of results")
+
+
+class SimilarItem(BaseModel):
+    media_item_id: str
+    score: float
+
+
+class SimilarResponse(BaseModel):
+    items: list[SimilarItem]
+
+
+class AnalyzeResponse(BaseModel):
+    tags: list[TagPrediction]
+    cutoff: float
+    score: float
+    backend: str
+
+
 __all__ = [
     "HealthResponse",
     "TagRequest",
@@ -40,4 +67,8 @@ __all__ = [
     "TagPrediction",
     "ScoreRequest",
     "ScoreResponse",
+    "AnalyzeResponse",
+    "SimilarRequest",
+    "SimilarItem",
+    "SimilarResponse",
 ]
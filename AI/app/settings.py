@@ -12,6 +12,12 @@ def _resolve_path(value: str | None, default: Path) -> Path:
     return candidate if candidate.is_absolute() else (Path.cwd() / candidate).resolve()
 
 
+def _resolve_optional_path(value: str | None) -> Path | None:
+    if not value:
+        return None
+    return _resolve_path(value, Path(value))
+
+
 def _resolve_device(value: str | None) -> str:
     if not value or value.lower() in {"auto", ""}:
         return "cuda" if _cuda_available() else "cpu"
@@ -39,6 +45,10 @@ class Settings:
     grpc_port: int = field(default_factory=lambda: int(os.getenv("GRPC_PORT", "9090")))
     log_level: str = field(default_factory=lambda: os.getenv("LOG_LEVEL", "info"))
     max_workers: int = field(default_factory=lambda: int(os.getenv("MAX_WORKERS", "4")))
+    io_workers: int = field(default_factory=lambda: int(os.getenv("IO_WORKERS", "4")))
+    inference_max_pending: int = field(default_factory=lambda: int(os.getenv("INFERENCE_MAX_PENDING", "256")))
+    grpc_max_concurrent_rpcs: int = field(default_factory=lambda: int(os.getenv("GRPC_MAX_CONCURRENT_RPCS", "256")))
+    grpc_method_max_pending: int = field(default_factory=lambda: int(os.getenv("GRPC_METHOD_MAX_PENDING", "128")))
     enable_http: bool = field(default_factory=lambda: os.getenv("ENABLE_HTTP", "1") != "0")
     enable_grpc: bool = field(default_factory=lambda: os.getenv("ENABLE_GRPC", "1") != "0")
 
@@ -63,6 +73,21 @@ class Settings:
     )
 
     request_timeout_seconds: int = field(default_factory=lambda: int(os.getenv("REQUEST_TIMEOUT_SECONDS", "15")))
+    fetch_max_connections: int = field(default_factory=lambda: int(os.getenv("FETCH_MAX_CONNECTIONS", "64")))
+    fetch_max_per_host: int = field(default_factory=lambda: int(os.getenv("FETCH_MAX_PER_HOST", "8")))
+    fetch_max_mb: int = field(default_factory=lambda: int(os.getenv("FETCH_MAX_MB", "64")))
+
+    inference_cache_path: Path | None = field(default_factory=lambda: _resolve_optional_path(os.getenv("INFERENCE_CACHE_PATH")))
+    inference_cache_max_mb: int = field(default_factory=lambda: int(os.getenv("INFERENCE_CACHE_MAX_MB", "2048")))
+    embedding_store_path: Path | None = field(default_factory=lambda: _resolve_optional_path(os.getenv("EMBEDDING_STORE_PATH")))
+    similarity_nlist: int = field(default_factory=lambda: int(os.getenv("SIMILARITY_NLIST", "0")))
+    similarity_nprobe: int = field(default_factory=lambda: int(os.getenv("SIMILARITY_NPROBE", "16")))
+
+    batch_max_size: int = field(default_factory=lambda: int(os.getenv("BATCH_MAX_SIZE", "16")))
+    batch_max_wait_ms: float = field(default_factory=lambda: float(os.getenv("BATCH_MAX_WAIT_MS", "10")))
+    decode_workers: int = field(default_factory=lambda: int(os.getenv("DECODE_WORKERS", "4")))
+    analyze_concurrently: bool = field(default_factory=lambda: os.getenv("ANALYZE_CONCURRENTLY", "1") != "0")
+    stream_max_inflight: int = field(default_factory=lambda: int(os.getenv("STREAM_MAX_INFLIGHT", "64")))
 
     def tagger_model_path(self) -> Path:
         return (self.model_root / self.tagger_model_file).resolve()
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .embeddings import ID_DTYPE, EmbeddingStore
+from .settings import Settings
+
+LOGGER = logging.getLogger(__name__)
+
+# Below this many vectors per list the IVF partitioning costs more recall than it saves time.
+_MIN_VECTORS_PER_LIST = 39
+_TRAINING_VECTORS_PER_LIST = 64
+# Rows per centroid-assignment matmul, keeping the (rows, nlist) score matrix small.
+_ASSIGN_CHUNK = 8192
+# Largest k a client may ask for; beyond this a search is a full sort of the library.
+MAX_SIMILAR_K = 1000
+
+
+class SimilarityUnavailableError(RuntimeError):
+    pass
+
+
+class UnknownMediaItemError(LookupError):
+    pass
+
+
+@dataclass(slots=True)
+class SimilarItem:
+    media_item_id: str
+    score: float
+
+
+class IVFIndex:
+    """Inverted-file index for inner-product search over normalized embeddings.
+
+    Vectors are bucketed by their nearest k-means centroid; a query scores every centroid
+    and then scans only the ``nprobe`` closest buckets. Vectors are kept as float16 and
+    widened to float32 per probed bucket. With ``nlist=1`` the index is an exact flat scan.
+    Re-adding an id moves it, so each id is returned at most once.
+    """
+
+    def __init__(self, centroids: np.ndarray, *, nprobe: int) -> None:
+        self._centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self._nprobe = nprobe
+        dim = self._centroids.shape[1]
+        self._ids: list[np.ndarray] = [np.empty(0, dtype=ID_DTYPE) for _ in range(len(self._centroids))]
+        self._vectors: list[np.ndarray] = [np.empty((0, dim), dtype=np.float16) for _ in range(len(self._centroids))]
+        # New vectors are staged per list and merged on the next search that probes it.
+        self._staged: dict[int, list[tuple[np.ndarray, np.ndarray]]] = {}
+        self._list_of: dict[bytes, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(
+        cls,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        *,
+        nlist: int = 0,
+        nprobe: int = 16,
+        iterations: int = 10,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """Train centroids on (a sample of) ``vectors`` and add them all.
+
+        ``nlist=0`` picks ``sqrt(n)`` lists, falling back to a single flat list for small
+        collections.
+        """
+        count, dim = len(ids), vectors.shape[1]
+        if nlist <= 0:
+            nlist = int(math.sqrt(count))
+        nlist = max(1, min(nlist, count // _MIN_VECTORS_PER_LIST))
+        if nlist == 1:
+            centroids = np.zeros((1, dim), dtype=np.float32)
+        else:
+            rng = np.random.default_rng(seed)
+            sample = rng.choice(count, size=min(count, _TRAINING_VECTORS_PER_LIST * nlist), replace=False)
+            sample.sort()
+            centroids = _spherical_kmeans(np.asarray(vectors[sample], dtype=np.float32), nlist, iterations, rng)
+        index = cls(centroids, nprobe=nprobe)
+        chunk = 65536
+        for start in range(0, count, chunk):
+            index.add(ids[start : start + chunk], vectors[start : start + chunk])
+        return index
+
+    @property
+    def nlist(self) -> int:
+        return len(self._centroids)
+
+    def __len__(self) -> int:
+        return len(self._list_of)
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        ids = np.asarray(ids, dtype=ID_DTYPE)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        lists = self._assign(vectors)
+        with self._lock:
+            for media_id in ids.tolist():
+                previous = self._list_of.get(media_id)
+                if previous is not None:
+                    self._remove(media_id, previous)
+            for list_no in np.unique(lists).tolist():
+                mask = lists == list_no
+                self._staged.setdefault(list_no, []).append((ids[mask], vectors[mask].astype(np.float16)))
+            self._list_of.update(zip(ids.tolist(), lists.tolist()))
+
+    def search(self, query: np.ndarray, k: int, *, nprobe: int | None = None, exclude: str | None = None) -> list[SimilarItem]:
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        nprobe = min(nprobe or self._nprobe, self.nlist)
+        if nprobe == self.nlist:
+            probes = np.arange(self.nlist)
+        else:
+            probes = np.argpartition(self._centroids @ query, -nprobe)[-nprobe:]
+        with self._lock:
+            candidates = [self._list(int(list_no)) for list_no in probes]
+        ids = np.concatenate([list_ids for list_ids, _ in candidates])
+        if len(ids) == 0:
+            return []
+        scores = np.concatenate([list_vectors.astype(np.float32) @ query for _, list_vectors in candidates])
+        if exclude is not None:
+            scores[ids == exclude.encode()] = -np.inf
+        k = min(k, len(ids))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [SimilarItem(media_item_id=ids[i].decode(), score=float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        if self.nlist == 1:
+            return np.zeros(len(vectors), dtype=np.int64)
+        return _nearest(vectors, self._centroids)
+
+    def _list(self, list_no: int) -> tuple[np.ndarray, np.ndarray]:
+        staged = self._staged.pop(list_no, None)
+        if staged:
+            self._ids[list_no] = np.concatenate([self._ids[list_no], *(ids for ids, _ in staged)])
+            self._vectors[list_no] = np.concatenate([self._vectors[list_no], *(vectors for _, vectors in staged)])
+        return self._ids[list_no], self._vectors[list_no]
+
+    def _remove(self, media_id: bytes, list_no: int) -> None:
+        ids, vectors = self._list(list_no)
+        keep = ids != media_id
+        self._ids[list_no] = ids[keep]
+        self._vectors[list_no] = vectors[keep]
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_CHUNK):
+        chunk = np.asarray(vectors[start : start + _ASSIGN_CHUNK], dtype=np.float32)
+        assignment[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+def _spherical_kmeans(vectors: np.ndarray, nlist: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest(vectors, centroids)
+        counts = np.bincount(assignment, minlength=nlist)
+        filled = np.flatnonzero(counts)
+        starts = (np.cumsum(counts) - counts)[filled]
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(vectors[np.argsort(assignment, kind="stable")], starts, axis=0)
+        empty = counts == 0
+        # Re-seed empty lists from random vectors instead of letting them die.
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        centroids = sums / norms
+    return centroids
+
+
+class SimilaritySearch:
+    """Keeps an :class:`IVFIndex` in sync with an :class:`EmbeddingStore`.
+
+    Training the index over a large library takes a while, so it is built in a background
+    thread and searches fail with :class:`SimilarityUnavailableError` until it is ready.
+    Embeddings written to the store during the build are picked up before it goes live.
+    """
+
+    def __init__(self, store: EmbeddingStore, *, nlist: int, nprobe: int) -> None:
+        self._store = store
+        self._nlist = nlist
+        self._nprobe = nprobe
+        self._index: IVFIndex | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, store: EmbeddingStore, settings: Settings) -> "SimilaritySearch":
+        return cls(store, nlist=settings.similarity_nlist, nprobe=settings.similarity_nprobe)
+
+    def start(self) -> None:
+        threading.Thread(target=self._build, name="similarity-index", daemon=True).start()
+
+    def add(self, media_item_id: str, vector: np.ndarray) -> None:
+        with self._lock:
+            if self._index is not None:
+                self._index.add(np.array([media_item_id], dtype=ID_DTYPE), vector)
+
+    def search(self, query: np.ndarray, k: int, *, exclude: str | None = None) -> list[SimilarItem]:
+        index = self._index
+        if index is None:
+            raise SimilarityUnavailableError("Similarity index is still being built")
+        return index.search(query, k, exclude=exclude)
+
+    def _build(self) -> None:
+        started = time.perf_counter()
+        cursor = self._store.row_count
+        ids, vectors = self._store.snapshot()
+        index = IVFIndex.build(ids, vectors, nlist=self._nlist, nprobe=self._nprobe)
+        with self._lock:
+            late_ids, late_vectors = self._store.rows_since(cursor)
+            if len(late_ids):
+                index.add(late_ids, late_vectors)
+            self._index = index
+        LOGGER.info(
+            "Similarity index: %d vectors in %d lists, built in %.1fs",
+            len(index),
+            index.nlist,
+            time.perf_counter() - started,
+        )
+
+
+__all__ = [
+    "IVFIndex",
+    "MAX_SIMILAR_K",
+    "SimilarItem",
+    "SimilarityUnavailableError",
+    "SimilaritySearch",
+    "UnknownMediaItemError",
+]
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
+import hashlib
 import io
 import logging
 from pathlib import Path
 from typing import Optional
 
-import requests
 from PIL import Image
 
 LOGGER = logging.getLogger(__name__)
@@ -15,31 +15,56 @@ class ImageSourceError(RuntimeError):
     pass
 
 
-def load_image_from_source(source: str, *, timeout: int = 15) -> Image.Image:
-    if source.startswith("http://") or source.startswith("https://"):
-        LOGGER.debug("Fetching image from %s", source)
-        response = requests.get(source, timeout=timeout)
-        if response.status_code >= 400:
-            raise ImageSourceError(f"Failed to fetch image: HTTP {response.status_code}")
-        return _open_image(response.content)
+class ImageSource:
+    """Raw image bytes plus their SHA-256 digest; decoding is deferred until needed."""
 
+    __slots__ = ("data", "digest", "image")
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.digest = hashlib.sha256(data).hexdigest()
+        self.image: Optional[Image.Image] = None
+
+    @property
+    def decoded(self) -> bool:
+        return self.image is not None
+
+    def decode(self, target_size: int | None = None) -> Image.Image:
+        if self.image is None:
+            self.image = decode_image(self.data, target_size=target_size)
+        return self.image
+
+
+def read_image_path(source: str) -> ImageSource:
     path = Path(source)
     if not path.exists():
         raise ImageSourceError(f"Image path does not exist: {source}")
     if path.is_dir():
         raise ImageSourceError(f"Expected file but found directory: {source}")
-    return Image.open(path).convert("RGB")
-
+    return ImageSource(path.read_bytes())
 
-def load_image_from_bytes(data: bytes) -> Image.Image:
-    return _open_image(data)
 
+def decode_image(data: bytes, *, target_size: int | None = None) -> Image.Image:
+    """Decode ``data`` to RGB, doing as little work as possible for a ``target_size`` model input.
 
-def _open_image(data: bytes) -> Image.Image:
+    JPEGs are decoded through the DCT-domain draft mode and other formats are reduced by an
+    integer factor, in both cases keeping the short side at or above ``target_size``.
+    Animated GIF/WebP images are represented by their middle frame.
+    """
     try:
-        return Image.open(io.BytesIO(data)).convert("RGB")
+        image = Image.open(io.BytesIO(data))
+        if getattr(image, "is_animated", False):
+            image.seek(image.n_frames // 2)
+        if target_size and image.format == "JPEG":
+            image.draft("RGB", (target_size, target_size))
+        image = image.convert("RGB")
+        if target_size:
+            factor = min(image.width, image.height) // target_size
+            if factor >= 2:
+                image = image.reduce(factor)
+        return image
     except Exception as exc:  # noqa: BLE001
         raise ImageSourceError("Failed to decode image") from exc
 
 
-__all__ = ["load_image_from_source", "load_image_from_bytes", "ImageSourceError"]
+__all__ = ["ImageSource", "decode_image", "read_image_path", "ImageSourceError"]
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.embeddings import EmbeddingStore
+from app.models.aesthetic import AestheticScorer
+from app.models.tagger import TaggerModel
+from app.settings import Settings
+from app.utils import decode_image
+
+LOGGER = logging.getLogger(__name__)
+
+# media_types.type values that are never decodable as a still image.
+SKIPPED_MEDIA_TYPES = ("video", "document")
+
+
+@dataclass(slots=True)
+class PendingItem:
+    media_item_id: str
+    file_name: str
+    needs_score: bool
+    needs_tags: bool
+
+
+@dataclass(slots=True)
+class Checkpoint:
+    """Progress of a backfill run; ``last_id`` is the last media item whose batch was committed."""
+
+    last_id: str = ""
+    processed: int = 0
+    failed: int = 0
+
+    @classmethod
+    def load(cls, path: Path) -> "Checkpoint":
+        if not path.exists():
+            return cls()
+        with path.open("r", encoding="utf-8") as fp:
+            return cls(**json.load(fp))
+
+    def save(self, path: Path) -> None:
+        # Write-then-rename so a crash mid-write leaves the previous checkpoint intact.
+        temporary = path.with_name(path.name + ".tmp")
+        with temporary.open("w", encoding="utf-8") as fp:
+            json.dump({"last_id": self.last_id, "processed": self.processed, "failed": self.failed}, fp)
+        os.replace(temporary, path)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Tag and score every library item that is missing tags or an aesthetic score.")
+    parser.add_argument("--database", type=Path, required=True, help="Teledeck SQLite database")
+    parser.add_argument("--media-root", type=Path, required=True, help="Directory holding media_items.file_name files")
+    parser.add_argument("--checkpoint", type=Path, help="Progress file (default: <database>.backfill.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start from the first item")
+    parser.add_argument("--batch-size", type=int, default=32, help="Images per forward pass and per database commit (default: 32)")
+    parser.add_argument("--workers", type=int, help="Decode processes (default: DECODE_WORKERS)")
+    parser.add_argument("--cutoff", type=float, help="Tag probability cutoff (default: TAGGER_DEFAULT_CUTOFF)")
+    parser.add_argument("--top-k", type=int, help="Keep at most this many tags per item")
+    parser.add_argument("--skip-tags", action="store_true", help="Only fill in missing aesthetic scores")
+    parser.add_argument("--skip-scores", action="store_true", help="Only fill in missing tags")
+    parser.add_argument("--limit", type=int, help="Stop after this many items")
+    parser.add_argument("--log-level", default="INFO", help="Python logging level (default: INFO)")
+    return parser.parse_args()
+
+
+def fetch_pending(
+    conn: sqlite3.Connection, after: str, limit: int, *, scores: bool, tags: bool
+) -> list[PendingItem]:
+    """Next ``limit`` live image items after ``after`` (by id) that lack a score and/or tags."""
+    placeholders = ", ".join("?" for _ in SKIPPED_MEDIA_TYPES)
+    missing_score = "NOT EXISTS (SELECT 1 FROM aesthetic_score s WHERE s.media_item_id = m.id)" if scores else "0"
+    missing_tags = "NOT EXISTS (SELECT 1 FROM media_item_tags t WHERE t.media_item_id = m.id)" if tags else "0"
+    rows = conn.execute(
+        f"""
+        SELECT m.id, m.file_name, {missing_score} AS needs_score, {missing_tags} AS needs_tags
+        FROM media_items m
+        JOIN media_types mt ON mt.id = m.media_type_id
+        WHERE m.user_deleted = 0
+          AND m.id > ?
+          AND mt.type NOT IN ({placeholders})
+          AND (needs_score OR needs_tags)
+        ORDER BY m.id
+        LIMIT ?
+        """,
+        (after, *SKIPPED_MEDIA_TYPES, limit),
+    ).fetchall()
+    return [PendingItem(row[0], row[1], bool(row[2]), bool(row[3])) for row in rows]
+
+
+def load_and_decode(path: Path, target_size: int | None) -> Image.Image | None:
+    """Read and decode one file in a worker process; None if it is missing or not an image."""
+    try:
+        return decode_image(path.read_bytes(), target_size=target_size)
+    except Exception:  # noqa: BLE001
+        return None
+
+
+def load_tag_ids(conn: sqlite3.Connection) -> dict[int, int]:
+    return dict(conn.execute("SELECT position, tag_id FROM tag_indexes").fetchall())
+
+
+def write_results(
+    conn: sqlite3.Connection,
+    scores: list[tuple[str, float]],
+    tagged: list[str],
+    tag_rows: list[tuple[str, int, float]],
+) -> None:
+    """Commit one batch of scores and tag replacements in a single transaction."""
+    with conn:
+        conn.executemany(
+            "INSERT INTO aesthetic_score (media_item_id, score) VALUES (?, ?) "
+            "ON CONFLICT(media_item_id) DO UPDATE SET score = excluded.score",
+            scores,
+        )
+        conn.executemany("DELETE FROM media_item_tags WHERE media_item_id = ?", ((media_item_id,) for media_item_id in tagged))
+        conn.executemany(
+            "INSERT INTO media_item_tags (media_item_id, tag_id, weight) VALUES (?, ?, ?) "
+            # Two positions can map to one tag; keep the stronger prediction.
+            "ON CONFLICT(media_item_id, tag_id) DO UPDATE SET weight = max(weight, excluded.weight)",
+            tag_rows,
+        )
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    if args.skip_tags and args.skip_scores:
+        raise SystemExit("Nothing to do: --skip-tags and --skip-scores are both set")
+    settings = Settings()
+    checkpoint_path = args.checkpoint or args.database.with_name(args.database.name + ".backfill.json")
+    checkpoint = Checkpoint() if args.restart else Checkpoint.load(checkpoint_path)
+    if checkpoint.last_id:
+        LOGGER.info("Resuming after %s (%d processed, %d failed so far)", checkpoint.last_id, checkpoint.processed, checkpoint.failed)
+
+    conn = sqlite3.connect(args.database)
+    tag_ids: dict[int, int] = {}
+    if not args.skip_tags:
+        tag_ids = load_tag_ids(conn)
+        if not tag_ids:
+            raise SystemExit("tag_indexes is empty: run the admin --add-tags step first")
+
+    # Fork the decode workers before loading any model so they don't inherit its memory.
+    workers = args.workers if args.workers is not None else settings.decode_workers
+    pool = ProcessPoolExecutor(max_workers=max(workers, 1), mp_context=multiprocessing.get_context("fork"))
+    pool.submit(int).result()
+
+    tagger = None if args.skip_tags else TaggerModel.from_settings(settings)
+    aesthetic = None if args.skip_scores else AestheticScorer.from_settings(settings)
+    store = EmbeddingStore.from_settings(settings) if aesthetic is not None and aesthetic.supports_embeddings else None
+    sizes = [size for size in (tagger and tagger.input_size, aesthetic and aesthetic.input_size) if size]
+    target_size = max(sizes) if sizes else None
+
+    fetched = 0
+
+    def next_batch(after: str) -> tuple[list[PendingItem], list[Future]]:
+        nonlocal fetched
+        # Never fetch, and so never decode, past --limit.
+        size = args.batch_size if args.limit is None else min(args.batch_size, args.limit - fetched)
+        if size <= 0:
+            return [], []
+        items = fetch_pending(conn, after, size, scores=aesthetic is not None, tags=tagger is not None)
+        fetched += len(items)
+        return items, [pool.submit(load_and_decode, args.media_root / item.file_name, target_size) for item in items]
+
+    started = time.perf_counter()
+    done = 0
+    try:
+        items, futures = next_batch(checkpoint.last_id)
+        while items:
+            # Queue the next batch's decodes so they overlap this batch's forward passes.
+            upcoming = next_batch(items[-1].media_item_id)
+            decoded = [(item, future.result()) for item, future in zip(items, futures)]
+            ok = [(item, image) for item, image in decoded if image is not None]
+
+            scores: list[tuple[str, float]] = []
+            tagged: list[str] = []
+            tag_rows: list[tuple[str, int, float]] = []
+            to_score = [(item, image) for item, image in ok if item.needs_score]
+            if aesthetic is not None and to_score:
+                results = aesthetic.score_batch([image for _, image in to_score])
+                scores = [(item.media_item_id, result.score) for (item, _), result in zip(to_score, results)]
+                if store is not None:
+                    store.add([item.media_item_id for item, _ in to_score], np.stack([result.embedding for result in results]))
+            to_tag = [(item, image) for item, image in ok if item.needs_tags]
+            if tagger is not None and to_tag:
+                rows = tagger.positions_from_batch(tagger.probabilities([image for _, image in to_tag]), args.cutoff, args.top_k)
+                for (item, _), predictions in zip(to_tag, rows):
+                    tagged.append(item.media_item_id)
+                    tag_rows.extend((item.media_item_id, tag_ids[position], weight) for position, weight in predictions if position in tag_ids)
+            write_results(conn, scores, tagged, tag_rows)
+
+            checkpoint.last_id = items[-1].media_item_id
+            checkpoint.processed += len(ok)
+            checkpoint.failed += len(items) - len(ok)
+            checkpoint.save(checkpoint_path)
+            done += len(items)
+            elapsed = time.perf_counter() - started
+            LOGGER.info("%d items (%d failed to decode) in %.1fs: %.1f images/s", done, len(items) - len(ok), elapsed, done / elapsed)
+            items, futures = upcoming
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    LOGGER.info(
+        "Finished: %d items in %.1fs (%.1f images/s); %d processed, %d failed in total",
+        done, elapsed, done / elapsed if elapsed else 0.0, checkpoint.processed, checkpoint.failed,
+    )
+
+
+if __name__ == "__main__":
+    main()
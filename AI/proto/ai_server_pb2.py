@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: ai_server.proto
-# Protobuf Python Version: 4.25.1
+# Protobuf Python Version: 4.25.0
 """Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import descriptor_pool as _descriptor_pool
@@ -14,21 +14,42 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0f\x61i_server.proto\x12\x0cimage_scorer\"$\n\x0fImageUrlRequest\x12\x11\n\timage_url\x18\x01 \x01(\t\"\x1c\n\x0bScoreResult\x12\r\n\x05score\x18\x01 \x01(\x02\",\n\tTagResult\x12\x1f\n\x04tags\x18\x01 \x03(\x0b\x32\x11.image_scorer.Tag\"%\n\x03Tag\x12\x0e\n\x06tag_id\x18\x01 \x01(\x05\x12\x0e\n\x06weight\x18\x02 \x01(\x02\x32\x9b\x01\n\x0bImageScorer\x12H\n\nPredictUrl\x12\x1d.image_scorer.ImageUrlRequest\x1a\x19.image_scorer.ScoreResult\"\x00\x12\x42\n\x06TagUrl\x12\x1d.image_scorer.ImageUrlRequest\x1a\x17.image_scorer.TagResult\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0f\x61i_server.proto\x12\x0cimage_scorer\";\n\x0fImageUrlRequest\x12\x11\n\timage_url\x18\x01 \x01(\t\x12\x15\n\rmedia_item_id\x18\x02 \x01(\t\"]\n\x12TagImageUrlRequest\x12\x11\n\timage_url\x18\x01 \x01(\t\x12\x0e\n\x06\x63utoff\x18\x02 \x01(\x02\x12\r\n\x05top_k\x18\x03 \x01(\r\x12\x15\n\rmedia_item_id\x18\x04 \x01(\t\"&\n\x10ImageUrlsRequest\x12\x12\n\nimage_urls\x18\x01 \x03(\t\"H\n\x13TagImageUrlsRequest\x12\x12\n\nimage_urls\x18\x01 \x03(\t\x12\x0e\n\x06\x63utoff\x18\x02 \x01(\x02\x12\r\n\x05top_k\x18\x03 \x01(\r\"J\n\x13SimilarItemsRequest\x12\x15\n\rmedia_item_id\x18\x01 \x01(\t\x12\x11\n\timage_url\x18\x02 \x01(\t\x12\t\n\x01k\x18\x03 \x01(\r\"\x1c\n\x0bScoreResult\x12\r\n\x05score\x18\x01 \x01(\x02\",\n\tTagResult\x12\x1f\n\x04tags\x18\x01 \x03(\x0b\x32\x11.image_scorer.Tag\"?\n\rAnalyzeResult\x12\x1f\n\x04tags\x18\x01 \x03(\x0b\x32\x11.image_scorer.Tag\x12\r\n\x05score\x18\x02 \x01(\x02\"\"\n\x03Tag\x12\x0e\n\x06weight\x18\x01 \x01(\x02\x12\x0b\n\x03tag\x18\x02 \x01(\t\"+\n\nItemStatus\x12\x0c\n\x04\x63ode\x18\x01 \x01(\x05\x12\x0f\n\x07message\x18\x02 \x01(\t\"{\n\x0cTagUrlResult\x12\r\n\x05index\x18\x01 \x01(\r\x12\x11\n\timage_url\x18\x02 \x01(\t\x12(\n\x06status\x18\x03 \x01(\x0b\x32\x18.image_scorer.ItemStatus\x12\x1f\n\x04tags\x18\x04 \x03(\x0b\x32\x11.image_scorer.Tag\"k\n\x0eScoreUrlResult\x12\r\n\x05index\x18\x01 \x01(\r\x12\x11\n\timage_url\x18\x02 \x01(\t\x12(\n\x06status\x18\x03 \x01(\x0b\x32\x18.image_scorer.ItemStatus\x12\r\n\x05score\x18\x04 \x01(\x02\"3\n\x0bSimilarItem\x12\x15\n\rmedia_item_id\x18\x01 \x01(\t\x12\r\n\x05score\x18\x02 \x01(\x02\">\n\x12SimilarItemsResult\x12(\n\x05items\x18\x01 \x03(\x0b\x32\x19.image_scorer.SimilarItem2\xb2\x04\n\x0bImageScorer\x12H\n\nPredictUrl\x12\x1d.image_scorer.ImageUrlRequest\x1a\x19.image_scorer.ScoreResult\"\x00\x12\x45\n\x06TagUrl\x12 .image_scorer.TagImageUrlRequest\x1a\x17.image_scorer.TagResult\"\x00\x12J\n\x07\x41nalyze\x12 .image_scorer.TagImageUrlRequest\x1a\x1b.image_scorer.AnalyzeResult\"\x00\x12L\n\x07TagUrls\x12!.image_scorer.TagImageUrlsRequest\x1a\x1a.image_scorer.TagUrlResult\"\x00\x30\x01\x12M\n\tScoreUrls\x12\x1e.image_scorer.ImageUrlsRequest\x1a\x1c.image_scorer.ScoreUrlResult\"\x00\x30\x01\x12R\n\x0cTagUrlStream\x12 .image_scorer.TagImageUrlRequest\x1a\x1a.image_scorer.TagUrlResult\"\x00(\x01\x30\x01\x12U\n\x0cSimilarItems\x12!.image_scorer.SimilarItemsRequest\x1a .image_scorer.SimilarItemsResult\"\x00\x42\x0cZ\nai_server/b\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'ai_server_pb2', _globals)
 if _descriptor._USE_C_DESCRIPTORS == False:
-  DESCRIPTOR._options = None
+  _globals['DESCRIPTOR']._options = None
+  _globals['DESCRIPTOR']._serialized_options = b'Z\nai_server/'
   _globals['_IMAGEURLREQUEST']._serialized_start=33
-  _globals['_IMAGEURLREQUEST']._serialized_end=69
-  _globals['_SCORERESULT']._serialized_start=71
-  _globals['_SCORERESULT']._serialized_end=99
-  _globals['_TAGRESULT']._serialized_start=101
-  _globals['_TAGRESULT']._serialized_end=145
-  _globals['_TAG']._serialized_start=147
-  _globals['_TAG']._serialized_end=184
-  _globals['_IMAGESCORER']._serialized_start=187
-  _globals['_IMAGESCORER']._serialized_end=342
+  _globals['_IMAGEURLREQUEST']._serialized_end=92
+  _globals['_TAGIMAGEURLREQUEST']._serialized_start=94
+  _globals['_TAGIMAGEURLREQUEST']._serialized_end=187
+  _globals['_IMAGEURLSREQUEST']._serialized_start=189
+  _globals['_IMAGEURLSREQUEST']._serialized_end=227
+  _globals['_TAGIMAGEURLSREQUEST']._serialized_start=229
+  _globals['_TAGIMAGEURLSREQUEST']._serialized_end=301
+  _globals['_SIMILARITEMSREQUEST']._serialized_start=303
+  _globals['_SIMILARITEMSREQUEST']._serialized_end=377
+  _globals['_SCORERESULT']._serialized_start=379
+  _globals['_SCORERESULT']._serialized_end=407
+  _globals['_TAGRESULT']._serialized_start=409
+  _globals['_TAGRESULT']._serialized_end=453
+  _globals['_ANALYZERESULT']._serialized_start=455
+  _globals['_ANALYZERESULT']._serialized_end=518
+  _globals['_TAG']._serialized_start=520
+  _globals['_TAG']._serialized_end=554
+  _globals['_ITEMSTATUS']._serialized_start=556
+  _globals['_ITEMSTATUS']._serialized_end=599
+  _globals['_TAGURLRESULT']._serialized_start=601
+  _globals['_TAGURLRESULT']._serialized_end=724
+  _globals['_SCOREURLRESULT']._serialized_start=726
+  _globals['_SCOREURLRESULT']._serialized_end=833
+  _globals['_SIMILARITEM']._serialized_start=835
+  _globals['_SIMILARITEM']._serialized_end=886
+  _globals['_SIMILARITEMSRESULT']._serialized_start=888
+  _globals['_SIMILARITEMSRESULT']._serialized_end=950
+  _globals['_IMAGESCORER']._serialized_start=953
+  _globals['_IMAGESCORER']._serialized_end=1515
 # @@protoc_insertion_point(module_scope)
@@ -2,7 +2,7 @@
 """Client and server classes corresponding to protobuf-defined services."""
 import grpc
 
-import ai_server_pb2 as ai__server__pb2
+from . import ai_server_pb2 as ai__server__pb2
 
 
 class ImageScorerStub(object):
@@ -21,9 +21,34 @@ class ImageScorerStub(object):
                 )
         self.TagUrl = channel.unary_unary(
                 '/image_scorer.ImageScorer/TagUrl',
-                request_serializer=ai__server__pb2.ImageUrlRequest.SerializeToString,
+                request_serializer=ai__server__pb2.TagImageUrlRequest.SerializeToString,
                 response_deserializer=ai__server__pb2.TagResult.FromString,
                 )
+        self.Analyze = channel.unary_unary(
+                '/image_scorer.ImageScorer/Analyze',
+                request_serializer=ai__server__pb2.TagImageUrlRequest.SerializeToString,
+                response_deserializer=ai__server__pb2.AnalyzeResult.FromString,
+                )
+        self.TagUrls = channel.unary_stream(
+                '/image_scorer.ImageScorer/TagUrls',
+                request_serializer=ai__server__pb2.TagImageUrlsRequest.SerializeToString,
+                response_deserializer=ai__server__pb2.TagUrlResult.FromString,
+                )
+        self.ScoreUrls = channel.unary_stream(
+                '/image_scorer.ImageScorer/ScoreUrls',
+                request_serializer=ai__server__pb2.ImageUrlsRequest.SerializeToString,
+                response_deserializer=ai__server__pb2.ScoreUrlResult.FromString,
+                )
+        self.TagUrlStream = channel.stream_stream(
+                '/image_scorer.ImageScorer/TagUrlStream',
+                request_serializer=ai__server__pb2.TagImageUrlRequest.SerializeToString,
+                response_deserializer=ai__server__pb2.TagUrlResult.FromString,
+                )
+        self.SimilarItems = channel.unary_unary(
+                '/image_scorer.ImageScorer/SimilarItems',
+                request_serializer=ai__server__pb2.SimilarItemsRequest.SerializeToString,
+                response_deserializer=ai__server__pb2.SimilarItemsResult.FromString,
+                )
 
 
 class ImageScorerServicer(object):
@@ -41,6 +66,41 @@ class ImageScorerServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def Analyze(self, request, context):
+        """Tags and scores one image from a single load/decode.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def TagUrls(self, request, context):
+        """Batch variants: results are streamed back as each item completes, in
+        completion order. Use TagUrlResult.index to match results to inputs.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ScoreUrls(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def TagUrlStream(self, request_iterator, context):
+        """Bidirectional variant of TagUrls; index counts requests on the stream from 0.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SimilarItems(self, request, context):
+        """Nearest neighbours by CLIP embedding, from a stored media item or a new image.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ImageScorerServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -51,9 +111,34 @@ def add_ImageScorerServicer_to_server(servicer, server):
             ),
             'TagUrl': grpc.unary_unary_rpc_method_handler(
                     servicer.TagUrl,
-                    request_deserializer=ai__server__pb2.ImageUrlRequest.FromString,
+                    request_deserializer=ai__server__pb2.TagImageUrlRequest.FromString,
                     response_serializer=ai__server__pb2.TagResult.SerializeToString,
             ),
+            'Analyze': grpc.unary_unary_rpc_method_handler(
+                    servicer.Analyze,
+                    request_deserializer=ai__server__pb2.TagImageUrlRequest.FromString,
+                    response_serializer=ai__server__pb2.AnalyzeResult.SerializeToString,
+            ),
+            'TagUrls': grpc.unary_stream_rpc_method_handler(
+                    servicer.TagUrls,
+                    request_deserializer=ai__server__pb2.TagImageUrlsRequest.FromString,
+                    response_serializer=ai__server__pb2.TagUrlResult.SerializeToString,
+            ),
+            'ScoreUrls': grpc.unary_stream_rpc_method_handler(
+                    servicer.ScoreUrls,
+                    request_deserializer=ai__server__pb2.ImageUrlsRequest.FromString,
+                    response_serializer=ai__server__pb2.ScoreUrlResult.SerializeToString,
+            ),
+            'TagUrlStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.TagUrlStream,
+                    request_deserializer=ai__server__pb2.TagImageUrlRequest.FromString,
+                    response_serializer=ai__server__pb2.TagUrlResult.SerializeToString,
+            ),
+            'SimilarItems': grpc.unary_unary_rpc_method_handler(
+                    servicer.SimilarItems,
+                    request_deserializer=ai__server__pb2.SimilarItemsRequest.FromString,
+                    response_serializer=ai__server__pb2.SimilarItemsResult.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'image_scorer.ImageScorer', rpc_method_handlers)
@@ -93,7 +178,92 @@ class ImageScorer(object):
             timeout=None,
             metadata=None):
         return grpc.experimental.unary_unary(request, target, '/image_scorer.ImageScorer/TagUrl',
-            ai__server__pb2.ImageUrlRequest.SerializeToString,
+            ai__server__pb2.TagImageUrlRequest.SerializeToString,
             ai__server__pb2.TagResult.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Analyze(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/image_scorer.ImageScorer/Analyze',
+            ai__server__pb2.TagImageUrlRequest.SerializeToString,
+            ai__server__pb2.AnalyzeResult.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def TagUrls(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/image_scorer.ImageScorer/TagUrls',
+            ai__server__pb2.TagImageUrlsRequest.SerializeToString,
+            ai__server__pb2.TagUrlResult.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ScoreUrls(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/image_scorer.ImageScorer/ScoreUrls',
+            ai__server__pb2.ImageUrlsRequest.SerializeToString,
+            ai__server__pb2.ScoreUrlResult.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def TagUrlStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/image_scorer.ImageScorer/TagUrlStream',
+            ai__server__pb2.TagImageUrlRequest.SerializeToString,
+            ai__server__pb2.TagUrlResult.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def SimilarItems(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/image_scorer.ImageScorer/SimilarItems',
+            ai__server__pb2.SimilarItemsRequest.SerializeToString,
+            ai__server__pb2.SimilarItemsResult.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
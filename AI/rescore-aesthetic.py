@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from app.embeddings import EmbeddingStore
+from app.models.aesthetic import load_mlp, score_embeddings
+from app.settings import Settings
+
+LOGGER = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Re-score every stored CLIP embedding with an aesthetic MLP checkpoint.")
+    parser.add_argument("--store", type=Path, help="Embedding store directory (default: EMBEDDING_STORE_PATH)")
+    parser.add_argument("--checkpoint", type=Path, help="MLP checkpoint (default: the configured AESTHETIC_CHECKPOINT)")
+    parser.add_argument("--database", type=Path, help="Teledeck SQLite database to update aesthetic_score in; omit for a dry run")
+    parser.add_argument("--chunk-size", type=int, default=65536, help="Embeddings scored per forward pass (default: 65536)")
+    parser.add_argument("--log-level", default="INFO", help="Python logging level (default: INFO)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    settings = Settings()
+    store_path = args.store or settings.embedding_store_path
+    if store_path is None:
+        raise SystemExit("No embedding store configured: pass --store or set EMBEDDING_STORE_PATH")
+
+    store = EmbeddingStore(store_path)
+    device = torch.device(settings.device)
+    mlp = load_mlp(args.checkpoint or settings.aesthetic_checkpoint_path(), device)
+
+    started = time.perf_counter()
+    ids, vectors = store.snapshot()
+    scores = np.empty(len(ids), dtype=np.float32)
+    for start in range(0, len(ids), args.chunk_size):
+        chunk = vectors[start : start + args.chunk_size]
+        scores[start : start + len(chunk)] = score_embeddings(mlp, chunk, device)
+    elapsed = time.perf_counter() - started
+    LOGGER.info("Scored %d items in %.2fs", len(ids), elapsed)
+    if len(ids):
+        LOGGER.info("Scores: min %.4f, mean %.4f, max %.4f", scores.min(), scores.mean(), scores.max())
+
+    if args.database is None:
+        LOGGER.info("No --database given; not writing scores")
+        return
+
+    with sqlite3.connect(args.database) as conn:
+        conn.executemany(
+            "INSERT INTO aesthetic_score (media_item_id, score) VALUES (?, ?) "
+            "ON CONFLICT(media_item_id) DO UPDATE SET score = excluded.score",
+            ((media_item_id.decode(), float(score)) for media_item_id, score in zip(ids.tolist(), scores)),
+        )
+    LOGGER.info("Wrote %d scores to %s", len(ids), args.database)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from app.embeddings import ID_DTYPE
+from app.similarity import IVFIndex
+
+LOGGER = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure recall and latency of the IVF similarity index on synthetic embeddings.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000], help="Collection sizes to test")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64], help="nprobe values to sweep")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per configuration (default: 200)")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query (default: 10)")
+    parser.add_argument("--dim", type=int, default=768, help="Embedding dimension (default: 768)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="INFO", help="Python logging level (default: INFO)")
+    return parser.parse_args()
+
+
+def synthetic_embeddings(count: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """Clustered unit vectors, which is closer to real CLIP embeddings than uniform noise."""
+    centers = rng.standard_normal((max(count // 500, 1), dim)).astype(np.float32)
+    vectors = np.empty((count, dim), dtype=np.float16)
+    chunk = 65536
+    for start in range(0, count, chunk):
+        size = min(chunk, count - start)
+        block = centers[rng.integers(0, len(centers), size)] + 0.6 * rng.standard_normal((size, dim)).astype(np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        vectors[start : start + size] = block
+    return vectors
+
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_rows = np.zeros((len(queries), k), dtype=np.int64)
+    chunk = 65536
+    for start in range(0, len(vectors), chunk):
+        scores = queries @ vectors[start : start + chunk].astype(np.float32).T
+        rows = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_rows = np.concatenate([best_rows, rows], axis=1)
+        top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, top, axis=1)
+        best_rows = np.take_along_axis(merged_rows, top, axis=1)
+    return best_rows
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    rng = np.random.default_rng(args.seed)
+
+    for size in args.sizes:
+        vectors = synthetic_embeddings(size, args.dim, rng)
+        ids = np.array([f"{row:032x}" for row in range(size)], dtype=ID_DTYPE)
+        query_rows = rng.choice(size, size=args.queries, replace=False)
+        queries = vectors[query_rows].astype(np.float32)
+        truth = exact_neighbours(vectors, queries, args.k)
+
+        started = time.perf_counter()
+        index = IVFIndex.build(ids, vectors)
+        build_seconds = time.perf_counter() - started
+        LOGGER.info("n=%d: built %d lists in %.1fs", size, index.nlist, build_seconds)
+        index.search(queries[0], args.k, nprobe=index.nlist)  # merge staged lists before timing
+
+        for nprobe in args.nprobe:
+            if nprobe > index.nlist:
+                continue
+            latencies = []
+            hits = 0
+            for query, expected in zip(queries, truth):
+                started = time.perf_counter()
+                found = index.search(query, args.k, nprobe=nprobe)
+                latencies.append(time.perf_counter() - started)
+                hits += len({item.media_item_id for item in found} & {f"{row:032x}" for row in expected.tolist()})
+            latency_ms = np.array(latencies) * 1000
+            LOGGER.info(
+                "n=%d nprobe=%d: recall@%d %.3f, latency p50 %.2fms p95 %.2fms",
+                size,
+                nprobe,
+                args.k,
+                hits / (args.k * len(queries)),
+                np.percentile(latency_ms, 50),
+                np.percentile(latency_ms, 95),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import io
+import sys
+from pathlib import Path
+from typing import Sequence
+
+import pytest
+import torch
+from PIL import Image
+
+AI_ROOT = Path(__file__).resolve().parents[1]
+if str(AI_ROOT) not in sys.path:
+    sys.path.insert(0, str(AI_ROOT))
+
+from app.container import ServiceContainer  # noqa: E402
+from app.decoding import ImageDecoder  # noqa: E402
+from app.executor import InferenceExecutor  # noqa: E402
+from app.fetch import ImageFetcher  # noqa: E402
+from app.inference import InferenceService  # noqa: E402
+from app.models.aesthetic import AestheticScore  # noqa: E402
+from app.models.tagger import TagPrediction  # noqa: E402
+from app.settings import Settings  # noqa: E402
+
+# An image whose top-left pixel is this colour makes the stub models raise.
+POISON = (0, 0, 0)
+
+
+def image_bytes(color: tuple[int, int, int], size: tuple[int, int] = (16, 16), fmt: str = "PNG") -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class StubTagger:
+    """Tags an image with the colour channels of its top-left pixel; records each forward pass."""
+
+    input_size = 8
+    tags = ("red", "green", "blue")
+
+    def __init__(self) -> None:
+        self.batch_sizes: list[int] = []
+
+    def probabilities(self, images: Sequence[Image.Image]) -> torch.Tensor:
+        self.batch_sizes.append(len(images))
+        pixels = [image.getpixel((0, 0)) for image in images]
+        if POISON in pixels:
+            raise ValueError("poisoned image")
+        return torch.tensor(pixels, dtype=torch.float32) / 255
+
+    def tags_from_probabilities(
+        self, probabilities: torch.Tensor, cutoff: float | None = None, top_k: int | None = None
+    ) -> list[TagPrediction]:
+        threshold = 0.5 if cutoff is None else cutoff
+        return [
+            TagPrediction(tag=tag, weight=weight)
+            for tag, weight in zip(self.tags, probabilities.tolist())
+            if weight >= threshold
+        ][:top_k]
+
+
+class StubAesthetic:
+    """Scores an image by the red channel of its top-left pixel; records each forward pass."""
+
+    backend = "mlp"
+    input_size = None
+    supports_embeddings = False
+
+    def __init__(self) -> None:
+        self.batch_sizes: list[int] = []
+
+    def score_batch(self, images: Sequence[Image.Image]) -> list[AestheticScore]:
+        self.batch_sizes.append(len(images))
+        pixels = [image.getpixel((0, 0)) for image in images]
+        if POISON in pixels:
+            raise ValueError("poisoned image")
+        return [AestheticScore(score=red / 255, backend="mlp") for red, _, _ in pixels]
+
+
+@pytest.fixture
+def settings(tmp_path) -> Settings:
+    return Settings(model_root=tmp_path, batch_max_size=16, batch_max_wait_ms=50, max_workers=2, decode_workers=0)
+
+
+@pytest.fixture
+async def inference(settings):
+    service = InferenceService(
+        settings,
+        StubTagger(),
+        StubAesthetic(),
+        decoder=ImageDecoder(workers=0, target_size=None),
+        executor=InferenceExecutor.from_settings(settings),
+    )
+    yield service
+    await service.close()
+
+
+@pytest.fixture
+async def container(settings, inference):
+    fetcher = ImageFetcher.from_settings(settings)
+    yield ServiceContainer(
+        settings=settings,
+        tagger=inference._tagger,
+        aesthetic=inference._aesthetic,
+        inference=inference,
+        fetcher=fetcher,
+        embeddings=None,
+    )
+    await fetcher.aclose()
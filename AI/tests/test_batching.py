@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.batching import MicroBatcher
+
+
+class Recorder:
+    """Doubles its inputs, records every batch and fails any batch containing a negative number."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.batches: list[list[int]] = []
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, items: list[int]) -> list[int]:
+        with self._lock:
+            self.batches.append(list(items))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if any(item < 0 for item in items):
+                raise ValueError("negative input")
+            return [item * 2 for item in items]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+async def test_concurrent_submissions_share_one_call():
+    fn = Recorder()
+    batcher = MicroBatcher(fn, max_batch_size=16, max_wait_ms=50)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+    await batcher.close()
+
+    assert results == [i * 2 for i in range(10)]
+    assert fn.batches == [list(range(10))]
+
+
+async def test_batches_are_capped_at_max_batch_size():
+    fn = Recorder()
+    batcher = MicroBatcher(fn, max_batch_size=4, max_wait_ms=50)
+    await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+    await batcher.close()
+
+    assert [len(batch) for batch in fn.batches] == [4, 4, 2]
+
+
+async def test_failing_item_does_not_fail_its_batch():
+    fn = Recorder()
+    batcher = MicroBatcher(fn, max_batch_size=16, max_wait_ms=50)
+    results = await asyncio.gather(*(batcher.submit(i) for i in (1, -1, 3)), return_exceptions=True)
+    await batcher.close()
+
+    assert results[0] == 2 and results[2] == 6
+    assert isinstance(results[1], ValueError)
+    # One combined call, then each item on its own.
+    assert fn.batches == [[1, -1, 3], [1], [-1], [3]]
+
+
+async def test_cancelled_caller_drops_only_its_own_slot():
+    fn = Recorder()
+    batcher = MicroBatcher(fn, max_batch_size=16, max_wait_ms=50)
+    tasks = [asyncio.create_task(batcher.submit(i)) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks[1].cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    await batcher.close()
+
+    assert results[0] == 0 and results[2] == 4
+    assert isinstance(results[1], asyncio.CancelledError)
+    assert fn.batches == [[0, 2]]
+
+
+async def test_runs_up_to_max_concurrency_batches_at_once():
+    fn = Recorder(delay=0.05)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        batcher = MicroBatcher(fn, max_batch_size=2, max_wait_ms=1, executor=pool, max_concurrency=3)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(12)))
+        await batcher.close()
+
+    assert results == [i * 2 for i in range(12)]
+    assert fn.peak == 3
+
+
+def test_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        MicroBatcher(Recorder(), max_batch_size=0, max_wait_ms=1)
+    with pytest.raises(ValueError):
+        MicroBatcher(Recorder(), max_batch_size=1, max_wait_ms=1, max_concurrency=0)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from app.cache import InferenceCache, model_identity
+
+
+def test_entries_are_keyed_by_digest_and_model(tmp_path):
+    cache = InferenceCache(tmp_path / "cache.sqlite3", max_bytes=1 << 20)
+    cache.put("d1", "tagger:a", b"tags-a")
+    cache.put("d1", "aesthetic:a", b"score")
+    cache.put("d1", "tagger:a", b"tags-a2")
+
+    assert cache.get("d1", "tagger:a") == b"tags-a2"
+    assert cache.get("d1", "aesthetic:a") == b"score"
+    assert cache.get("d1", "tagger:b") is None
+    assert cache.get("d2", "tagger:a") is None
+    cache.close()
+
+
+def test_evicts_least_recently_used_first(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = InferenceCache(path, max_bytes=1000)
+    cache.put("a", "m", b"x" * 400)
+    cache.put("b", "m", b"x" * 400)
+    assert cache.get("a", "m") is not None
+
+    cache.put("c", "m", b"x" * 400)
+    assert cache.get("b", "m") is None
+    assert cache.get("a", "m") is not None and cache.get("c", "m") is not None
+    cache.close()
+
+    # The byte total is rebuilt from disk, so the budget still holds after a restart.
+    reopened = InferenceCache(path, max_bytes=1000)
+    reopened.put("d", "m", b"x" * 400)
+    assert sum(reopened.get(key, "m") is not None for key in "acd") == 2
+    reopened.close()
+
+
+def test_model_identity_changes_with_the_model_file(tmp_path):
+    weights = tmp_path / "model.pth"
+    weights.write_bytes(b"v1")
+    first = model_identity("tagger", weights, tmp_path / "missing.json")
+    assert first == model_identity("tagger", weights, tmp_path / "missing.json")
+    assert first.startswith("tagger:")
+
+    weights.write_bytes(b"version 2")
+    assert model_identity("tagger", weights, tmp_path / "missing.json") != first
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+from PIL import Image
+
+from app.decoding import ImageDecoder
+from app.utils import ImageSource, ImageSourceError, decode_image
+
+from .conftest import image_bytes
+
+
+@pytest.mark.parametrize("fmt", ["JPEG", "PNG"])
+def test_decodes_at_or_above_target_size(fmt):
+    data = image_bytes((200, 100, 50), size=(2000, 1200), fmt=fmt)
+
+    # JPEG draft mode and integer reduction both halve here: a quarter would drop below 448.
+    assert decode_image(data, target_size=448).size == (1000, 600)
+    assert decode_image(data, target_size=600).size == (1000, 600)
+    assert decode_image(data, target_size=601).size == (2000, 1200)
+    assert decode_image(data).size == (2000, 1200)
+    assert decode_image(data, target_size=448).mode == "RGB"
+
+
+def test_small_images_are_not_reduced():
+    assert decode_image(image_bytes((1, 2, 3), size=(300, 200)), target_size=448).size == (300, 200)
+
+
+def test_animated_images_use_their_middle_frame():
+    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255)]
+    frames = [Image.new("RGB", (8, 8), color) for color in colors]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:], duration=100)
+
+    assert decode_image(buffer.getvalue()).getpixel((0, 0)) == colors[2]
+
+
+def test_undecodable_bytes_raise_image_source_error():
+    with pytest.raises(ImageSourceError):
+        decode_image(b"not an image")
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+async def test_decoder_caches_the_decoded_image_on_the_source(workers):
+    decoder = ImageDecoder(workers=workers, target_size=448)
+    source = ImageSource(image_bytes((9, 9, 9), size=(1000, 1000)))
+    try:
+        image = await decoder.decode(source)
+        assert image.size == (500, 500)
+        assert await decoder.decode(source) is image
+    finally:
+        decoder.close()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.embeddings import EmbeddingStore
+
+
+def _vectors(*rows: list[float]) -> np.ndarray:
+    return np.asarray(rows, dtype=np.float32)
+
+
+def test_round_trip_survives_reopen(tmp_path):
+    store = EmbeddingStore(tmp_path, dim=4)
+    store.add(["a", "b"], _vectors([1, 0, 0, 0], [0, 0.5, 0.25, 0]))
+
+    reopened = EmbeddingStore(tmp_path, dim=4)
+    assert len(reopened) == 2 and "a" in reopened and "c" not in reopened
+    np.testing.assert_array_equal(reopened.get("b"), [0, 0.5, 0.25, 0])
+    assert reopened.get("c") is None
+    ids, vectors = reopened.snapshot()
+    assert ids.tolist() == [b"a", b"b"] and vectors.shape == (2, 4)
+
+
+def test_duplicate_ids_shadow_earlier_rows(tmp_path):
+    store = EmbeddingStore(tmp_path, dim=4)
+    store.add(["a", "b"], _vectors([1, 0, 0, 0], [0, 1, 0, 0]))
+    store.add(["a"], _vectors([0, 0, 1, 0]))
+
+    assert len(store) == 2 and store.row_count == 3
+    np.testing.assert_array_equal(store.get("a"), [0, 0, 1, 0])
+    ids, vectors = store.snapshot()
+    assert dict(zip(ids.tolist(), vectors.tolist())) == {b"b": [0, 1, 0, 0], b"a": [0, 0, 1, 0]}
+    rows_ids, _ = store.rows_since(2)
+    assert rows_ids.tolist() == [b"a"]
+
+    store.compact()
+    assert store.row_count == 2
+    reopened = EmbeddingStore(tmp_path, dim=4)
+    assert reopened.row_count == 2
+    np.testing.assert_array_equal(reopened.get("a"), [0, 0, 1, 0])
+
+
+def test_truncates_a_vector_written_without_its_id(tmp_path):
+    store = EmbeddingStore(tmp_path, dim=4)
+    store.add(["a"], _vectors([1, 0, 0, 0]))
+    with (tmp_path / "vectors.f16").open("ab") as handle:
+        handle.write(np.zeros(4, dtype="<f2").tobytes())
+
+    reopened = EmbeddingStore(tmp_path, dim=4)
+    assert reopened.row_count == 1
+    assert (tmp_path / "vectors.f16").stat().st_size == 4 * 2
+
+
+def test_rejects_mismatched_lengths(tmp_path):
+    with pytest.raises(ValueError):
+        EmbeddingStore(tmp_path, dim=4).add(["a", "b"], _vectors([1, 0, 0, 0]))
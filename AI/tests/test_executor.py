@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from app.executor import InferenceExecutor, InferenceOverloadedError
+from app.http_api import create_http_app
+
+from .conftest import image_bytes
+
+
+def test_admit_fails_fast_once_max_pending_is_reached():
+    executor = InferenceExecutor(workers=1, max_pending=2)
+    with executor.admit(), executor.admit():
+        assert executor.pending == 2
+        with pytest.raises(InferenceOverloadedError):
+            with executor.admit():
+                pass
+    assert executor.pending == 0
+    with executor.admit():
+        assert executor.pending == 1
+    executor.shutdown()
+
+
+async def test_http_api_answers_503_when_overloaded(container, tmp_path):
+    image = tmp_path / "red.png"
+    image.write_bytes(image_bytes((255, 0, 0)))
+    app = create_http_app(container)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/v1/tags", json={"image_url": str(image)})
+        assert response.status_code == 200
+        assert [tag["tag"] for tag in response.json()["tags"]] == ["red"]
+
+        container.inference._executor._max_pending = 0
+        response = await client.post("/v1/tags", json={"image_url": str(image)})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
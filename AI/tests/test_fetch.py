@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+
+from app.fetch import ImageFetcher
+from app.utils import ImageSourceError
+
+
+def _fetcher(handler, *, max_per_host: int = 8, max_bytes: int = 1024) -> ImageFetcher:
+    fetcher = ImageFetcher(timeout=5, max_connections=16, max_per_host=max_per_host, max_bytes=max_bytes)
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return fetcher
+
+
+async def test_limits_concurrent_downloads_per_host():
+    active: Counter[str] = Counter()
+    peak: Counter[str] = Counter()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.02)
+        active[host] -= 1
+        return httpx.Response(200, content=b"image")
+
+    fetcher = _fetcher(handler, max_per_host=2)
+    urls = [f"https://{host}/{n}.jpg" for host in ("a.example", "b.example") for n in range(6)]
+    sources = await asyncio.gather(*(fetcher.fetch(url) for url in urls))
+    await fetcher.aclose()
+
+    assert all(source.data == b"image" for source in sources)
+    assert peak == {"a.example": 2, "b.example": 2}
+
+
+async def test_rejects_declared_oversized_bodies():
+    fetcher = _fetcher(lambda request: httpx.Response(200, content=b"x" * 2048), max_bytes=1024)
+    with pytest.raises(ImageSourceError, match="exceeds 1024 bytes: 2048"):
+        await fetcher.fetch("https://a.example/big.jpg")
+    await fetcher.aclose()
+
+
+async def test_stops_reading_undeclared_bodies_past_the_cap():
+    sent: list[int] = []
+
+    async def chunks():
+        for n in range(100):
+            sent.append(n)
+            yield b"x" * 512
+
+    fetcher = _fetcher(lambda request: httpx.Response(200, content=chunks()), max_bytes=1024)
+    with pytest.raises(ImageSourceError, match="exceeds 1024 bytes"):
+        await fetcher.fetch("https://a.example/stream.jpg")
+    await fetcher.aclose()
+    assert len(sent) < 100
+
+    fetcher = _fetcher(lambda request: httpx.Response(200, content=b"x" * 1024), max_bytes=1024)
+    assert len((await fetcher.fetch("https://a.example/exact.jpg")).data) == 1024
+    await fetcher.aclose()
+
+
+async def test_http_errors_become_image_source_errors(tmp_path):
+    fetcher = _fetcher(lambda request: httpx.Response(404))
+    with pytest.raises(ImageSourceError, match="HTTP 404"):
+        await fetcher.fetch("https://a.example/missing.jpg")
+    with pytest.raises(ImageSourceError, match="does not exist"):
+        await fetcher.fetch(str(tmp_path / "missing.jpg"))
+    await fetcher.aclose()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import grpc
+import pytest
+
+from app.grpc_server import ImageScorerService
+from app.similarity import MAX_SIMILAR_K
+from proto import ai_server_pb2
+
+from .conftest import image_bytes
+
+
+class FakeContext:
+    def __init__(self) -> None:
+        self.code: grpc.StatusCode | None = None
+        self.details: str | None = None
+
+    def set_code(self, code: grpc.StatusCode) -> None:
+        self.code = code
+
+    def set_details(self, details: str) -> None:
+        self.details = details
+
+    async def abort(self, code: grpc.StatusCode, details: str) -> None:
+        self.code, self.details = code, details
+        raise grpc.RpcError(details)
+
+
+def _inputs(tmp_path) -> list[str]:
+    red = tmp_path / "red.png"
+    red.write_bytes(image_bytes((255, 0, 0)))
+    garbage = tmp_path / "garbage.png"
+    garbage.write_bytes(b"not an image")
+    return [str(red), str(tmp_path / "missing.png"), str(garbage)]
+
+
+async def test_tag_urls_reports_status_per_item(container, tmp_path):
+    service = ImageScorerService(container)
+    request = ai_server_pb2.TagImageUrlsRequest(image_urls=_inputs(tmp_path))
+    results = sorted([result async for result in service.TagUrls(request, FakeContext())], key=lambda r: r.index)
+
+    assert [result.image_url for result in results] == list(request.image_urls)
+    assert [result.status.code for result in results] == [
+        grpc.StatusCode.OK.value[0],
+        grpc.StatusCode.INVALID_ARGUMENT.value[0],
+        grpc.StatusCode.INVALID_ARGUMENT.value[0],
+    ]
+    assert [tag.tag for tag in results[0].tags] == ["red"]
+    assert "does not exist" in results[1].status.message
+    assert "decode" in results[2].status.message
+    assert not results[1].tags and not results[2].tags
+
+
+async def test_score_urls_reports_status_per_item(container, tmp_path):
+    service = ImageScorerService(container)
+    request = ai_server_pb2.ImageUrlsRequest(image_urls=_inputs(tmp_path))
+    results = sorted([result async for result in service.ScoreUrls(request, FakeContext())], key=lambda r: r.index)
+
+    assert [result.status.code for result in results] == [
+        grpc.StatusCode.OK.value[0],
+        grpc.StatusCode.INVALID_ARGUMENT.value[0],
+        grpc.StatusCode.INVALID_ARGUMENT.value[0],
+    ]
+    assert results[0].score == 1.0
+
+
+async def test_overloaded_inference_returns_resource_exhausted(container, tmp_path):
+    image = tmp_path / "red.png"
+    image.write_bytes(image_bytes((255, 0, 0)))
+    service = ImageScorerService(container)
+    container.inference._executor._max_pending = 0
+
+    context = FakeContext()
+    result = await service.TagUrl(ai_server_pb2.TagImageUrlRequest(image_url=str(image)), context)
+    assert context.code == grpc.StatusCode.RESOURCE_EXHAUSTED
+    assert not result.tags
+
+    # In a batch call each rejected item carries the status instead of failing the stream.
+    request = ai_server_pb2.ImageUrlsRequest(image_urls=[str(image)])
+    results = [result async for result in service.ScoreUrls(request, FakeContext())]
+    assert [result.status.code for result in results] == [grpc.StatusCode.RESOURCE_EXHAUSTED.value[0]]
+
+
+async def test_saturated_method_aborts_with_resource_exhausted(container, tmp_path):
+    container.settings.grpc_method_max_pending = 0
+    service = ImageScorerService(container)
+
+    context = FakeContext()
+    with pytest.raises(grpc.RpcError):
+        [result async for result in service.TagUrls(ai_server_pb2.TagImageUrlsRequest(image_urls=["x"]), context)]
+    assert context.code == grpc.StatusCode.RESOURCE_EXHAUSTED
+
+
+async def test_similar_items_rejects_oversized_k(container):
+    service = ImageScorerService(container)
+    context = FakeContext()
+    request = ai_server_pb2.SimilarItemsRequest(media_item_id="a", k=MAX_SIMILAR_K + 1)
+    result = await service.SimilarItems(request, context)
+
+    assert context.code == grpc.StatusCode.INVALID_ARGUMENT
+    assert not result.items
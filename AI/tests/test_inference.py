@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.utils import ImageSource
+
+from .conftest import POISON, image_bytes
+
+COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (0, 255, 255)]
+
+
+async def test_concurrent_tag_requests_share_one_forward_pass(inference):
+    results = await asyncio.gather(*(inference.tag(ImageSource(image_bytes(color))) for color in COLORS))
+
+    assert inference._tagger.batch_sizes == [len(COLORS)]
+    assert [[tag.tag for tag in tags] for tags in results] == [
+        ["red"], ["green"], ["blue"], ["red", "green"], ["green", "blue"]
+    ]
+
+
+async def test_analyze_runs_each_model_once_per_batch(inference):
+    results = await asyncio.gather(*(inference.analyze(ImageSource(image_bytes(color))) for color in COLORS))
+
+    assert inference._tagger.batch_sizes == [len(COLORS)]
+    assert inference._aesthetic.batch_sizes == [len(COLORS)]
+    assert [result.aesthetic.score for result in results] == [1.0, 0.0, 0.0, 1.0, 0.0]
+
+
+async def test_failing_request_leaves_the_rest_of_its_batch(inference):
+    colors = [COLORS[0], POISON, COLORS[1]]
+    results = await asyncio.gather(
+        *(inference.tag(ImageSource(image_bytes(color))) for color in colors), return_exceptions=True
+    )
+
+    assert [tag.tag for tag in results[0]] == ["red"]
+    assert isinstance(results[1], ValueError)
+    assert [tag.tag for tag in results[2]] == ["green"]
+
+
+async def test_cancelled_request_drops_only_its_own_slot(inference):
+    tasks = [asyncio.create_task(inference.tag(ImageSource(image_bytes(color)))) for color in COLORS[:3]]
+    # Let every request decode and queue before the first one gives up.
+    await asyncio.sleep(0.01)
+    tasks[0].cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert [[tag.tag for tag in tags] for tags in results[1:]] == [["green"], ["blue"]]
+    assert inference._tagger.batch_sizes == [2]
+    assert inference._executor.pending == 0
+
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import pytest
+import torch
+
+from app.models.tagger import TaggerModel
+
+PROBABILITIES = torch.tensor([[0.9, 0.2, 0.6, 0.4], [0.1, 0.3, 0.2, 0.0], [0.5, 0.8, 0.7, 0.95]])
+
+
+@pytest.fixture
+def tagger() -> TaggerModel:
+    return TaggerModel(torch.nn.Identity(), ["a", "b", "c", "d"], torch.device("cpu"), cutoff=0.5)
+
+
+def test_rows_are_sorted_and_cut_off(tagger):
+    rows = tagger.tags_from_batch(PROBABILITIES)
+    assert [[(tag.tag, round(tag.weight, 2)) for tag in row] for row in rows] == [
+        [("a", 0.9), ("c", 0.6)],
+        [],
+        [("d", 0.95), ("b", 0.8), ("c", 0.7), ("a", 0.5)],
+    ]
+    assert [tag.tag for tag in tagger.tags_from_probabilities(PROBABILITIES[0], cutoff=0.1)] == ["a", "c", "d", "b"]
+
+
+def test_top_k_caps_each_row(tagger):
+    assert tagger.positions_from_batch(PROBABILITIES, top_k=1) == [[(0, pytest.approx(0.9))], [], [(3, pytest.approx(0.95))]]
+
+
+@pytest.mark.parametrize("top_k", [0, -3])
+def test_non_positive_top_k_selects_nothing(tagger, top_k):
+    assert tagger.positions_from_batch(PROBABILITIES, top_k=top_k) == [[], [], []]
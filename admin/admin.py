@@ -1,75 +1,79 @@
-import json
+import time
 import asyncio
+from datetime import datetime
 from functools import partial
 from pathlib import Path
 import argparse
-from tqdm import tqdm
 from dotenv import load_dotenv
-from sqlmodel import create_engine, Session, select
 from sqlalchemy import Engine
-from models.telegram import Tag, MediaItem, Thumbnail
 from lib.TLContext import with_context, ServiceRoutine
+from lib.NearDuplicateScanner import NearDuplicateScanner
+from lib.reconcile import reconcile_media
+from lib import thumbnails
+from lib.thumbnails import ThumbnailFilter
 from lib.commands import save_forwards, channel_list_sync, run_update, run_export, login
-from lib.config import Settings, create_export_location
+from lib.config import Settings, DatabaseConfig, create_export_location
+from lib.DatabaseService import DatabaseService
+from lib.engine import create_sqlite_engine
+from lib.tags import load_tag_vocabulary
 
 
 load_dotenv()
 
 
-# TODO: Move to DatabaseService
-def add_tags_to_database(engine: Engine):
-    with open('tagger/model/tags_8041.json') as tagfile:
-        tags = json.load(tagfile)
-        with Session(engine) as session:
-            for tag in tags:
-                session.add(Tag(name=tag))
-            session.commit()
-    with open('tagger/model/tags_extra.json') as tagfile:
-        tags = json.load(tagfile)
-        with Session(engine) as session:
-            for (_, tag) in tags:
-                session.add(Tag(name=tag))
-            session.commit()
-
-def find_orphans(engine: Engine, media_path: Path, orphan_path: Path):
-    """Find and print orphans in the specified directory."""
-    # files_by_size: Dict[int, List[DirEntry[str]]] = {}
-    # duplicates: List[str] = []
-    # n = 0
-
-    for item in tqdm(media_path.glob('*')):
-        if not item.is_file():
-            continue
-        name = item.parts[-1]
-        with Session(engine) as session:
-            result = session.exec(select(MediaItem).where(MediaItem.file_name == name)).first()
-            if not result:
-                print("Would like to move to: " + str(orphan_path.joinpath(name)))
-                item.rename(orphan_path.joinpath(name))
-                print(f"No file found: {name}")
-
-def find_failed_deletes(engine: Engine, media_path: Path, orphan_path: Path):
-    """Find files in folder which should have been deleted."""
-    bad = 0
-    for item in tqdm(media_path.glob('*')):
-        if not item.is_file():
-            continue
-        name = item.parts[-1]
-        with Session(engine) as session:
-            result = session.exec(select(MediaItem).where(MediaItem.file_name == name)).first()
-            if result and result.user_deleted:
-                bad += 1
-                print(f"({bad}) Recycling: {name}")
-                item.rename(orphan_path.joinpath(name))
-
-def wipe_thumbnails(engine: Engine):
-    """Wipe thumbnails from database. TODO: from disk too"""
-    with Session(engine) as session:
-        tns = session.exec(select(Thumbnail)).all()
-        for tn in tns:
-            print(tn)
-            session.delete(tn)
-        session.commit()
+def add_tags_to_database(cfg: Settings):
+    """Load the tagger vocabulary into tags and record each tag's output position."""
+    tags = load_tag_vocabulary(cfg.tagging.tags_path, cfg.tagging.extra_tags_path)
+    db = DatabaseService(DatabaseConfig.from_config(cfg))
+    inserted = db.sync_tag_vocabulary(tags)
+    print(f"Synced {len(tags)} tag positions ({inserted} new tags).")
+
+def reconcile_media_directory(cfg: Settings, orphans: bool, failed_deletes: bool, dry_run: bool):
+    """Move files with no media item to the orphan folder, and files of deleted items to the recycle bin."""
+    engine = create_sqlite_engine(cfg.DB_PATH, cfg.database)
+    started = time.perf_counter()
+    report = reconcile_media(
+        engine,
+        cfg.MEDIA_PATH,
+        cfg.ORPHAN_PATH,
+        cfg.paths.recycle_root / "media",  # same layout the server uses when recycling
+        orphans=orphans,
+        failed_deletes=failed_deletes,
+        dry_run=dry_run,
+    )
+
+    action = "Would move" if dry_run else "Moving"
+    for name in report.orphans:
+        print(f"{action} orphan: {name}")
+    for name in report.failed_deletes:
+        print(f"{action} failed delete: {name}")
+    for name, error in report.errors:
+        print(f"Failed to move {name}: {error}")
+    print(f"Scanned {report.scanned} files in {time.perf_counter() - started:.1f}s: "
+          f"{len(report.orphans)} orphans, {len(report.failed_deletes)} failed deletes, {report.moved} moved.")
+
+def thumbnail_filter(args: argparse.Namespace) -> ThumbnailFilter:
+    before = datetime.fromisoformat(args.before) if args.before else None
+    return ThumbnailFilter(channel_id=args.channel_id, before=before, media_item_ids=args.media_item_ids)
+
+
+def wipe_thumbnails(engine: Engine, thumbnail_path: Path, selection: ThumbnailFilter):
+    """Wipe thumbnails from database and disk."""
+    report = thumbnails.wipe_thumbnails(engine, thumbnail_path, selection)
+    print(f"Deleted {report.rows} thumbnail rows and {report.files_removed} files.")
+
+
+def regenerate_thumbnails(engine: Engine, media_path: Path, thumbnail_path: Path, selection: ThumbnailFilter):
+    """Rebuild thumbnails whose source changed or which are missing."""
+    report = thumbnails.regenerate_thumbnails(engine, media_path, thumbnail_path, selection)
+    print(f"Generated {report.generated} thumbnails, {report.skipped} up to date, {report.failed} failed.")
+
+
+def find_near_duplicates(engine: Engine, media_path: Path, max_distance: int):
+    """Hash media added since the last run and link near-duplicates."""
+    result = NearDuplicateScanner(engine, media_path, max_distance=max_distance).run()
+    print(f"Hashed {result.hashed} files ({result.failed} undecodable), matched {result.matched} items, "
+          f"linked {result.pairs} new duplicate pairs.")
 
 
 def run_with_context(cfg: Settings, func: ServiceRoutine):
@@ -84,8 +88,15 @@ def setup_argparse():
     parser.add_argument('--add-tags', action='store_true', help='Add tags to the database')
     parser.add_argument('--find-orphans', action='store_true', help='Find files not associated with an entry.')
     parser.add_argument('--find-failed-deletes', action='store_true', help='Find files in folder which should have been deleted')
+    parser.add_argument('--dry-run', action='store_true', help='Report what --find-orphans/--find-failed-deletes would move')
     parser.add_argument('--save-forwards', help='Find files not associated with an entry.')
+    parser.add_argument('--find-near-duplicates', action='store_true', help='Link visually similar media items in media_item_duplicates')
+    parser.add_argument('--max-distance', type=int, default=8, help='Perceptual hash distance (bits) for --find-near-duplicates')
     parser.add_argument('--wipe-thumbnails',action='store_true', help='Wipe thumbnails from database and disk')
+    parser.add_argument('--regenerate-thumbnails', action='store_true', help='Regenerate missing or outdated thumbnails')
+    parser.add_argument('--channel-id', type=int, help='Limit thumbnail commands to one channel')
+    parser.add_argument('--before', type=str, help='Limit thumbnail commands to items created before this ISO date')
+    parser.add_argument('--media-item-ids', nargs='+', help='Limit thumbnail commands to these media items')
     parser.add_argument('--update-channels-from', type=str, help='Update list of channels to check from folder name')
     parser.add_argument('--client-update', action='store_true', help='Pull updates from selected channels')
     parser.add_argument('--channel-pattern', type=str, help='Regex/partial channel title match for --client-update')
@@ -104,25 +115,22 @@ if __name__ == '__main__':
         run_with_context(cfg, login)
 
     if args.add_tags:
-        engine = create_engine(f"sqlite:///{cfg.DB_PATH}")
-        add_tags_to_database(engine)
-
-    elif args.find_orphans:
-        directory_path = Path('static/media')
-        orphan_path = Path('recyclebin/orphan')
-        engine = create_engine(f"sqlite:///{cfg.DB_PATH}")
-        raise NotImplementedError("Needs config!!")
-        find_orphans(engine, directory_path, orphan_path)
-
-    if args.find_failed_deletes:
-        directory_path = Path('static/media')
-        # orphan_path = Path('recyclebin/orphan')
-        raise NotImplementedError("Needs config!!")
-        find_failed_deletes(engine, directory_path, orphan_path)
+        add_tags_to_database(cfg)
+
+    elif args.find_orphans or args.find_failed_deletes:
+        reconcile_media_directory(cfg, args.find_orphans, args.find_failed_deletes, args.dry_run)
+
+    elif args.find_near_duplicates:
+        engine = create_sqlite_engine(cfg.DB_PATH, cfg.database)
+        find_near_duplicates(engine, cfg.MEDIA_PATH, args.max_distance)
 
     elif args.wipe_thumbnails:
-        engine = create_engine(f"sqlite:///{cfg.DB_PATH}")
-        wipe_thumbnails(engine)
+        engine = create_sqlite_engine(cfg.DB_PATH, cfg.database)
+        wipe_thumbnails(engine, cfg.THUMBNAIL_PATH, thumbnail_filter(args))
+
+    elif args.regenerate_thumbnails:
+        engine = create_sqlite_engine(cfg.DB_PATH, cfg.database)
+        regenerate_thumbnails(engine, cfg.MEDIA_PATH, cfg.THUMBNAIL_PATH, thumbnail_filter(args))
 
     elif args.save_forwards:
         run_with_context(cfg, partial(save_forwards, args.save_forwards))
@@ -0,0 +1,95 @@
+import argparse
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+
+from lib.DatabaseService import DatabaseService
+from lib.config import DatabaseConfig, DatabaseSettings
+
+# What create_engine gave us before: rollback journal, fsync per commit, no lock wait.
+SQLITE_DEFAULTS = DatabaseSettings(
+    journal_mode="delete",
+    synchronous="full",
+    busy_timeout_ms=0,
+    cache_size=-2000,
+    mmap_size_bytes=0,
+    temp_store="default",
+)
+
+# Roughly the server's library page query.
+READ_QUERY = "SELECT id, file_name FROM media_items WHERE user_deleted = 0 ORDER BY created_at DESC LIMIT 50"
+WRITE_QUERY = (
+    "INSERT INTO media_items (id, source_id, media_type_id, file_name, file_size, created_at, updated_at, "
+    "seen, favorite, user_deleted, content_hash) VALUES (?, 1, 1, ?, 1024, ?, ?, 0, 0, 0, NULL)"
+)
+
+
+def setup_argparse():
+    parser = argparse.ArgumentParser(description='Measure concurrent SQLite read/write throughput with and without connection tuning.')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run')
+    parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads')
+    parser.add_argument('--rows', type=int, default=20_000, help='media_items rows loaded before measuring')
+    return parser
+
+
+def run(settings: DatabaseSettings, seconds: float, readers: int, rows: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseService(DatabaseConfig(db_path=Path(tmp) / "bench.db", settings=settings))
+        now = datetime.now()
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(WRITE_QUERY, [(uuid.uuid4().hex, f"seed{i}.jpg", now, now) for i in range(rows)])
+
+        counts = {"writes": 0, "reads": 0, "locked": 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def count(key: str) -> None:
+            with lock:
+                counts[key] += 1
+
+        def writer() -> None:
+            # One transaction per item, as the updater commits each download.
+            while not stop.is_set():
+                try:
+                    with db.engine.begin() as conn:
+                        conn.exec_driver_sql(WRITE_QUERY, (uuid.uuid4().hex, "new.jpg", datetime.now(), datetime.now()))
+                    count("writes")
+                except OperationalError:
+                    count("locked")
+
+        def reader() -> None:
+            while not stop.is_set():
+                try:
+                    with db.engine.connect() as conn:
+                        conn.exec_driver_sql(READ_QUERY).all()
+                    count("reads")
+                except OperationalError:
+                    count("locked")
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        db.engine.dispose()
+        return counts
+
+
+def main():
+    args = setup_argparse().parse_args()
+    for label, settings in [("sqlite defaults", SQLITE_DEFAULTS), ("configured", DatabaseSettings())]:
+        counts = run(settings, args.seconds, args.readers, args.rows)
+        print(f"{label:16} writes {counts['writes'] / args.seconds:8,.0f}/s  "
+              f"reads {counts['reads'] / args.seconds:8,.0f}/s  "
+              f"locked errors {counts['locked']}")
+
+
+if __name__ == '__main__':
+    main()
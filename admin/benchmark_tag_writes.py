@@ -0,0 +1,63 @@
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlmodel import Session
+
+from lib.DatabaseService import DatabaseService
+from lib.config import DatabaseConfig
+from models.telegram import MediaItemTag
+
+
+def setup_argparse():
+    parser = argparse.ArgumentParser(description='Measure bulk media_item_tags write throughput on a synthetic load.')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Tag rows to write')
+    parser.add_argument('--tags-per-item', type=int, default=25, help='Tags per media item')
+    parser.add_argument('--vocabulary', type=int, default=9000, help='Synthetic tagger vocabulary size')
+    parser.add_argument('--batch-rows', type=int, default=100_000, help='Rows per transaction')
+    parser.add_argument('--orm-rows', type=int, default=20_000, help='Rows written through the ORM for comparison (0 to skip)')
+    return parser
+
+
+def synthetic_rows(rows: int, tags_per_item: int, vocabulary: int, seed: int = 0):
+    rng = random.Random(seed)
+    for item in range(rows // tags_per_item):
+        media_item_id = f"{item:032x}"
+        for position in rng.sample(range(vocabulary), tags_per_item):
+            yield media_item_id, position, rng.random()
+
+
+def main():
+    args = setup_argparse().parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseService(DatabaseConfig(db_path=Path(tmp) / "bench.db"))
+        db.sync_tag_vocabulary([f"tag_{i}" for i in range(args.vocabulary)])
+        rows = list(synthetic_rows(args.rows, args.tags_per_item, args.vocabulary))
+
+        started = time.perf_counter()
+        written = db.write_tag_results(rows, batch_rows=args.batch_rows)
+        elapsed = time.perf_counter() - started
+        print(f"bulk insert:  {written} rows in {elapsed:.2f}s ({written / elapsed:,.0f} rows/s)")
+
+        # Second pass replaces every item's tags: delete + insert per item.
+        started = time.perf_counter()
+        written = db.write_tag_results(rows, batch_rows=args.batch_rows)
+        elapsed = time.perf_counter() - started
+        print(f"bulk replace: {written} rows in {elapsed:.2f}s ({written / elapsed:,.0f} rows/s)")
+
+        if args.orm_rows:
+            index_map = db.get_tag_index_map()
+            sample = list(synthetic_rows(args.orm_rows, args.tags_per_item, args.vocabulary, seed=1))
+            started = time.perf_counter()
+            with Session(db.engine) as session:
+                for media_item_id, position, weight in sample:
+                    session.add(MediaItemTag(media_item_id=f"orm{media_item_id}", tag_id=index_map[position], weight=weight))
+                session.commit()
+            elapsed = time.perf_counter() - started
+            print(f"ORM insert:   {len(sample)} rows in {elapsed:.2f}s ({len(sample) / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,37 @@
 # db_manager.py
 from datetime import datetime
 import uuid
-from sqlmodel import Session, select, Column, Integer, SQLModel
-from typing import Optional, Tuple, List, Any
-from telethon.types import (
-    Channel,
-    Document
-)
+from sqlmodel import Session, select, Column, Integer, SQLModel, col, func
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert
+from typing import Optional, Tuple, List, Any, Dict, Iterable
+from telethon.types import Channel
 from telethon.tl.custom.message import Message
 from .config import DatabaseConfig
 
 from .Logger import RichLogger
 from models.telegram import (
     MediaItem, TelegramMetadata, MediaType,
-    ChannelModel, Source
+    ChannelModel, Source, MediaItemHash,
+    Tag, TagIndex
 )
-from .types import DownloadItem
-from sqlmodel import create_engine
+from .types import DownloadItem, MediaRecord, SaveOutcome
+from .perceptual import to_signed
+from .engine import create_sqlite_engine
+from .DimensionCache import DimensionCache
+
+# (media_item_id, tagger output position, weight)
+TagResult = Tuple[str, int, float]
+# (earliest, latest) message_id saved from a channel
+ChannelCursor = Tuple[int, int]
+
 
 class DatabaseService:
     def __init__(self, config: DatabaseConfig):
         needs_init = not config.db_path.exists()
-        self.engine = create_engine(f"sqlite:///{config.db_path}")
+        self.engine = create_sqlite_engine(config.db_path, config.settings)
+        self._tag_index_map: Optional[Dict[int, int]] = None
+        self.dimensions = DimensionCache(self.engine)
         if needs_init:
             self._init_db()
 
@@ -51,108 +61,151 @@ class DatabaseService:
             )
             return session.exec(query).first()
 
+    def get_channel_cursors(self) -> Dict[int, ChannelCursor]:
+        """``(earliest, latest)`` saved message id for every channel, in one query."""
+        with Session(self.engine) as session:
+            query = (
+                select(
+                    TelegramMetadata.channel_id,
+                    func.min(TelegramMetadata.message_id),
+                    func.max(TelegramMetadata.message_id),
+                )
+                .group_by(col(TelegramMetadata.channel_id))
+            )
+            return {channel_id: (earliest, latest) for channel_id, earliest, latest in session.exec(query)}
+
     def save_media_item(self,
                        logger: RichLogger,
                        item: DownloadItem,
                        channel_id: int,
-                       message: Message) -> None:
+                       message: Message) -> bool:
+        """Insert a downloaded item; returns False if it was already in the library."""
+        outcome = self.save_media_items(logger, [MediaRecord.from_download(item, channel_id, message)])[0]
+        if outcome.error:
+            raise outcome.error
+        return outcome.saved
+
+    def save_media_items(self,
+                         logger: RichLogger,
+                         records: List[MediaRecord],
+                         source: str = "telegram") -> List[SaveOutcome]:
+        """Insert a batch of downloaded items from ``source`` in one transaction.
+
+        Each record runs in its own savepoint, so one bad record is reported in its
+        outcome instead of rolling back the rest of the batch.
+        """
+        source_id = self.dimensions.source_id(source)
+        outcomes: List[SaveOutcome] = []
         with Session(self.engine) as session:
-            # First check if media already exists
-            existing = self._get_existing_media(session, item)
-            if existing:
-                logger.write(f"Found existing file_id: {item.id}")
-                self._update_existing_media(session, existing, item, channel_id, message)
-                # TODO: add more detail
-                return
-
-            # Create new media item
-            media_type = self._get_or_raise_media_type(session, item.media_type)
-            new_item_id = uuid.uuid4().hex
-
-            media_item = MediaItem(
-                id=new_item_id,
-                created_at=datetime.now(),
-                updated_at=datetime.now(),
-                source_id=1,  # TODO: Make this configurable
-                seen=False,
-                media_type_id=media_type.id,
-                file_size=item.file_size or 0,
-                file_name=item.file_name,
-                deleted_at=None,
-            )
+            for record in records:
+                try:
+                    with session.begin_nested():
+                        outcomes.append(self._save_record(logger, session, record, source_id))
+                except Exception as e:
+                    logger.write(f"Failed to save file_id {record.file_id}: {e}")
+                    outcomes.append(SaveOutcome(saved=False, error=e))
+            session.commit()
+        return outcomes
 
-            telegram_metadata = TelegramMetadata(
+    def _save_record(self,
+                     logger: RichLogger,
+                     session: Session,
+                     record: MediaRecord,
+                     source_id: int) -> SaveOutcome:
+        # Queries autoflush, so earlier records of the same batch are visible here.
+        existing = self._get_existing_media(session, record)
+        if existing:
+            logger.write(f"Found existing file_id: {record.file_id}")
+            self._update_existing_media(existing, record)
+            # TODO: add more detail
+            return SaveOutcome(saved=False, existing_file_name=existing[0].file_name)
+
+        duplicate = self._get_media_by_content(session, record.content_hash)
+        if duplicate:
+            logger.write(f"Skipping file_id {record.file_id}: same content as {duplicate.file_name}")
+            return SaveOutcome(saved=False, existing_file_name=duplicate.file_name)
+
+        # Create new media item
+        media_type_id = self.dimensions.media_type_id(record.media_type)
+        new_item_id = uuid.uuid4().hex
+
+        media_item = MediaItem(
+            id=new_item_id,
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+            source_id=source_id,
+            seen=False,
+            media_type_id=media_type_id,
+            file_size=record.file_size,
+            file_name=record.file_name,
+            deleted_at=None,
+            content_hash=record.content_hash,
+        )
+
+        telegram_metadata = TelegramMetadata(
+            media_item_id=new_item_id,
+            file_id=record.file_id,
+            channel_id=record.channel_id,
+            date=record.date,
+            text=record.text,
+            url=f"/media/{record.file_name}",
+            message_id=record.message_id,
+            from_preview=int(record.from_preview),
+        )
+
+        session.add(media_item)
+        session.add(telegram_metadata)
+        if record.perceptual_hashes:
+            # Saves the near-duplicate scanner from reading the file again.
+            phash, dhash = record.perceptual_hashes
+            session.add(MediaItemHash(
                 media_item_id=new_item_id,
-                file_id=item.id,
-                channel_id=channel_id,
-                date=getattr(message, "date", datetime.now()),
-                text=getattr(message, "text") or "",
-                url=f"/media/{item.file_name}",
-                message_id=message.id,
-                from_preview=int(item.from_preview),
-            )
+                phash=to_signed(phash),
+                dhash=to_signed(dhash),
+                hashed_at=datetime.now(),
+            ))
+        return SaveOutcome(saved=True)
 
-            session.add(media_item)
-            session.add(telegram_metadata)
-            session.commit()
+    def _get_media_by_content(self, session: Session, content_hash: Optional[str]) -> Optional[MediaItem]:
+        if not content_hash:
+            return None
+        return session.exec(
+            select(MediaItem).where(MediaItem.content_hash == content_hash)
+        ).first()
 
     def _get_existing_media(self,
                           session: Session,
-                          download_item: DownloadItem) -> Optional[Tuple[MediaItem, TelegramMetadata]]:
+                          record: MediaRecord) -> Optional[Tuple[MediaItem, TelegramMetadata]]:
         return session.exec(
             select(MediaItem, TelegramMetadata)
             .where(MediaItem.id == TelegramMetadata.media_item_id)
-            .where(TelegramMetadata.file_id == download_item.id)
-            .where(TelegramMetadata.from_preview == int(download_item.from_preview))
+            .where(TelegramMetadata.file_id == record.file_id)
+            .where(TelegramMetadata.from_preview == int(record.from_preview))
         ).first()
 
 
     ## External callers
-    def find_existing_media(self,
-                          download_item: Document) -> Optional[Tuple[MediaItem, TelegramMetadata]]:
+    def find_existing_media(self, file_id: int) -> Optional[Tuple[MediaItem, TelegramMetadata]]:
         with Session(self.engine) as session:
             return session.exec(
                 select(MediaItem, TelegramMetadata)
                 .where(MediaItem.id == TelegramMetadata.media_item_id)
-                .where(TelegramMetadata.file_id == download_item.id)
-            ).first()
-
-
-
-    def get_media_type(self, type_name: str) -> Optional[MediaType]:
-        with Session(self.engine) as session:
-            return session.exec(
-                select(MediaType).where(MediaType.type == type_name)
+                .where(TelegramMetadata.file_id == file_id)
             ).first()
 
-
     def _update_existing_media(self,
-                             session: Session,
                              existing: Tuple[MediaItem, TelegramMetadata],
-                             item: DownloadItem,
-                             channel_id: int,
-                             message: Message) -> None:
+                             record: MediaRecord) -> None:
 
         (mediaItem, telegramMetadata) = existing
-        fileSize = getattr(message.file, "size", None)
-        if mediaItem.file_size != fileSize:
-            raise AssertionError(f"File size mismatch: {mediaItem.file_size} vs {fileSize}")
-        # Update legacy entries
+        if mediaItem.file_size != record.message_file_size:
+            raise AssertionError(f"File size mismatch: {mediaItem.file_size} vs {record.message_file_size}")
+        # Update legacy entries; committed with the rest of the batch
         if not telegramMetadata.message_id:
-            telegramMetadata.message_id = item.id
-            telegramMetadata.channel_id = channel_id
-            session.commit()
+            telegramMetadata.message_id = record.file_id
+            telegramMetadata.channel_id = record.channel_id
         return
 
-    def _get_or_raise_media_type(self, session: Session, type_name: str) -> MediaType:
-        media_type = session.exec(
-            select(MediaType).where(MediaType.type == type_name)
-        ).first()
-        if not media_type:
-            raise ValueError(f"Media type not found: {type_name}")
-        return media_type
-
-
     def get_channels_to_check(self, conds: list[Any]) -> List[ChannelModel]:
         # Get list of channel IDs to check.
         with Session(self.engine) as session:
@@ -167,6 +220,8 @@ class DatabaseService:
     def add_channel_if_not_exists(self, logger: RichLogger, channel_id: int, channel_title: str) -> None:
         # Add a channel to the database if it doesn't exist.
         # TODO: Add error handling
+        if self.dimensions.has_channel(channel_id):
+            return
         with Session(self.engine) as session:
             if not session.exec(
                 select(ChannelModel).where(ChannelModel.id == channel_id)
@@ -177,6 +232,8 @@ class DatabaseService:
                 log_msg = {"Forwarded to channel": channel_title}
                 logger.write(repr(log_msg))
                 logger.add_data(log_msg)
+        # Also when another process inserted it first, so the next check is a cache hit.
+        self.dimensions.add_channel(channel_id)
 
     def update_channel_list(self, target_channels: List[Channel]):
         with Session(self.engine) as session:
@@ -193,3 +250,76 @@ class DatabaseService:
                 else:
                     session.add(ChannelModel(id=channel.id, title=channel.title, check=True))
                     session.commit()
+        self.dimensions.invalidate()
+
+    def sync_tag_vocabulary(self, tags: List[str]) -> int:
+        """Insert any missing tags and point tag_indexes at the given output order.
+
+        Safe to re-run; returns the number of newly created tags.
+        """
+        with self.engine.begin() as conn:
+            inserted = conn.execute(
+                insert(Tag).on_conflict_do_nothing(index_elements=['name']),
+                [{"name": tag} for tag in tags],
+            ).rowcount
+            tag_ids: Dict[str, int] = {
+                name: tag_id for tag_id, name in conn.execute(select(Tag.id, Tag.name))
+            }
+            conn.execute(delete(TagIndex))
+            conn.execute(
+                insert(TagIndex),
+                [{"position": position, "tag_id": tag_ids[tag]} for position, tag in enumerate(tags)],
+            )
+        self._tag_index_map = None
+        return inserted
+
+    def get_tag_index_map(self) -> Dict[int, int]:
+        """Tagger output position -> tags.id."""
+        with Session(self.engine) as session:
+            return {
+                position: tag_id
+                for position, tag_id in session.exec(select(TagIndex.position, TagIndex.tag_id).order_by(col(TagIndex.position)))
+            }
+
+    def write_tag_results(self, rows: Iterable[TagResult], batch_rows: int = 100_000) -> int:
+        """Replace the tags of every media item in ``rows``; returns the number of rows written.
+
+        Rows for one media item must be contiguous. They are flushed in transactions of
+        roughly ``batch_rows`` rows, never splitting an item, so each item's tags are
+        swapped atomically.
+        """
+        written = 0
+        batch: List[TagResult] = []
+        for row in rows:
+            if len(batch) >= batch_rows and row[0] != batch[-1][0]:
+                written += self.replace_media_item_tags(batch)
+                batch = []
+            batch.append(row)
+        if batch:
+            written += self.replace_media_item_tags(batch)
+        return written
+
+    def replace_media_item_tags(self, rows: List[TagResult]) -> int:
+        """Replace the tags of every media item in ``rows`` in one transaction."""
+        index_map = self._tag_ids_by_position()
+        try:
+            values = [(media_item_id, index_map[position], weight) for media_item_id, position, weight in rows]
+        except KeyError as e:
+            raise ValueError(f"Unknown tag position {e.args[0]}; run --add-tags first") from e
+        media_item_ids = [(media_item_id,) for media_item_id in dict.fromkeys(row[0] for row in rows)]
+
+        with self.engine.begin() as conn:
+            # Driver-level executemany: building ORM objects would cost more than the writes.
+            conn.exec_driver_sql("DELETE FROM media_item_tags WHERE media_item_id = ?", media_item_ids)
+            conn.exec_driver_sql(
+                "INSERT INTO media_item_tags (media_item_id, tag_id, weight) VALUES (?, ?, ?) "
+                # Two positions can map to one tag; keep the stronger prediction.
+                "ON CONFLICT (media_item_id, tag_id) DO UPDATE SET weight = max(weight, excluded.weight)",
+                values,
+            )
+        return len(values)
+
+    def _tag_ids_by_position(self) -> Dict[int, int]:
+        if self._tag_index_map is None:
+            self._tag_index_map = self.get_tag_index_map()
+        return self._tag_index_map
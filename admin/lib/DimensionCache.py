@@ -0,0 +1,56 @@
+from typing import Dict, Optional, Set
+
+from sqlalchemy import Engine
+from sqlmodel import select
+
+from models.telegram import ChannelModel, MediaType, Source
+
+
+class DimensionCache:
+    """Process-wide copy of the small lookup tables: media_types, sources and channels.
+
+    Each table is read once, on first use, so saving an item costs no lookup queries.
+    A media type or source name that is missing is looked up again once before giving
+    up, which picks up rows added by another process; ``invalidate`` drops everything.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._media_types: Optional[Dict[str, int]] = None
+        self._sources: Optional[Dict[str, int]] = None
+        self._channels: Optional[Set[int]] = None
+
+    def invalidate(self) -> None:
+        self._media_types = None
+        self._sources = None
+        self._channels = None
+
+    def media_type_id(self, type_name: str) -> int:
+        if self._media_types is None or type_name not in self._media_types:
+            self._media_types = self._load_names(select(MediaType.type, MediaType.id))
+        if type_name not in self._media_types:
+            raise ValueError(f"Media type not found: {type_name}")
+        return self._media_types[type_name]
+
+    def source_id(self, name: str) -> int:
+        if self._sources is None or name not in self._sources:
+            self._sources = self._load_names(select(Source.name, Source.id))
+        if name not in self._sources:
+            raise ValueError(f"Source not found: {name}")
+        return self._sources[name]
+
+    def has_channel(self, channel_id: int) -> bool:
+        # Unlike the name lookups a miss is not reloaded: callers insert the channel and
+        # report it through add_channel.
+        if self._channels is None:
+            with self.engine.connect() as conn:
+                self._channels = set(conn.execute(select(ChannelModel.id)).scalars())
+        return channel_id in self._channels
+
+    def add_channel(self, channel_id: int) -> None:
+        if self._channels is not None:
+            self._channels.add(channel_id)
+
+    def _load_names(self, statement) -> Dict[str, int]:
+        with self.engine.connect() as conn:
+            return {name: row_id for name, row_id in conn.execute(statement)}
@@ -0,0 +1,66 @@
+import hashlib
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image, ImageFile
+
+from .perceptual import dhash, phash
+
+
+class DownloadSink:
+    """File-like target for ``client.download_media`` that hashes while it writes.
+
+    Every chunk goes to disk and into a SHA-256; for images it is also fed to an
+    incremental Pillow parser, so the content and perceptual hashes are known as soon
+    as the download finishes without reading the file back.
+    """
+
+    def __init__(self, path: Path, decode_image: bool = False):
+        self.path = path
+        self.size = 0
+        self._file = open(path, 'wb')
+        self._sha256 = hashlib.sha256()
+        self._parser: Optional[ImageFile.Parser] = ImageFile.Parser() if decode_image else None
+
+    def write(self, data: bytes) -> int:
+        written = self._file.write(data)
+        self._sha256.update(data)
+        self.size += len(data)
+        if self._parser is not None:
+            try:
+                self._parser.feed(data)
+            except (OSError, ValueError, Image.DecompressionBombError):
+                # Not something Pillow can decode; keep downloading without it.
+                self._parser = None
+        return written
+
+    def tell(self) -> int:
+        # Telethon reports progress through tell().
+        return self.size
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "DownloadSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def content_hash(self) -> str:
+        return self._sha256.hexdigest()
+
+    def perceptual_hashes(self) -> Optional[Tuple[int, int]]:
+        """``(phash, dhash)`` of the downloaded image, or None if it could not be decoded."""
+        if self._parser is None:
+            return None
+        parser, self._parser = self._parser, None
+        try:
+            with parser.close() as image:
+                return phash(image), dhash(image)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return None
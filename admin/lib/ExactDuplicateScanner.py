@@ -0,0 +1,221 @@
+import hashlib
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Engine, delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, col, select
+
+from models.telegram import FileHash, MediaItem, MediaItemDuplicates
+
+PARTIAL_BLOCK_SIZE = 64 * 1024
+_READ_SIZE = 1024 * 1024
+# Keeps the number of bound parameters per statement well under SQLite's limit.
+_SQL_CHUNK = 500
+
+
+def partial_file_hash(path: Path, size: int, block_size: int = PARTIAL_BLOCK_SIZE) -> str:
+    """SHA-256 of the first and last ``block_size`` bytes; the whole file if it is smaller."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        digest.update(f.read(block_size))
+        if size > 2 * block_size:
+            f.seek(-block_size, os.SEEK_END)
+        digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+def full_file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(_READ_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass(slots=True)
+class _Entry:
+    path: str
+    size: int
+    mtime_ns: int
+    partial_hash: Optional[str] = None
+    full_hash: Optional[str] = None
+
+
+@dataclass
+class ExactScanResult:
+    files: int = 0
+    changed: int = 0
+    removed: int = 0
+    partial_hashed: int = 0
+    full_hashed: int = 0
+    duplicate_groups: int = 0
+    pairs: int = 0
+    unlinked: int = 0
+
+
+class ExactDuplicateScanner:
+    """Finds byte-identical files in the media root and links them in media_item_duplicates.
+
+    (path, size, mtime, partial hash, full hash) is persisted in file_hashes and only
+    rows whose size or mtime changed are invalidated, so rescanning an unchanged media
+    root costs one directory listing. Hashing is staged: only files sharing a size get a
+    head/tail hash, and only files sharing both get a full hash.
+    """
+
+    def __init__(self,
+                 engine: Engine,
+                 media_path: Path,
+                 workers: int = 8,
+                 partial_block_size: int = PARTIAL_BLOCK_SIZE):
+        self.engine = engine
+        self.media_path = media_path
+        self.workers = workers
+        self.partial_block_size = partial_block_size
+
+    def run(self) -> ExactScanResult:
+        result = ExactScanResult()
+        on_disk = self._scan_directory()
+        result.files = len(on_disk)
+
+        rows = self._load_rows()
+        removed = [name for name in rows if name not in on_disk]
+        dirty: Dict[str, _Entry] = {}
+        for name, (size, mtime_ns) in on_disk.items():
+            row = rows.get(name)
+            if row is None or row.size != size or row.mtime_ns != mtime_ns:
+                row = _Entry(name, size, mtime_ns)
+                rows[name] = row
+                dirty[name] = row
+        for name in removed:
+            del rows[name]
+        result.changed = len(dirty)
+        result.removed = len(removed)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            by_size = _group(rows.values(), lambda row: row.size)
+            result.partial_hashed = self._fill(pool, by_size, 'partial_hash', self._partial_hash, dirty)
+
+            by_partial = _group(
+                (row for group in by_size for row in group),
+                lambda row: (row.size, row.partial_hash) if row.partial_hash else None,
+            )
+            result.full_hashed = self._fill(pool, by_partial, 'full_hash', self._full_hash, dirty)
+
+        self._save(dirty.values(), removed)
+
+        by_full = _group(
+            (row for group in by_partial for row in group),
+            lambda row: row.full_hash,
+        )
+        result.duplicate_groups = len(by_full)
+        self._link(by_full, result)
+        return result
+
+    def _scan_directory(self) -> Dict[str, Tuple[int, int]]:
+        files: Dict[str, Tuple[int, int]] = {}
+        with os.scandir(self.media_path) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError as e:
+                    print(f"Error accessing {entry.path}: {e}")
+                    continue
+                files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def _load_rows(self) -> Dict[str, _Entry]:
+        # Plain column rows: building ORM objects would dominate an unchanged rescan.
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(
+                FileHash.path, FileHash.size, FileHash.mtime_ns, FileHash.partial_hash, FileHash.full_hash
+            ))
+            return {row[0]: _Entry(*row) for row in rows}
+
+    def _partial_hash(self, row: _Entry) -> str:
+        return partial_file_hash(self.media_path / row.path, row.size, self.partial_block_size)
+
+    def _full_hash(self, row: _Entry) -> str:
+        if row.size <= 2 * self.partial_block_size and row.partial_hash is not None:
+            # The partial hash already covered every byte.
+            return row.partial_hash
+        return full_file_hash(self.media_path / row.path)
+
+    def _fill(self,
+              pool: ThreadPoolExecutor,
+              groups: List[List[_Entry]],
+              attribute: str,
+              compute: Callable[[_Entry], str],
+              dirty: Dict[str, _Entry]) -> int:
+        missing = [row for group in groups for row in group if getattr(row, attribute) is None]
+        hashed = 0
+        for row, digest in zip(missing, pool.map(_try(compute), missing)):
+            if digest is None:
+                continue
+            setattr(row, attribute, digest)
+            dirty[row.path] = row
+            hashed += 1
+        return hashed
+
+    def _save(self, rows: Iterable[_Entry], removed: List[str]) -> None:
+        values = [
+            {"path": row.path, "size": row.size, "mtime_ns": row.mtime_ns,
+             "partial_hash": row.partial_hash, "full_hash": row.full_hash}
+            for row in rows
+        ]
+        statement = insert(FileHash)
+        statement = statement.on_conflict_do_update(
+            index_elements=['path'],
+            set_={column: statement.excluded[column] for column in ('size', 'mtime_ns', 'partial_hash', 'full_hash')},
+        )
+        with self.engine.begin() as conn:
+            if values:
+                conn.execute(statement, values)
+            for start in range(0, len(removed), _SQL_CHUNK):
+                conn.execute(delete(FileHash).where(col(FileHash.path).in_(removed[start:start + _SQL_CHUNK])))
+
+    def _link(self, groups: List[List[_Entry]], result: ExactScanResult) -> None:
+        names = [row.path for group in groups for row in group]
+        media_ids: Dict[str, str] = {}
+        with Session(self.engine) as session:
+            for start in range(0, len(names), _SQL_CHUNK):
+                media_ids.update(session.exec(
+                    select(MediaItem.file_name, MediaItem.id)
+                    .where(col(MediaItem.file_name).in_(names[start:start + _SQL_CHUNK]))
+                ).all())
+
+        pairs = []
+        for group in groups:
+            ids = sorted({media_ids[row.path] for row in group if row.path in media_ids})
+            result.unlinked += sum(1 for row in group if row.path not in media_ids)
+            # Link every copy to one canonical item instead of all n^2 pairs.
+            pairs.extend({"first": ids[0], "second": other, "distance": 0} for other in ids[1:])
+
+        if pairs:
+            with self.engine.begin() as conn:
+                result.pairs = conn.execute(insert(MediaItemDuplicates).on_conflict_do_nothing(), pairs).rowcount
+
+
+def _group(rows: Iterable[_Entry], key: Callable[[_Entry], object]) -> List[List[_Entry]]:
+    """Bucket rows by ``key`` and keep the buckets with more than one row."""
+    buckets: Dict[object, List[_Entry]] = defaultdict(list)
+    for row in rows:
+        if (value := key(row)) is not None:
+            buckets[value].append(row)
+    return [bucket for bucket in buckets.values() if len(bucket) > 1]
+
+
+def _try(compute: Callable[[_Entry], str]) -> Callable[[_Entry], Optional[str]]:
+    def wrapper(row: _Entry) -> Optional[str]:
+        try:
+            return compute(row)
+        except OSError as e:
+            print(f"Error hashing {row.path}: {e}")
+            return None
+    return wrapper
@@ -0,0 +1,59 @@
+from array import array
+from bisect import bisect_left
+from typing import Optional, Set
+
+from sqlalchemy import Engine
+from sqlmodel import col, select
+
+from models.telegram import TelegramMetadata
+
+_YIELD_PER = 50_000
+
+
+class FileIdIndex:
+    """In-memory set of the Telegram file ids already in the library.
+
+    Loaded once per run so the updater can skip known files without a query per
+    message. The ids loaded from the database sit in two sorted ``array('q')``s (one
+    per ``from_preview`` value, 8 bytes per id) searched with bisect; ids saved during
+    the run go into small sets on top.
+    """
+
+    def __init__(self) -> None:
+        self._loaded = (array('q'), array('q'))
+        self._added: tuple[Set[int], Set[int]] = (set(), set())
+
+    @classmethod
+    def load(cls, engine: Engine) -> "FileIdIndex":
+        index = cls()
+        with engine.connect() as conn:
+            rows = conn.execution_options(yield_per=_YIELD_PER).execute(
+                select(TelegramMetadata.file_id, TelegramMetadata.from_preview)
+                # Ordered by the database, so the arrays are built already sorted.
+                .order_by(col(TelegramMetadata.file_id))
+            )
+            for file_id, from_preview in rows:
+                index._loaded[bool(from_preview)].append(file_id)
+        return index
+
+    def add(self, file_id: int, from_preview: bool = False) -> None:
+        if not self._contains(file_id, from_preview):
+            self._added[from_preview].add(file_id)
+
+    def contains(self, file_id: int, from_preview: Optional[bool] = None) -> bool:
+        """Whether ``file_id`` is known; ``from_preview=None`` matches either kind."""
+        kinds = (False, True) if from_preview is None else (from_preview,)
+        return any(self._contains(file_id, kind) for kind in kinds)
+
+    def __contains__(self, file_id: int) -> bool:
+        return self.contains(file_id)
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._loaded) + sum(len(ids) for ids in self._added)
+
+    def _contains(self, file_id: int, from_preview: bool) -> bool:
+        if file_id in self._added[from_preview]:
+            return True
+        ids = self._loaded[from_preview]
+        position = bisect_left(ids, file_id)
+        return position < len(ids) and ids[position] == file_id
@@ -1,14 +1,20 @@
+import uuid
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
+from telethon import utils
 from telethon.tl.custom.message import Message
 from telethon.tl.custom.file import File
-from telethon.tl.types import Channel, Document, WebPage
+from telethon.tl.types import Channel, Document, DocumentAttributeFilename, Photo, WebPage
 
 from .TLContext import TLContext
-from .types import Downloadable, MediaItem, DownloadItem, MessageMediaWebPage
+from .types import Downloadable, MediaItem, DownloadItem, MediaRecord, MessageMediaWebPage
 from .api import find_web_preview, get_message_link
 from .exceptions import ErrorContext, MediaError, DownloadError
 from .config import ProcessingConfig
+from .DownloadSink import DownloadSink
+from .MediaWriter import MediaWriter
+from .FileIdIndex import FileIdIndex
 
 # The complexity here I believe stems from combining Document vs MessageMediaDocument.
 # Document will arise from inspecting a MessageMediaWebPage?
@@ -35,6 +41,9 @@ class MediaProcessor:
         self.db = ctx.db
         self.client = ctx.client
         self.config = cfg
+        self.writer = MediaWriter(self.db, self.logger, cfg, on_committed=self._mark_known)
+        # Loaded by validate_paths; until then known files are looked up in the database.
+        self.known_files: Optional[FileIdIndex] = None
 
     def validate_paths(self):
         """Ensure that media and orphan paths exist"""
@@ -42,6 +51,17 @@ class MediaProcessor:
             raise FileNotFoundError(f"Media path {self.config.media_path} does not exist. Please create it before running the processor.")
         if not self.config.orphan_path.exists():
             raise FileNotFoundError(f"Orphan path {self.config.orphan_path} does not exist. Please create it before running the processor.")
+        # Fail before downloading anything if the configured source is not in the database.
+        self.db.dimensions.source_id(self.config.source)
+        self.config.incoming_path.mkdir(parents=True, exist_ok=True)
+        # Finish downloads an interrupted run journaled but never committed.
+        self.writer.recover()
+        # Anything left here is a partial download from an interrupted run.
+        for leftover in self.config.incoming_path.iterdir():
+            if leftover.is_file():
+                leftover.unlink()
+        self.known_files = FileIdIndex.load(self.db.engine)
+        self.logger.write(f"Loaded {len(self.known_files)} known file ids.")
 
     def log_message_info(self, mCtx: MediaContext, info: dict):
         self.logger.save_to_json({"message": mCtx.message.id, "channel": mCtx.channel.title, "info": info})
@@ -162,18 +182,17 @@ class MediaProcessor:
                     self.logger.write(item.target.stringify())
                 return None
 
-            existing = self.db.find_existing_media(final_target)
-            if existing:
+            if self._is_known(final_target.id):
                 self.logger.write(f"Found existing file_id: {final_target.id}")
                 self.logger.write(final_target.stringify())
                 return None
-            file_path = await self._download_file(final_target)
+            sink = await self._download_file(final_target, self._is_image(mCtx, item))
 
-            if not file_path:
+            if not sink:
                 self.logger.write(repr(final_target))
                 raise DownloadError("Failed to download file", mCtx.error("download_media"))
 
-            return self._create_download_item(mCtx, item, file_path)
+            return self._create_download_item(mCtx, item, final_target, sink)
 
         except Exception as e:
             # Print trace
@@ -182,32 +201,40 @@ class MediaProcessor:
             self.logger.write(f"Download failed: {str(e)}")
             raise
 
-    async def _download_file(self, downloadable: Downloadable) -> Optional[Path]:
+    async def _download_file(self, downloadable: Downloadable, decode_image: bool) -> Optional[DownloadSink]:
+        """Stream the download into the incoming directory, hashing it on the way."""
         download_task = self.logger.progress.add_task("[cyan]Downloading", total=100)
 
         def progress_callback(current: int, total: int):
             self.logger.progress.update(download_task, completed=current, total=total)
 
+        sink = DownloadSink(self.config.incoming_path / uuid.uuid4().hex, decode_image)
         try:
             if isinstance(downloadable, MessageMediaWebPage) and isinstance(downloadable.webpage, WebPage):
                 # TODO: Check webpage handling. Can we get Twitter embeds here?
                 print("Found webpage: ", downloadable.webpage.url)
-            result = await self.client.download_media(
-                downloadable,  # type: ignore this function can handle other types
-                str(self.config.media_path),
-                progress_callback=progress_callback
-            )
-            if isinstance(result, str):
-                return Path(result)
+            with sink:
+                result = await self.client.download_media(
+                    downloadable,  # type: ignore this function can handle other types
+                    sink,  # type: ignore any object with write() is accepted
+                    progress_callback=progress_callback
+                )
+            if result is None:
+                sink.path.unlink(missing_ok=True)
+                return None
+            return sink
+
+        except BaseException:
+            sink.path.unlink(missing_ok=True)
+            raise
 
         finally:
             self.logger.progress.remove_task(download_task)
 
 
-    def _create_download_item(self, mCtx: MediaContext, item: MediaItem, file_path: Path) -> DownloadItem:
-        """Create download item from the downloaded file"""
-        file_name = file_path.parts[-1]
-        file_size = file_path.stat().st_size
+    def _create_download_item(self, mCtx: MediaContext, item: MediaItem,
+                              downloadable: Downloadable, sink: DownloadSink) -> DownloadItem:
+        """Create download item from the hashed download"""
         mime_type = item.mime_type or "unknown/unknown"
         media_type = self._determine_media_type(mCtx, mime_type)
 
@@ -215,13 +242,58 @@ class MediaProcessor:
             target=item.target,
             id=item.id,
             from_preview=item.from_preview,
-            file_name=file_name,
-            file_size=file_size,
+            file_name=self._file_name_for(downloadable, getattr(mCtx.message, "date", None)),
+            file_size=sink.size,
             mime_type=mime_type,
-            media_type=media_type
+            media_type=media_type,
+            content_hash=sink.content_hash,
+            perceptual_hashes=sink.perceptual_hashes(),
+            staged_path=sink.path,
         )
 
 
+    def _file_name_for(self, downloadable: Downloadable, date: Optional[datetime]) -> str:
+        """Pick a file name the way Telethon does when downloading into a directory."""
+        media = downloadable
+        if isinstance(media, MessageMediaWebPage) and isinstance(media.webpage, WebPage):
+            media = media.webpage.document or media.webpage.photo
+        kind = "photo" if isinstance(media, Photo) else "document"
+        extension = utils.get_extension(media)
+
+        name = None
+        if isinstance(media, Document):
+            name = next((Path(attr.file_name).name for attr in media.attributes
+                         if isinstance(attr, DocumentAttributeFilename) and Path(attr.file_name).name), None)
+        if not name:
+            name = f"{kind}_{(date or datetime.now()):%Y-%m-%d_%H-%M-%S}"
+
+        stem, ext = Path(name).stem, Path(name).suffix or extension
+        candidate = f"{stem}{ext}"
+        counter = 1
+        while (self.config.media_path / candidate).exists() or self.writer.is_pending(candidate):
+            candidate = f"{stem} ({counter}){ext}"
+            counter += 1
+        return candidate
+
+
+    def _is_known(self, file_id: int) -> bool:
+        # A file waiting in the writer is not downloaded again, e.g. for a repost in the same batch.
+        if self.writer.has_pending_file(file_id):
+            return True
+        if self.known_files is not None:
+            return self.known_files.contains(file_id)
+        return self.db.find_existing_media(file_id) is not None
+
+    def _mark_known(self, record: MediaRecord) -> None:
+        # Only once committed: a record that fails goes to orphans and must be downloaded again.
+        if self.known_files is not None:
+            self.known_files.add(record.file_id, record.from_preview)
+
+
+    def _is_image(self, mCtx: MediaContext, item: MediaItem) -> bool:
+        return (item.mime_type or "").startswith("image/") or bool(mCtx.message.photo)
+
+
     def _determine_media_type(self, mCtx: MediaContext, mime_type: str) -> str:
         mtype = mime_type.split("/")[0]
         if mtype in ("video", "image"):
@@ -231,10 +303,5 @@ class MediaProcessor:
         return "document"
 
     def _save_media_item(self, mCtx: MediaContext, item: DownloadItem):
-        try:
-            self.db.save_media_item(self.logger, item, mCtx.channel.id, mCtx.message)
-        except Exception as e:
-            self.logger.write(f"Database insertion failed: {e}")
-            file_path = self.config.media_path / item.file_name
-            file_path.rename(self.config.orphan_path / item.file_name)
-            self.logger.write(f"Moved {item.file_name} to orphans directory.")
+        """Queue the item; the writer commits it with its batch and moves it into media_root."""
+        self.writer.submit(MediaRecord.from_download(item, mCtx.channel.id, mCtx.message))
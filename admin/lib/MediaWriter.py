@@ -0,0 +1,142 @@
+import asyncio
+import json
+import shutil
+from typing import Callable, List, Optional, Set
+
+from .DatabaseService import DatabaseService
+from .Logger import RichLogger
+from .config import ProcessingConfig
+from .types import MediaRecord, SaveOutcome
+
+
+class MediaWriter:
+    """Write-behind queue for downloaded items.
+
+    Records are buffered and committed in one transaction every ``write_batch_size``
+    items or ``write_flush_ms`` milliseconds, whichever comes first. A downloaded file
+    stays in the incoming directory until its batch commits; meanwhile its record is
+    appended to a JSONL journal, so a crash between download and commit is finished
+    by :meth:`recover` on the next start instead of losing the file.
+
+    ``on_committed`` is called for every record whose batch committed without error,
+    whether it became a new item or resolved to one already in the library.
+    """
+
+    def __init__(self,
+                 db: DatabaseService,
+                 logger: RichLogger,
+                 cfg: ProcessingConfig,
+                 on_committed: Optional[Callable[[MediaRecord], None]] = None):
+        self.db = db
+        self.logger = logger
+        self.config = cfg
+        self.on_committed = on_committed
+        self._pending: List[MediaRecord] = []
+        self._pending_names: Set[str] = set()
+        self._pending_file_ids: Set[int] = set()
+        self._journal = None
+        self._flusher: Optional[asyncio.Task[None]] = None
+
+    def submit(self, record: MediaRecord) -> None:
+        self._journal_file().write(json.dumps(record.to_json()) + "\n")
+        # Flushed to the OS, not fsynced: survives a process crash, which is what the journal is for.
+        self._journal_file().flush()
+        self._pending.append(record)
+        self._pending_names.add(record.file_name)
+        self._pending_file_ids.add(record.file_id)
+        if len(self._pending) >= self.config.write_batch_size:
+            self.flush()
+
+    def is_pending(self, file_name: str) -> bool:
+        """Whether a not-yet-committed item will be moved into media_root under this name."""
+        return file_name in self._pending_names
+
+    def has_pending_file(self, file_id: int) -> bool:
+        """Whether a Telegram file is downloaded and waiting for its batch to commit."""
+        return file_id in self._pending_file_ids
+
+    def flush(self) -> int:
+        """Commit every buffered record and place its file; returns the number saved."""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, []
+        saved = self._commit(batch)
+        self._pending_names.clear()
+        self._pending_file_ids.clear()
+        self._reset_journal()
+        return saved
+
+    def start(self) -> None:
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def recover(self) -> int:
+        """Commit the records a previous run journaled but may not have finished."""
+        journal_path = self.config.journal_path
+        if not journal_path.exists():
+            return 0
+        with journal_path.open("r", encoding="utf-8") as journal:
+            records = [MediaRecord.from_json(json.loads(line)) for line in journal if line.strip()]
+        # Without its staged file a record was either placed already or never finished downloading.
+        records = [r for r in records if r.staged_path and r.staged_path.exists()]
+        saved = self._commit(records) if records else 0
+        self._reset_journal()
+        if records:
+            self.logger.write(f"Recovered {len(records)} journaled downloads ({saved} new).")
+        return saved
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.write_flush_ms / 1000)
+            self.flush()
+
+    def _commit(self, batch: List[MediaRecord]) -> int:
+        try:
+            outcomes = self.db.save_media_items(self.logger, batch, self.config.source)
+        except Exception as e:
+            self.logger.write(f"Database insertion failed: {e}")
+            outcomes = [SaveOutcome(saved=False, error=e) for _ in batch]
+        for record, outcome in zip(batch, outcomes):
+            self._place(record, outcome)
+        return sum(outcome.saved for outcome in outcomes)
+
+    def _place(self, record: MediaRecord, outcome: SaveOutcome) -> None:
+        target = self.config.media_path / record.file_name
+        staged_path = record.staged_path or target
+        if outcome.error:
+            shutil.move(staged_path, self.config.orphan_path / record.file_name)
+            self.logger.write(f"Moved {record.file_name} to orphans directory.")
+            return
+        if outcome.saved or (outcome.existing_file_name == record.file_name and not target.exists()):
+            # The second case is an item committed just before a crash, found again by recover().
+            if staged_path != target:
+                shutil.move(staged_path, target)
+        else:
+            # Same content is already in the library; never let the copy reach media_root.
+            staged_path.unlink(missing_ok=True)
+        if self.on_committed is not None:
+            self.on_committed(record)
+
+    def _journal_file(self):
+        if self._journal is None:
+            self.config.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal = self.config.journal_path.open("a", encoding="utf-8")
+        return self._journal
+
+    def _reset_journal(self) -> None:
+        journal = self._journal_file()
+        journal.seek(0)
+        journal.truncate()
@@ -1,18 +1,25 @@
+from typing import Dict, Optional
 from telethon.client.telegramclient import TelegramClient # type: ignore
 from telethon.tl.types import ( # type: ignore
     Channel,
 )
 from .config import StrategyConfig
-from .DatabaseService import DatabaseService
+from .DatabaseService import ChannelCursor, DatabaseService
 from . import messageStrategies as strat
 from .types import MessageGenerator, MessageIter
 
 
 class MessageFetcher:
-    def __init__(self, client: TelegramClient, db: DatabaseService, cfg: StrategyConfig):
+    def __init__(self,
+                 client: TelegramClient,
+                 db: DatabaseService,
+                 cfg: StrategyConfig,
+                 cursors: Optional[Dict[int, ChannelCursor]] = None):
         self.client = client
         self.db = db
         self.config = cfg
+        # Preloaded (earliest, latest) message ids per channel; looked up per channel if None
+        self.cursors = cursors
 
     async def get_channel_messages(self, channel: Channel) -> MessageGenerator:
         strategy = await self._get_strategy(channel, self.config.strategy, self.config.limit)
@@ -25,12 +32,13 @@ class MessageFetcher:
             case "all":
                 return strat.get_all_messages(self.client, channel, limit)
             case "db":
-                last_seen_post = self.db.get_last_seen_post(channel.id)
+                last_seen_post = self._latest_seen(channel.id)
                 return strat.get_messages_since_db_update(self.client, channel, last_seen_post, limit)
             case "oldest":
                 return strat.get_oldest_messages(self.client, channel, limit)
             case "before":
-                before_id = self.db.get_last_seen_post(channel.id)
+                # Continue below the oldest message we have, not the newest.
+                before_id = self._earliest_seen(channel.id)
                 return strat.get_earlier_unseen_messages(self.client, channel, before_id, limit)
             case "urls":
                 return strat.get_urls(self.client, channel, limit)
@@ -40,3 +48,15 @@ class MessageFetcher:
                 return await strat.get_unread_messages(self.client, channel)
             case _:
                 raise ValueError(f"unknown message strategy: {strategy}")
+
+    def _earliest_seen(self, channel_id: int) -> int | None:
+        if self.cursors is None:
+            return self.db.get_earliest_seen_post(channel_id)
+        cursor = self.cursors.get(channel_id)
+        return cursor[0] if cursor else None
+
+    def _latest_seen(self, channel_id: int) -> int | None:
+        if self.cursors is None:
+            return self.db.get_last_seen_post(channel_id)
+        cursor = self.cursors.get(channel_id)
+        return cursor[1] if cursor else None
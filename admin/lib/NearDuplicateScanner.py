@@ -0,0 +1,149 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Engine
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, col, select
+from tqdm import tqdm
+
+from models.telegram import MediaItem, MediaItemDuplicates, MediaItemHash
+from .perceptual import BKTree, hamming, hash_file, to_signed, to_unsigned
+
+
+@dataclass
+class ScanResult:
+    hashed: int = 0
+    failed: int = 0
+    matched: int = 0
+    pairs: int = 0
+
+
+class NearDuplicateScanner:
+    """Links visually similar media items in media_item_duplicates.
+
+    Each run only hashes items without a media_item_hashes row and only matches rows
+    without matched_at (including hashes written at download time), so it can be re-run
+    after every update. Candidates come from a BK-tree over the pHash of every matched
+    item and are confirmed against the dHash before a pair is recorded.
+    """
+
+    def __init__(self,
+                 engine: Engine,
+                 media_path: Path,
+                 max_distance: int = 8,
+                 workers: Optional[int] = None,
+                 batch_size: int = 500):
+        self.engine = engine
+        self.media_path = media_path
+        self.max_distance = max_distance
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def run(self) -> ScanResult:
+        result = ScanResult()
+        tree = self._load_tree()
+        unmatched = self._unmatched_hashes()
+        for start in range(0, len(unmatched), self.batch_size):
+            self._save_batch(tree, unmatched[start:start + self.batch_size], result)
+
+        pending = self._pending_items()
+        if not pending:
+            return result
+
+        paths = [self.media_path / file_name for _, file_name in pending]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            hashes = pool.map(hash_file, paths, chunksize=16)
+            batch: List[Tuple[str, Optional[Tuple[int, int]]]] = []
+            for (media_item_id, _), item_hashes in tqdm(zip(pending, hashes), total=len(pending)):
+                batch.append((media_item_id, item_hashes))
+                if item_hashes is not None:
+                    result.hashed += 1
+                if len(batch) >= self.batch_size:
+                    self._save_batch(tree, batch, result)
+                    batch = []
+            self._save_batch(tree, batch, result)
+        return result
+
+    def _load_tree(self) -> BKTree[Tuple[str, int]]:
+        tree: BKTree[Tuple[str, int]] = BKTree()
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(MediaItemHash.media_item_id, MediaItemHash.phash, MediaItemHash.dhash)
+                .where(col(MediaItemHash.phash).is_not(None))
+                .where(col(MediaItemHash.matched_at).is_not(None))
+            )
+            for media_item_id, phash, dhash in rows:
+                tree.add(to_unsigned(phash), (media_item_id, to_unsigned(dhash)))
+        return tree
+
+    def _unmatched_hashes(self) -> List[Tuple[str, Optional[Tuple[int, int]]]]:
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(MediaItemHash.media_item_id, MediaItemHash.phash, MediaItemHash.dhash)
+                .where(col(MediaItemHash.phash).is_not(None))
+                .where(col(MediaItemHash.matched_at).is_(None))
+            )
+            return [
+                (media_item_id, (to_unsigned(phash), to_unsigned(dhash)))
+                for media_item_id, phash, dhash in rows
+            ]
+
+    def _pending_items(self) -> List[Tuple[str, str]]:
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(MediaItem.id, MediaItem.file_name)
+                .outerjoin(MediaItemHash, col(MediaItemHash.media_item_id) == MediaItem.id)
+                .where(col(MediaItemHash.media_item_id).is_(None))
+                .where(col(MediaItem.user_deleted).is_(False))
+            )
+            return [(media_item_id, file_name) for media_item_id, file_name in rows]
+
+    def _save_batch(self,
+                    tree: BKTree[Tuple[str, int]],
+                    batch: List[Tuple[str, Optional[Tuple[int, int]]]],
+                    result: ScanResult) -> None:
+        if not batch:
+            return
+        now = datetime.now()
+        hash_rows = []
+        pairs = []
+        for media_item_id, item_hashes in batch:
+            if item_hashes is None:
+                # Recorded anyway so undecodable files are not retried on every run.
+                result.failed += 1
+                hash_rows.append({
+                    "media_item_id": media_item_id,
+                    "phash": None,
+                    "dhash": None,
+                    "hashed_at": now,
+                    "matched_at": now,
+                })
+                continue
+            phash, dhash = item_hashes
+            result.matched += 1
+            for distance, (other_id, other_dhash) in tree.find(phash, self.max_distance):
+                if other_id == media_item_id or hamming(dhash, other_dhash) > self.max_distance:
+                    continue
+                first, second = sorted((media_item_id, other_id))
+                pairs.append({"first": first, "second": second, "distance": distance})
+            tree.add(phash, (media_item_id, dhash))
+            hash_rows.append({
+                "media_item_id": media_item_id,
+                "phash": to_signed(phash),
+                "dhash": to_signed(dhash),
+                "hashed_at": now,
+                "matched_at": now,
+            })
+
+        statement = insert(MediaItemHash)
+        statement = statement.on_conflict_do_update(
+            index_elements=['media_item_id'],
+            set_={"matched_at": statement.excluded.matched_at},
+        )
+        with self.engine.begin() as conn:
+            conn.execute(statement, hash_rows)
+            if pairs:
+                result.pairs += conn.execute(insert(MediaItemDuplicates).on_conflict_do_nothing(), pairs).rowcount
@@ -1,10 +1,12 @@
 from datetime import datetime
+from typing import Dict
 from .config import Settings, BackoffConfig, ProcessingConfig, QueueManagerConfig, StrategyConfig, UpdaterConfig
 from .BackoffManager import BackoffManager
 from .QueueManager import QueueManager
 from .MessageFetcher import MessageFetcher
 from .TLContext import TLContext
 from .MediaProcessor import MediaProcessor
+from .DatabaseService import ChannelCursor
 from .ChannelManager import ChannelManager
 from .channelStrategies import ChannelProvider
 
@@ -26,7 +28,19 @@ class TeledeckUpdater:
 
     async def _process_channels(self, channel_provider: ChannelProvider, updater_config: UpdaterConfig):
         self.processor.validate_paths()
+        # One GROUP BY for every channel's resume point instead of a query per channel.
+        cursors = self.ctx.db.get_channel_cursors()
+        self.processor.writer.start()
+        try:
+            await self._run_queues(channel_provider, updater_config, cursors)
+        finally:
+            # Commit whatever is still buffered, even if processing failed.
+            await self.processor.writer.close()
 
+    async def _run_queues(self,
+                          channel_provider: ChannelProvider,
+                          updater_config: UpdaterConfig,
+                          cursors: Dict[int, ChannelCursor]):
         gather_channels = self.queue_manager.queueChannels(
             channel_provider.get_channels(self.cm))
 
@@ -36,7 +50,7 @@ class TeledeckUpdater:
         mf = MessageFetcher(self.ctx.client, self.ctx.db, StrategyConfig(
             strategy=updater_config.message_strategy,
             limit=updater_config.message_limit
-        ))
+        ), cursors=cursors)
 
         gather_messages = self.queue_manager.processChannelQueue(
             mf.get_channel_messages
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Literal, Optional, Tuple
 
 import yaml
 from pydantic import BaseModel, ConfigDict, Field
@@ -47,6 +47,13 @@ class FetchSettings(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
 
+class ProcessingSettings(BaseModel):
+    # sources.name recorded on items this ingester saves
+    source: str = "telegram"
+
+    model_config = ConfigDict(extra="forbid")
+
+
 class StorageSettings(BaseModel):
     max_file_size_bytes: int = 1024 * 1024 * 1024
 
@@ -58,6 +65,8 @@ class PathSettings(BaseModel):
     static_root: Path = Path("./static")
     media_root: Path = Path("./static/media")
     orphan_root: Path = Path("./recyclebin/orphan")
+    incoming_root: Path = Path("./data/incoming")
+    write_journal: Path = Path("./data/pending_media.jsonl")
     recycle_root: Path = Path("./recyclebin")
     static_assets: Path = Path("./server/assets")
     update_state: Path = Path("./data/update_info")
@@ -66,6 +75,23 @@ class PathSettings(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
 
+class DatabaseSettings(BaseModel):
+    """SQLite connection settings, applied as PRAGMAs to every pooled connection."""
+    journal_mode: Literal["wal", "delete", "truncate", "persist", "memory", "off"] = "wal"
+    synchronous: Literal["off", "normal", "full", "extra"] = "normal"
+    busy_timeout_ms: int = Field(default=5000, ge=0)
+    # Page cache per connection; negative values are KiB as in PRAGMA cache_size.
+    cache_size: int = -65536
+    mmap_size_bytes: int = Field(default=256 * 1024 * 1024, ge=0)
+    temp_store: Literal["default", "file", "memory"] = "memory"
+    pool_size: int = Field(default=5, ge=1)
+    # Downloaded items are committed in batches of this many, or after this long.
+    write_batch_size: int = Field(default=50, ge=1)
+    write_flush_ms: int = Field(default=2000, ge=0)
+
+    model_config = ConfigDict(extra="forbid")
+
+
 class AppSettings(BaseModel):
     env: str = "development"
     http_port: int = 4000
@@ -95,6 +121,8 @@ class TaggingSettings(BaseModel):
     grpc_host: str = "localhost"
     grpc_port: int = 8081
     default_cutoff: float = 0.35
+    tags_path: Path = Path("./AI/models/tags_8041.json")
+    extra_tags_path: Path = Path("./AI/models/tags_extra.json")
 
     model_config = ConfigDict(extra="forbid")
 
@@ -102,6 +130,8 @@ class TaggingSettings(BaseModel):
 class Settings(BaseModel):
     app: AppSettings = AppSettings()
     paths: PathSettings = PathSettings()
+    database: DatabaseSettings = DatabaseSettings()
+    processing: ProcessingSettings = ProcessingSettings()
     storage: StorageSettings = StorageSettings()
     telegram: TelegramSettings = TelegramSettings()
     backoff: BackoffSettings = BackoffSettings()
@@ -142,6 +172,11 @@ class Settings(BaseModel):
     def ORPHAN_PATH(self) -> Path:
         return self.paths.orphan_root
 
+    @property
+    def THUMBNAIL_PATH(self) -> Path:
+        # Mirrors Config.ThumbnailDir() in the Go server
+        return self.paths.static_root / "thumbnails"
+
     @property
     def EXPORT_PATH(self) -> Path:
         return self.paths.export_root
@@ -325,8 +360,14 @@ class BackoffConfig:
 
 class ProcessingConfig(PathConfig):
     orphan_path: Path
+    incoming_path: Path
+    journal_path: Path
     write_message_links: bool = False
     max_file_size: int = 1024 * 1024 * 1024
+    write_batch_size: int = 50
+    write_flush_ms: int = 2000
+    # sources.name recorded on items this ingester saves
+    source: str = "telegram"
 
     model_config = ConfigDict(extra="forbid")
 
@@ -336,8 +377,13 @@ class ProcessingConfig(PathConfig):
             media_path=cfg.MEDIA_PATH,
             db_path=cfg.DB_PATH,
             orphan_path=cfg.ORPHAN_PATH,
+            incoming_path=cfg.paths.incoming_root,
+            journal_path=cfg.paths.write_journal,
             write_message_links=cfg.WRITE_MESSAGE_LINKS,
             max_file_size=cfg.storage.max_file_size_bytes,
+            write_batch_size=cfg.database.write_batch_size,
+            write_flush_ms=cfg.database.write_flush_ms,
+            source=cfg.processing.source,
         )
 
 
@@ -384,11 +430,12 @@ class TelethonConfig:
 class DatabaseConfig:
     db_path: Path
     must_create: bool = False
+    settings: DatabaseSettings = field(default_factory=DatabaseSettings)
 
     @classmethod
     def from_config(cls, cfg: Settings | ExportConfig) -> "DatabaseConfig":
         if isinstance(cfg, Settings):
-            return cls(db_path=cfg.DB_PATH)
+            return cls(db_path=cfg.DB_PATH, settings=cfg.database)
         return cls(db_path=cfg.db_path)
 
 
@@ -431,6 +478,8 @@ def _apply_env_overrides(data: Dict[str, Any]) -> Dict[str, Any]:
     valid_roots = {
         "app",
         "paths",
+        "database",
+        "processing",
         "storage",
         "telegram",
         "backoff",
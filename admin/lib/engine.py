@@ -0,0 +1,43 @@
+"""SQLite engine factory shared by the updater, admin commands and scanners.
+
+The Go server reads the same database file while the updater writes to it, so every
+pooled connection is switched to WAL (readers no longer block the writer), waits on a
+lock for ``busy_timeout_ms`` instead of failing with "database is locked", and trades
+the per-commit fsync of ``synchronous=FULL`` for ``NORMAL``, which is still durable
+across application crashes in WAL mode.
+"""
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import Engine, event
+from sqlmodel import create_engine
+
+from .config import DatabaseSettings
+
+
+def connection_pragmas(settings: DatabaseSettings) -> list[str]:
+    return [
+        f"PRAGMA journal_mode = {settings.journal_mode.upper()}",
+        f"PRAGMA synchronous = {settings.synchronous.upper()}",
+        f"PRAGMA busy_timeout = {int(settings.busy_timeout_ms)}",
+        f"PRAGMA cache_size = {int(settings.cache_size)}",
+        f"PRAGMA mmap_size = {int(settings.mmap_size_bytes)}",
+        f"PRAGMA temp_store = {settings.temp_store.upper()}",
+    ]
+
+
+def create_sqlite_engine(db_path: Path, settings: Optional[DatabaseSettings] = None) -> Engine:
+    settings = settings or DatabaseSettings()
+    engine = create_engine(f"sqlite:///{db_path}", pool_size=settings.pool_size)
+    pragmas = connection_pragmas(settings)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return engine
@@ -0,0 +1,160 @@
+"""Perceptual hashes for near-duplicate detection.
+
+Both hashes are 64-bit integers compared by Hamming distance: re-encoding, resizing or
+light recompression of an image moves them by a few bits, while unrelated images land
+around 32 bits apart. Videos are hashed from a representative frame picked by ffmpeg.
+"""
+import math
+import mimetypes
+import subprocess
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+from PIL import Image, UnidentifiedImageError
+
+HASH_BITS = 64
+_HASH_SIZE = 8
+_PHASH_SAMPLE = 32
+_FFMPEG_TIMEOUT = 60
+
+# DCT-II basis restricted to the 8 lowest frequencies of a 32-sample signal.
+_DCT_BASIS = [
+    [math.cos((2 * x + 1) * u * math.pi / (2 * _PHASH_SAMPLE)) for x in range(_PHASH_SAMPLE)]
+    for u in range(_HASH_SIZE)
+]
+
+T = TypeVar("T")
+
+
+def _grayscale(image: Image.Image, size: Tuple[int, int]) -> List[int]:
+    # Let the JPEG decoder downscale by a power of two before the real resize.
+    image.draft("L", (size[0] * 4, size[1] * 4))
+    return list(image.convert("L").resize(size, Image.Resampling.LANCZOS).tobytes())
+
+
+def _bits(flags: List[bool]) -> int:
+    value = 0
+    for flag in flags:
+        value = (value << 1) | int(flag)
+    return value
+
+
+def dhash(image: Image.Image) -> int:
+    """Difference hash: whether each pixel is brighter than its right-hand neighbour."""
+    width = _HASH_SIZE + 1
+    pixels = _grayscale(image, (width, _HASH_SIZE))
+    return _bits([
+        pixels[row * width + col] > pixels[row * width + col + 1]
+        for row in range(_HASH_SIZE)
+        for col in range(_HASH_SIZE)
+    ])
+
+
+def phash(image: Image.Image) -> int:
+    """DCT hash: whether each low-frequency coefficient is above their median."""
+    pixels = _grayscale(image, (_PHASH_SAMPLE, _PHASH_SAMPLE))
+    rows = [pixels[y * _PHASH_SAMPLE:(y + 1) * _PHASH_SAMPLE] for y in range(_PHASH_SAMPLE)]
+    # Separable 2D DCT, only computing the 8x8 block that ends up in the hash.
+    row_dct = [[sum(b * p for b, p in zip(basis, row)) for basis in _DCT_BASIS] for row in rows]
+    coefficients = [
+        sum(basis[y] * row_dct[y][u] for y in range(_PHASH_SAMPLE))
+        for basis in _DCT_BASIS
+        for u in range(_HASH_SIZE)
+    ]
+    median = sorted(coefficients)[len(coefficients) // 2]
+    return _bits([c > median for c in coefficients])
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def is_video(path: Path) -> bool:
+    mime_type, _ = mimetypes.guess_type(path.name)
+    return bool(mime_type and mime_type.startswith("video/"))
+
+
+def video_keyframe(path: Path) -> Image.Image:
+    """Extract a representative frame with the same ffmpeg filter the thumbnailer uses."""
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", str(path), "-vf", "thumbnail", "-frames:v", "1",
+         "-f", "image2pipe", "-vcodec", "png", "-"],
+        capture_output=True,
+        check=True,
+        timeout=_FFMPEG_TIMEOUT,
+    )
+    return Image.open(BytesIO(result.stdout))
+
+
+def hash_file(path: Path) -> Optional[Tuple[int, int]]:
+    """Return ``(phash, dhash)`` for an image or video, or None if it cannot be decoded.
+
+    Module-level so it can be shipped to a process pool.
+    """
+    try:
+        if is_video(path):
+            image = video_keyframe(path)
+        else:
+            image = Image.open(path)
+        with image:
+            return phash(image), dhash(image)
+    except (OSError, UnidentifiedImageError, subprocess.SubprocessError, Image.DecompressionBombError):
+        return None
+
+
+class BKTree(Generic[T]):
+    """Burkhard-Keller tree over 64-bit hashes for Hamming-radius queries.
+
+    Each child edge is labelled with its distance to the parent, so the triangle
+    inequality lets a lookup skip every subtree whose edge falls outside
+    ``[d - radius, d + radius]``; small radii visit a small fraction of the tree.
+    """
+
+    def __init__(self) -> None:
+        self._root: Optional[Tuple[int, List[T], Dict[int, tuple]]] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item: T) -> None:
+        self._size += 1
+        if self._root is None:
+            self._root = (value, [item], {})
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item], {})
+                return
+            node = child
+
+    def find(self, value: int, radius: int) -> Iterator[Tuple[int, T]]:
+        """Yield ``(distance, item)`` for every stored item within ``radius`` bits of ``value``."""
+        if self._root is None:
+            return
+        stack = [self._root]
+        while stack:
+            node_value, items, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= radius:
+                for item in items:
+                    yield distance, item
+            for edge, child in children.items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+
+
+def to_signed(value: int) -> int:
+    """Map an unsigned 64-bit hash onto SQLite's signed INTEGER range."""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value & ((1 << HASH_BITS) - 1)
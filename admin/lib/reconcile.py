@@ -0,0 +1,89 @@
+"""Reconcile the media directory with the media_items table.
+
+Orphans are files with no media item; failed deletes are files whose media item was
+deleted by the user but which are still on disk. Both are found with one streaming
+query and one directory listing, then compared as sets.
+"""
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Set, Tuple
+
+from sqlalchemy import Engine
+from sqlmodel import select
+from tqdm import tqdm
+
+from models.telegram import MediaItem
+
+_YIELD_PER = 10_000
+
+
+@dataclass
+class ReconcileReport:
+    scanned: int = 0
+    orphans: List[str] = field(default_factory=list)
+    failed_deletes: List[str] = field(default_factory=list)
+    moved: int = 0
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def scan_file_names(directory: Path) -> Set[str]:
+    with os.scandir(directory) as entries:
+        return {entry.name for entry in entries if entry.is_file(follow_symlinks=False)}
+
+
+def load_media_file_names(engine: Engine) -> Tuple[Set[str], Set[str]]:
+    """Return ``(live, deleted)`` file names, streamed from the database in one query."""
+    live: Set[str] = set()
+    deleted: Set[str] = set()
+    with engine.connect() as conn:
+        rows = conn.execution_options(yield_per=_YIELD_PER).execute(
+            select(MediaItem.file_name, MediaItem.user_deleted)
+        )
+        for file_name, user_deleted in rows:
+            (deleted if user_deleted else live).add(file_name)
+    # A name re-used by a live item is not a failed delete.
+    return live, deleted - live
+
+
+def move_files(names: List[str], source: Path, target: Path, report: ReconcileReport) -> None:
+    target.mkdir(parents=True, exist_ok=True)
+    existing = scan_file_names(target)
+    for name in tqdm(names):
+        destination = name
+        counter = 1
+        while destination in existing:
+            stem, ext = os.path.splitext(name)
+            destination = f"{stem} ({counter}){ext}"
+            counter += 1
+        try:
+            os.rename(source / name, target / destination)
+        except OSError as e:
+            report.errors.append((name, str(e)))
+            continue
+        existing.add(destination)
+        report.moved += 1
+
+
+def reconcile_media(engine: Engine,
+                    media_path: Path,
+                    orphan_path: Path,
+                    recycle_path: Path,
+                    *,
+                    orphans: bool = True,
+                    failed_deletes: bool = True,
+                    dry_run: bool = False) -> ReconcileReport:
+    """Move orphans to ``orphan_path`` and failed deletes to ``recycle_path``."""
+    on_disk = scan_file_names(media_path)
+    live, deleted = load_media_file_names(engine)
+
+    report = ReconcileReport(scanned=len(on_disk))
+    if orphans:
+        report.orphans = sorted(on_disk - live - deleted)
+    if failed_deletes:
+        report.failed_deletes = sorted(on_disk & deleted)
+
+    if not dry_run:
+        move_files(report.orphans, media_path, orphan_path, report)
+        move_files(report.failed_deletes, media_path, recycle_path, report)
+    return report
@@ -0,0 +1,24 @@
+import json
+from pathlib import Path
+from typing import List
+
+
+def load_tag_vocabulary(tags_path: Path, extra_path: Path) -> List[str]:
+    """Tags in the tagger's output order.
+
+    Must stay in step with ``_load_tags`` in AI/app/models/tagger.py: the base tags
+    sorted by name, then each ``[position, tag]`` extra inserted at ``position``
+    (or appended for -1).
+    """
+    with tags_path.open("r", encoding="utf-8") as fp:
+        tags: List[str] = sorted(json.load(fp))
+
+    if extra_path.exists():
+        with extra_path.open("r", encoding="utf-8") as fp:
+            for position, tag in json.load(fp):
+                if position == -1:
+                    tags.append(tag)
+                else:
+                    tags.insert(int(position), tag)
+
+    return tags
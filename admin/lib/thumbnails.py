@@ -0,0 +1,173 @@
+"""Bulk thumbnail maintenance.
+
+Thumbnails follow the server's conventions (server/internal/service/thumbnailer): they
+live in ``<static_root>/thumbnails``, are named after the source file with its extension
+stripped, spaces replaced by underscores and ``.jpg`` appended, and the ``thumbnails``
+table stores that bare file name.
+"""
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from PIL import Image, UnidentifiedImageError
+from sqlalchemy import Engine, delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import col, select
+from tqdm import tqdm
+
+from models.telegram import MediaItem, MediaType, TelegramMetadata, Thumbnail
+
+# Media types the server generates thumbnails for.
+THUMBNAIL_MEDIA_TYPES = ("video", "webp", "gif")
+_FFMPEG_TIMEOUT = 120
+
+
+@dataclass
+class ThumbnailFilter:
+    channel_id: Optional[int] = None
+    before: Optional[datetime] = None
+    media_item_ids: Optional[List[str]] = None
+
+    def apply(self, statement):
+        if self.channel_id is not None:
+            statement = statement.where(
+                col(MediaItem.id).in_(
+                    select(TelegramMetadata.media_item_id).where(TelegramMetadata.channel_id == self.channel_id)
+                )
+            )
+        if self.before is not None:
+            statement = statement.where(col(MediaItem.created_at) < self.before)
+        if self.media_item_ids is not None:
+            statement = statement.where(col(MediaItem.id).in_(self.media_item_ids))
+        return statement
+
+
+@dataclass
+class ThumbnailReport:
+    rows: int = 0
+    files_removed: int = 0
+    generated: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+
+def thumbnail_name(file_name: str) -> str:
+    """Same name the server derives for a source file."""
+    ext = os.path.splitext(file_name)[1]
+    stem = file_name.replace(ext, "") if ext else file_name
+    return stem.replace(" ", "_") + ".jpg"
+
+
+def wipe_thumbnails(engine: Engine,
+                    thumbnail_path: Path,
+                    selection: Optional[ThumbnailFilter] = None,
+                    workers: int = 8) -> ThumbnailReport:
+    """Delete matching thumbnail rows in one statement, then their files in parallel."""
+    report = ThumbnailReport()
+    selection = selection or ThumbnailFilter()
+    selected = selection.apply(select(MediaItem.id))
+    with engine.begin() as conn:
+        file_names = list(conn.execute(
+            select(Thumbnail.filename).where(col(Thumbnail.media_item_id).in_(selected))
+        ).scalars())
+        report.rows = conn.execute(
+            delete(Thumbnail).where(col(Thumbnail.media_item_id).in_(selected))
+        ).rowcount
+
+    def remove(file_name: str) -> bool:
+        try:
+            (thumbnail_path / file_name).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        report.files_removed = sum(pool.map(remove, file_names))
+    return report
+
+
+def generate_thumbnail(source: Path, target: Path, media_type: str) -> bool:
+    """Render one thumbnail. Module-level so it can run in a process pool."""
+    try:
+        if media_type == "video":
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-y", "-i", str(source), "-vf", "thumbnail",
+                 "-update", "true", "-frames:v", "1", str(target)],
+                capture_output=True,
+                check=True,
+                timeout=_FFMPEG_TIMEOUT,
+            )
+        else:
+            # gif/webp: first frame, which is what ffmpeg would pick for a still.
+            with Image.open(source) as image:
+                image.seek(0)
+                image.convert("RGB").save(target, format="JPEG", quality=90)
+        return True
+    except (OSError, UnidentifiedImageError, subprocess.SubprocessError):
+        target.unlink(missing_ok=True)
+        return False
+
+
+def regenerate_thumbnails(engine: Engine,
+                          media_path: Path,
+                          thumbnail_path: Path,
+                          selection: Optional[ThumbnailFilter] = None,
+                          workers: Optional[int] = None) -> ThumbnailReport:
+    """(Re)build thumbnails for matching items whose source changed since their thumbnail was made."""
+    report = ThumbnailReport()
+    selection = selection or ThumbnailFilter()
+    thumbnail_path.mkdir(parents=True, exist_ok=True)
+    statement = selection.apply(
+        select(MediaItem.id, MediaItem.file_name, MediaType.type, Thumbnail.filename)
+        .join(MediaType, col(MediaType.id) == MediaItem.media_type_id)
+        .outerjoin(Thumbnail, col(Thumbnail.media_item_id) == MediaItem.id)
+        .where(col(MediaType.type).in_(THUMBNAIL_MEDIA_TYPES))
+        .where(col(MediaItem.user_deleted).is_(False))
+    )
+    with engine.connect() as conn:
+        items = conn.execute(statement).all()
+
+    jobs: List[Tuple[str, Path, Path, str]] = []
+    for media_item_id, file_name, media_type, existing in items:
+        source = media_path / file_name
+        target = thumbnail_path / thumbnail_name(file_name)
+        try:
+            source_mtime = source.stat().st_mtime_ns
+        except FileNotFoundError:
+            report.failed += 1
+            continue
+        try:
+            # Up to date: recorded under the expected name and not older than its source.
+            if existing == target.name and target.stat().st_mtime_ns >= source_mtime:
+                report.skipped += 1
+                continue
+        except FileNotFoundError:
+            pass
+        jobs.append((media_item_id, source, target, media_type))
+
+    done: List[dict] = []
+    if not jobs:
+        return report
+    _, sources, targets, media_types = zip(*jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(generate_thumbnail, sources, targets, media_types, chunksize=4)
+        for (media_item_id, _, target, _), ok in tqdm(zip(jobs, results), total=len(jobs)):
+            if ok:
+                done.append({"media_item_id": media_item_id, "filename": target.name})
+            else:
+                report.failed += 1
+
+    if done:
+        statement = insert(Thumbnail)
+        statement = statement.on_conflict_do_update(
+            index_elements=['media_item_id'],
+            set_={"filename": statement.excluded.filename},
+        )
+        with engine.begin() as conn:
+            conn.execute(statement, done)
+    report.generated = len(done)
+    return report
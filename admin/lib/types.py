@@ -1,3 +1,5 @@
+from datetime import datetime
+from pathlib import Path
 from typing import Optional, Tuple
 from dataclasses import dataclass
 from typing import Protocol, Callable, Coroutine, AsyncGenerator, AsyncIterable, Any
@@ -38,6 +40,69 @@ class DownloadItem:
     media_type: str
     file_name: str
     file_size: int
+    content_hash: Optional[str] = None
+    perceptual_hashes: Optional[Tuple[int, int]] = None
+    # Where the download was written before being moved into media_root
+    staged_path: Optional[Path] = None
+
+
+@dataclass
+class MediaRecord:
+    """A downloaded item plus its message fields, detached from Telethon so it can be journaled."""
+    file_id: int
+    from_preview: bool
+    channel_id: int
+    message_id: int
+    date: datetime
+    text: str
+    file_name: str
+    file_size: int
+    media_type: str
+    # Size Telegram reports for the message's file, checked against existing items
+    message_file_size: Optional[int] = None
+    content_hash: Optional[str] = None
+    perceptual_hashes: Optional[Tuple[int, int]] = None
+    staged_path: Optional[Path] = None
+
+    @classmethod
+    def from_download(cls, item: DownloadItem, channel_id: int, message: Message) -> "MediaRecord":
+        return cls(
+            file_id=item.id,
+            from_preview=item.from_preview,
+            channel_id=channel_id,
+            message_id=message.id,
+            date=getattr(message, "date", None) or datetime.now(),
+            text=getattr(message, "text", None) or "",
+            file_name=item.file_name,
+            file_size=item.file_size or 0,
+            media_type=item.media_type,
+            message_file_size=getattr(getattr(message, "file", None), "size", None),
+            content_hash=item.content_hash,
+            perceptual_hashes=item.perceptual_hashes,
+            staged_path=item.staged_path,
+        )
+
+    def to_json(self) -> dict[str, Any]:
+        data = dict(self.__dict__)
+        data["date"] = self.date.isoformat()
+        data["staged_path"] = str(self.staged_path) if self.staged_path else None
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "MediaRecord":
+        data = dict(data)
+        data["date"] = datetime.fromisoformat(data["date"])
+        data["staged_path"] = Path(data["staged_path"]) if data["staged_path"] else None
+        data["perceptual_hashes"] = tuple(data["perceptual_hashes"]) if data["perceptual_hashes"] else None
+        return cls(**data)
+
+
+@dataclass
+class SaveOutcome:
+    saved: bool
+    # File name of the library item this record resolved to, when it was already known
+    existing_file_name: Optional[str] = None
+    error: Optional[Exception] = None
 
 
 
@@ -64,6 +64,8 @@ class MediaItem(SQLModel, table=True):
     favorite: bool = Field(default=False, nullable=False, index=True)
     user_deleted: bool = Field(default=False, nullable=False, index=True)
     deleted_at: Optional[datetime] = Field(nullable=True, index=True)
+    # SHA-256 of the file contents, computed while downloading
+    content_hash: Optional[str] = Field(default=None, nullable=True, index=True, max_length=64)
 
     source: Source = Relationship(back_populates="media_items")
     media_type: MediaType = Relationship(back_populates="media_items")
@@ -74,6 +76,10 @@ class MediaItem(SQLModel, table=True):
 
 class TelegramMetadata(SQLModel, table=True):
     __tablename__ = 'telegram_metadata' # pyright: ignore[reportAssignmentType]
+    __table_args__ = (
+        sa.Index('idx_telegram_metadata_channel_message', 'channel_id', 'message_id'),
+        sa.Index('idx_telegram_metadata_file_preview', 'file_id', 'from_preview'),
+    )
 
     media_item_id: str = Field(foreign_key="media_items.id", primary_key=True)
     channel_id: int = Field(foreign_key="channels.id", nullable=False)
@@ -105,6 +111,13 @@ class Tag(SQLModel, table=True):
     name: str = Field(nullable=False, unique=True)
     media_items: List[MediaItem] = Relationship(back_populates="tags", link_model=MediaItemTag)
 
+class TagIndex(SQLModel, table=True):
+    __tablename__ = 'tag_indexes' # pyright: ignore[reportAssignmentType]
+
+    # Position of the tag in the tagger's output vector
+    position: int = Field(primary_key=True)
+    tag_id: int = Field(foreign_key="tags.id", nullable=False)
+
 class AestheticScore(SQLModel, table=True):
     __tablename__ = 'aesthetic_score' # pyright: ignore[reportAssignmentType]
     media_item_id: str = Field(
@@ -127,5 +140,32 @@ class MediaItemDuplicates(SQLModel, table=True):
 
     first: str = Field(foreign_key="media_items.id", primary_key=True)
     second: str = Field(foreign_key="media_items.id", primary_key=True)
+    distance: Optional[int] = Field(default=None, nullable=True)
+
+    __table_args__ = (UniqueConstraint('first', 'second'),)
+
+class MediaItemHash(SQLModel, table=True):
+    __tablename__ = 'media_item_hashes' # pyright: ignore[reportAssignmentType]
 
-    __table_args__ = (UniqueConstraint('first', 'second'),)
\ No newline at end of file
+    media_item_id: str = Field(
+        foreign_key="media_items.id",
+        primary_key=True,
+        ondelete="CASCADE",
+    )
+    # Signed 64-bit perceptual hashes; NULL when the file could not be decoded.
+    phash: Optional[int] = Field(default=None, nullable=True, sa_type=sa.BigInteger)
+    dhash: Optional[int] = Field(default=None, nullable=True, sa_type=sa.BigInteger)
+    hashed_at: datetime = Field(nullable=False)
+    # Set once the near-duplicate scanner has compared this item against the library
+    matched_at: Optional[datetime] = Field(default=None, nullable=True)
+
+class FileHash(SQLModel, table=True):
+    __tablename__ = 'file_hashes' # pyright: ignore[reportAssignmentType]
+
+    # File name relative to the media root
+    path: str = Field(primary_key=True)
+    size: int = Field(nullable=False, index=True)
+    mtime_ns: int = Field(nullable=False, sa_type=sa.BigInteger)
+    # SHA-256 of the head and tail blocks, then of the whole file; filled in lazily
+    partial_hash: Optional[str] = Field(default=None, nullable=True)
+    full_hash: Optional[str] = Field(default=None, nullable=True, index=True)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from pathlib import Path
 import sys
 from typing import Any, Dict, Optional
@@ -10,6 +11,12 @@ ADMIN_ROOT = Path(__file__).resolve().parents[1]
 if str(ADMIN_ROOT) not in sys.path:
     sys.path.insert(0, str(ADMIN_ROOT))
 
+from sqlmodel import Session, select  # noqa: E402
+
+from admin.lib.DatabaseService import DatabaseService  # noqa: E402
+from admin.lib.config import DatabaseConfig  # noqa: E402
+from models.telegram import MediaItem, MediaType  # noqa: E402
+
 
 @pytest.fixture
 def config_loader(tmp_path, monkeypatch):
@@ -47,3 +54,37 @@ def reset_special_env(monkeypatch):
     ]
     for key in legacy_keys:
         monkeypatch.delenv(key, raising=False)
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    """DatabaseService on a freshly migrated database in tmp_path."""
+    return DatabaseService(DatabaseConfig(db_path=tmp_path / "teledeck.db"))
+
+
+def add_media_item(session: Session,
+                   media_id: str,
+                   file_name: str,
+                   *,
+                   media_type: Optional[str] = None,
+                   created_at: Optional[datetime] = None,
+                   user_deleted: bool = False,
+                   file_size: int = 1024) -> MediaItem:
+    """Add a media_items row; the caller commits. Without ``media_type`` it uses type id 1."""
+    media_type_id = 1
+    if media_type is not None:
+        media_type_id = session.exec(select(MediaType.id).where(MediaType.type == media_type)).one()
+    created_at = created_at or datetime.now()
+    item = MediaItem(
+        id=media_id,
+        source_id=1,
+        media_type_id=media_type_id,
+        file_name=file_name,
+        file_size=file_size,
+        created_at=created_at,
+        updated_at=created_at,
+        seen=False,
+        user_deleted=user_deleted,
+    )
+    session.add(item)
+    return item
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from admin.lib.config import Settings, create_export_location
+from admin.lib.config import ProcessingConfig, Settings, create_export_location
 
 
 def test_settings_loads_default_only(config_loader):
@@ -65,6 +65,14 @@ def test_settings_path_accessors_reflect_overrides(config_loader, tmp_path):
     assert cfg.ORPHAN_PATH == Path(orphan_path)
 
 
+def test_processing_source_is_configurable(config_loader, monkeypatch):
+    config_loader(default={"processing": {"source": "twitter"}})
+    assert ProcessingConfig.from_config(Settings()).source == "twitter"
+
+    monkeypatch.setenv("PROCESSING__SOURCE", "e621")
+    assert ProcessingConfig.from_config(Settings()).source == "e621"
+
+
 def test_create_export_location_sets_up_media_tree(tmp_path):
     base_paths = {
         "db_path": str((tmp_path / "teledeck.db").resolve()),
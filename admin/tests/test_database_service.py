@@ -4,17 +4,13 @@ from datetime import datetime
 from types import SimpleNamespace
 
 import pytest
+from sqlalchemy import event
 from sqlmodel import Session, select
 
 from admin.lib.DatabaseService import DatabaseService
-from admin.lib.config import DatabaseConfig
-from models.telegram import ChannelModel, MediaItem, MediaType, Source, TelegramMetadata
-
-
-@pytest.fixture
-def db_service(tmp_path):
-    db_path = tmp_path / "teledeck.db"
-    return DatabaseService(DatabaseConfig(db_path=db_path))
+from admin.lib.config import DatabaseConfig, Settings
+from admin.lib.types import DownloadItem, MediaRecord
+from models.telegram import ChannelModel, MediaItem, MediaItemHash, MediaItemTag, MediaType, Source, TelegramMetadata
 
 
 def _add_media(session: Session, media_id: str, channel_id: int, message_id: int) -> None:
@@ -60,6 +56,15 @@ def test_get_last_and_earliest_seen_post(db_service):
     assert db_service.get_earliest_seen_post(100) == 10
 
 
+def test_get_channel_cursors(db_service):
+    with Session(db_service.engine) as session:
+        _add_media(session, "item1", channel_id=100, message_id=10)
+        _add_media(session, "item2", channel_id=100, message_id=25)
+        _add_media(session, "item3", channel_id=200, message_id=7)
+
+    assert db_service.get_channel_cursors() == {100: (10, 25), 200: (7, 7)}
+
+
 def test_update_channel_list_sets_flags_without_duplicates(db_service):
     # Seed two channels; only one should remain checked after update
     with Session(db_service.engine) as session:
@@ -80,3 +85,109 @@ def test_update_channel_list_sets_flags_without_duplicates(db_service):
         assert {c.id for c in rows if c.check} == {1, 3}
         # ensure row for channel 3 created exactly once
         assert len([c for c in rows if c.id == 3]) == 1
+
+
+def _download(file_id: int, file_name: str, content_hash: str) -> DownloadItem:
+    return DownloadItem(
+        target=None,  # type: ignore[arg-type]
+        id=file_id,
+        from_preview=False,
+        mime_type="image/jpeg",
+        media_type="image",
+        file_name=file_name,
+        file_size=2048,
+        content_hash=content_hash,
+        perceptual_hashes=(1 << 63, 42),
+    )
+
+
+def test_save_media_item_skips_known_content(db_service):
+    logger = SimpleNamespace(write=lambda *args: None)
+    message = SimpleNamespace(id=7, date=datetime.now(), text="")
+
+    assert db_service.save_media_item(logger, _download(1, "a.jpg", "ab" * 32), 100, message) is True
+    # A different Telegram file with identical bytes is not inserted again.
+    assert db_service.save_media_item(logger, _download(2, "b.jpg", "ab" * 32), 100, message) is False
+    assert db_service.save_media_item(logger, _download(3, "c.jpg", "cd" * 32), 100, message) is True
+
+    with Session(db_service.engine) as session:
+        items = session.exec(select(MediaItem)).all()
+        assert sorted(i.file_name for i in items) == ["a.jpg", "c.jpg"]
+        hashes = session.exec(select(MediaItemHash)).all()
+        assert len(hashes) == 2
+        assert all(h.matched_at is None and h.phash == -(1 << 63) for h in hashes)
+
+
+def test_saves_use_cached_dimensions(db_service):
+    statements: list[str] = []
+    event.listen(db_service.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    logger = SimpleNamespace(write=lambda *args: None)
+
+    def record(file_id: int, media_type: str = "image") -> MediaRecord:
+        return MediaRecord(file_id=file_id, from_preview=False, channel_id=100, message_id=file_id,
+                           date=datetime.now(), text="", file_name=f"{file_id}.jpg", file_size=1,
+                           media_type=media_type)
+
+    outcomes = db_service.save_media_items(logger, [record(1), record(2, "video")], source="e621")
+    outcomes += db_service.save_media_items(logger, [record(3), record(4, "photo")], source="e621")
+    assert [o.saved for o in outcomes] == [True] * 4
+    # One load per table for the whole run, however many items are saved.
+    assert len([s for s in statements if "FROM media_types" in s]) == 1
+    assert len([s for s in statements if "FROM sources" in s]) == 1
+
+    with Session(db_service.engine) as session:
+        e621 = session.exec(select(Source).where(Source.name == "e621")).one()
+        assert {item.source_id for item in session.exec(select(MediaItem)).all()} == {e621.id}
+        session.add(MediaType(type="audio"))
+        session.commit()
+    # A type added elsewhere is picked up on the miss; an unknown one still fails.
+    outcomes = db_service.save_media_items(logger, [record(5, "audio"), record(6, "hologram")])
+    assert outcomes[0].saved and isinstance(outcomes[1].error, ValueError)
+
+
+def test_known_channels_are_answered_from_cache(db_service):
+    statements: list[str] = []
+    event.listen(db_service.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    logger = SimpleNamespace(write=lambda *args: None, add_data=lambda *args: None)
+
+    db_service.add_channel_if_not_exists(logger, 300, "new")
+    db_service.add_channel_if_not_exists(logger, 300, "new")
+    db_service.add_channel_if_not_exists(logger, 300, "new")
+
+    # One load of the table, one check and insert for the miss, nothing afterwards.
+    assert len([s for s in statements if "FROM channels" in s]) == 2
+    assert db_service.dimensions.has_channel(300)
+
+
+def test_write_tag_results_replaces_tags_per_item(db_service):
+    db_service.sync_tag_vocabulary(["apple", "kiwi", "mango"])
+    index_map = db_service.get_tag_index_map()
+
+    written = db_service.write_tag_results(
+        [("a", 0, 0.9), ("a", 1, 0.5), ("b", 2, 0.7)],
+        batch_rows=1,
+    )
+    assert written == 3
+    db_service.write_tag_results([("a", 2, 0.4)])
+
+    with Session(db_service.engine) as session:
+        rows = {(t.media_item_id, t.tag_id, t.weight) for t in session.exec(select(MediaItemTag)).all()}
+    assert rows == {("a", index_map[2], 0.4), ("b", index_map[2], 0.7)}
+
+    with pytest.raises(ValueError):
+        db_service.write_tag_results([("b", 99, 0.1)])
+    with Session(db_service.engine) as session:
+        # The failed batch rolled back without touching b's existing tags.
+        assert len(session.exec(select(MediaItemTag).where(MediaItemTag.media_item_id == "b")).all()) == 1
+
+
+def test_engine_applies_database_settings(config_loader, monkeypatch, tmp_path):
+    config_loader(default={"paths": {"db_path": str(tmp_path / "teledeck.db")}, "database": {"cache_size": -2000}})
+    monkeypatch.setenv("DATABASE__BUSY_TIMEOUT_MS", "1234")
+    db = DatabaseService(DatabaseConfig.from_config(Settings()))
+
+    names = ("journal_mode", "synchronous", "busy_timeout", "cache_size", "temp_store")
+    with db.engine.connect() as conn:
+        values = {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
+    # synchronous 1 is NORMAL, temp_store 2 is MEMORY.
+    assert values == {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 1234, "cache_size": -2000, "temp_store": 2}
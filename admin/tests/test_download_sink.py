@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import hashlib
+from io import BytesIO
+
+from PIL import Image
+
+from admin.lib.DownloadSink import DownloadSink
+from admin.lib.perceptual import hash_file
+
+
+def test_sink_hashes_while_writing(tmp_path):
+    buffer = BytesIO()
+    Image.radial_gradient("L").resize((320, 200)).save(buffer, format="JPEG")
+    data = buffer.getvalue()
+
+    path = tmp_path / "download"
+    with DownloadSink(path, decode_image=True) as sink:
+        for start in range(0, len(data), 1000):
+            sink.write(data[start:start + 1000])
+
+    assert path.read_bytes() == data
+    assert sink.size == sink.tell() == len(data)
+    assert sink.content_hash == hashlib.sha256(data).hexdigest()
+    assert sink.perceptual_hashes() == hash_file(path)
+
+
+def test_sink_tolerates_non_image_data(tmp_path):
+    with DownloadSink(tmp_path / "download", decode_image=True) as sink:
+        sink.write(b"\x00" * 4096)
+
+    assert sink.content_hash == hashlib.sha256(b"\x00" * 4096).hexdigest()
+    assert sink.perceptual_hashes() is None
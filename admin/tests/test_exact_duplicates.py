@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+
+from sqlmodel import Session, select
+
+from admin.lib.ExactDuplicateScanner import ExactDuplicateScanner
+from models.telegram import FileHash, MediaItemDuplicates
+
+from .conftest import add_media_item
+
+
+def test_scanner_links_identical_files_and_skips_unchanged(tmp_path, db_service):
+    media_path = tmp_path / "media"
+    media_path.mkdir()
+
+    body = os.urandom(300_000)
+    (media_path / "a.jpg").write_bytes(body)
+    (media_path / "a (2).jpg").write_bytes(body)
+    # Same size, same head and tail, different middle: only the full hash tells them apart.
+    (media_path / "b.jpg").write_bytes(body[:100_000] + bytes(100_000) + body[200_000:])
+    (media_path / "unique.jpg").write_bytes(b"x" * 10)
+    (media_path / "orphan.jpg").write_bytes(body)
+    with Session(db_service.engine) as session:
+        for media_id, name in [("a", "a.jpg"), ("a2", "a (2).jpg"), ("b", "b.jpg"), ("u", "unique.jpg")]:
+            add_media_item(session, media_id, name)
+        session.commit()
+
+    scanner = ExactDuplicateScanner(db_service.engine, media_path, workers=2, partial_block_size=4096)
+    first = scanner.run()
+    assert (first.files, first.changed) == (5, 5)
+    assert (first.partial_hashed, first.full_hashed) == (4, 4)
+    assert (first.duplicate_groups, first.pairs, first.unlinked) == (1, 1, 1)
+
+    second = scanner.run()
+    assert (second.changed, second.partial_hashed, second.full_hashed, second.pairs) == (0, 0, 0, 0)
+    assert second.duplicate_groups == 1
+
+    (media_path / "b.jpg").write_bytes(body)
+    os.utime(media_path / "b.jpg", ns=(0, 12345))
+    (media_path / "orphan.jpg").unlink()
+    third = scanner.run()
+    assert (third.changed, third.removed, third.pairs) == (1, 1, 1)
+
+    with Session(db_service.engine) as session:
+        pairs = session.exec(select(MediaItemDuplicates)).all()
+        assert {(p.first, p.second, p.distance) for p in pairs} == {("a", "a2", 0), ("a", "b", 0)}
+        paths = {row.path for row in session.exec(select(FileHash)).all()}
+        assert paths == {"a.jpg", "a (2).jpg", "b.jpg", "unique.jpg"}
+    assert (media_path / "a (2).jpg").exists()
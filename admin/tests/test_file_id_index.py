@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlmodel import Session
+
+from admin.lib.DatabaseService import DatabaseService
+from admin.lib.FileIdIndex import FileIdIndex
+from admin.lib.config import DatabaseConfig
+from models.telegram import ChannelModel, MediaItem, TelegramMetadata
+
+
+def test_index_matches_telegram_metadata(tmp_path):
+    db = DatabaseService(DatabaseConfig(db_path=tmp_path / "teledeck.db"))
+    known = [(5, 0), (-(1 << 62), 0), (1 << 62, 0), (42, 1), (7, 0), (7, 1)]
+    with Session(db.engine) as session:
+        session.add(ChannelModel(id=100, title="test"))
+        for n, (file_id, from_preview) in enumerate(known):
+            media_id = f"m{n}"
+            session.add(MediaItem(id=media_id, source_id=1, media_type_id=1, file_name=f"{n}.jpg", file_size=1,
+                                  created_at=datetime.now(), updated_at=datetime.now(), seen=False))
+            session.add(TelegramMetadata(media_item_id=media_id, channel_id=100, message_id=n, file_id=file_id,
+                                         from_preview=from_preview, date=datetime.now(), text="", url=""))
+        session.commit()
+
+    index = FileIdIndex.load(db.engine)
+    assert len(index) == len(known)
+    for file_id, from_preview in known:
+        assert file_id in index
+        assert index.contains(file_id, bool(from_preview))
+    assert not index.contains(5, from_preview=True)
+    assert 42 in index and not index.contains(42, from_preview=False)
+    assert 6 not in index and (1 << 63) - 1 not in index
+
+    index.add(6)
+    index.add(7, from_preview=True)
+    assert 6 in index and not index.contains(6, from_preview=True)
+    assert len(index) == len(known) + 1
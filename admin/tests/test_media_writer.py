@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlmodel import Session, select
+
+from admin.lib.DatabaseService import DatabaseService
+from admin.lib.MediaWriter import MediaWriter
+from admin.lib.config import DatabaseConfig, ProcessingConfig
+from admin.lib.types import MediaRecord
+from models.telegram import MediaItem, TelegramMetadata
+
+
+@pytest.fixture
+def cfg(tmp_path):
+    for name in ("media", "orphans", "incoming"):
+        (tmp_path / name).mkdir()
+    return ProcessingConfig(
+        media_path=tmp_path / "media",
+        db_path=tmp_path / "teledeck.db",
+        orphan_path=tmp_path / "orphans",
+        incoming_path=tmp_path / "incoming",
+        journal_path=tmp_path / "pending.jsonl",
+        write_batch_size=2,
+    )
+
+
+@pytest.fixture
+def db(cfg):
+    return DatabaseService(DatabaseConfig(db_path=cfg.db_path))
+
+
+LOGGER = SimpleNamespace(write=lambda *args: None)
+
+
+def _record(cfg, file_id: int, file_name: str, content: bytes, media_type: str = "photo") -> MediaRecord:
+    staged = cfg.incoming_path / f"staged{file_id}"
+    staged.write_bytes(content)
+    return MediaRecord(
+        file_id=file_id,
+        from_preview=False,
+        channel_id=100,
+        message_id=file_id,
+        date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        text="",
+        file_name=file_name,
+        file_size=len(content),
+        media_type=media_type,
+        message_file_size=len(content),
+        content_hash=content.hex().ljust(64, "0"),
+        perceptual_hashes=(1, 2),
+        staged_path=staged,
+    )
+
+
+def _file_names(db) -> list[str]:
+    with Session(db.engine) as session:
+        return sorted(item.file_name for item in session.exec(select(MediaItem)).all())
+
+
+def test_writer_commits_in_batches(cfg, db):
+    writer = MediaWriter(db, LOGGER, cfg)
+    writer.submit(_record(cfg, 1, "a.jpg", b"a"))
+    assert writer.is_pending("a.jpg")
+    assert _file_names(db) == []
+
+    # Same bytes as a.jpg in the same batch: deduplicated against the uncommitted row.
+    writer.submit(_record(cfg, 2, "b.jpg", b"a"))
+    assert _file_names(db) == ["a.jpg"]
+    assert not writer.is_pending("a.jpg")
+    assert cfg.journal_path.read_text() == ""
+
+    writer.submit(_record(cfg, 3, "c.jpg", b"c"))
+    writer.submit(_record(cfg, 4, "d.jpg", b"d", media_type="hologram"))
+    assert _file_names(db) == ["a.jpg", "c.jpg"]
+    assert sorted(p.name for p in cfg.media_path.iterdir()) == ["a.jpg", "c.jpg"]
+    # The bad record went to orphans without rolling back its batch.
+    assert [p.name for p in cfg.orphan_path.iterdir()] == ["d.jpg"]
+    assert list(cfg.incoming_path.iterdir()) == []
+
+
+def test_recover_finishes_journaled_downloads(cfg, db):
+    crashed = MediaWriter(db, LOGGER, cfg.model_copy(update={"write_batch_size": 10}))
+    crashed.submit(_record(cfg, 1, "a.jpg", b"a"))
+    # Committed, but the run died before moving the file or clearing the journal.
+    committed = _record(cfg, 2, "b.jpg", b"b")
+    db.save_media_items(LOGGER, [committed])
+    crashed.submit(committed)
+    assert crashed.is_pending("a.jpg") and _file_names(db) == ["b.jpg"]
+
+    writer = MediaWriter(db, LOGGER, cfg)
+    assert writer.recover() == 1
+    assert _file_names(db) == ["a.jpg", "b.jpg"]
+    assert sorted(p.name for p in cfg.media_path.iterdir()) == ["a.jpg", "b.jpg"]
+    assert cfg.journal_path.read_text() == ""
+    with Session(db.engine) as session:
+        assert len(session.exec(select(TelegramMetadata)).all()) == 2
+    assert writer.recover() == 0
+
+
+def test_on_committed_skips_failed_records(cfg, db):
+    committed = []
+    writer = MediaWriter(db, LOGGER, cfg, on_committed=lambda record: committed.append(record.file_id))
+    writer.submit(_record(cfg, 1, "a.jpg", b"a"))
+    assert writer.has_pending_file(1)
+    writer.submit(_record(cfg, 2, "b.jpg", b"b", media_type="hologram"))
+    assert not writer.has_pending_file(1)
+    # The failed record is in orphans and must stay unknown so it is downloaded again.
+    assert committed == [1]
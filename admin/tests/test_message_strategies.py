@@ -1,8 +1,11 @@
 from collections.abc import AsyncIterator
 import inspect
+from types import SimpleNamespace
 
 import pytest
 
+from admin.lib.MessageFetcher import MessageFetcher
+from admin.lib.config import StrategyConfig
 from admin.lib.messageStrategies import NoMessages
 
 
@@ -15,3 +18,34 @@ async def test_no_messages_is_async_iterator() -> None:
 
     with pytest.raises(StopAsyncIteration):
         await iterator.__anext__()
+
+
+class _RecordingClient:
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+
+    def iter_messages(self, channel, limit=None, **kwargs):
+        self.calls.append(kwargs)
+        return NoMessages()
+
+
+class _NoQueries:
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected database call: {name}")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("strategy, expected", [
+    ("db", {"min_id": 25}),
+    ("before", {"offset_id": 10}),
+])
+async def test_fetcher_resumes_from_preloaded_cursors(strategy, expected) -> None:
+    client = _RecordingClient()
+    fetcher = MessageFetcher(client, _NoQueries(), StrategyConfig(strategy=strategy, limit=None),  # type: ignore[arg-type]
+                             cursors={100: (10, 25)})
+
+    await fetcher._get_strategy(SimpleNamespace(id=100), strategy, None)  # type: ignore[arg-type]
+    # A channel with nothing saved yet starts from the top.
+    await fetcher._get_strategy(SimpleNamespace(id=200), strategy, None)  # type: ignore[arg-type]
+
+    assert client.calls == [expected, {}]
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime
+
+import pytest
+from PIL import Image, ImageDraw
+from sqlmodel import Session, select
+
+from admin.lib.NearDuplicateScanner import NearDuplicateScanner
+from admin.lib.perceptual import BKTree, dhash, hamming, hash_file, phash, to_signed, to_unsigned
+from models.telegram import MediaItemDuplicates, MediaItemHash
+
+from .conftest import add_media_item
+
+
+def _pattern(seed: int, size=(640, 480)) -> Image.Image:
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x0, y0 = rng.randrange(size[0]), rng.randrange(size[1])
+        x1, y1 = x0 + rng.randrange(40, 300), y0 + rng.randrange(40, 300)
+        draw.rectangle((x0, y0, x1, y1), fill=tuple(rng.randrange(256) for _ in range(3)))
+    return image
+
+
+def test_hashes_survive_resize_and_reencode(tmp_path):
+    original = _pattern(1)
+    path = tmp_path / "small.jpg"
+    original.resize((320, 240)).save(path, quality=70)
+    with Image.open(path) as reencoded:
+        assert hamming(phash(original), phash(reencoded)) <= 6
+        assert hamming(dhash(original), dhash(reencoded)) <= 6
+
+    other = _pattern(2)
+    assert hamming(phash(original), phash(other)) > 16
+
+
+def test_bktree_matches_brute_force():
+    rng = random.Random(0)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    # Near neighbours of the first few values so the radius query has hits.
+    values += [v ^ (1 << rng.randrange(64)) for v in values[:20]]
+    tree: BKTree[int] = BKTree()
+    for index, value in enumerate(values):
+        tree.add(value, index)
+
+    for query in values[:30]:
+        expected = {(hamming(query, v), i) for i, v in enumerate(values) if hamming(query, v) <= 4}
+        assert set(tree.find(query, 4)) == expected
+    assert len(tree) == len(values)
+
+
+@pytest.mark.parametrize("value", [0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1])
+def test_signed_roundtrip(value):
+    assert to_unsigned(to_signed(value)) == value
+    assert -(1 << 63) <= to_signed(value) < (1 << 63)
+
+
+def test_scanner_links_near_duplicates_incrementally(tmp_path, db_service):
+    media_path = tmp_path / "media"
+    media_path.mkdir()
+
+    _pattern(1).save(media_path / "a.png")
+    _pattern(2).save(media_path / "b.png")
+    (media_path / "broken.jpg").write_bytes(b"not an image")
+    with Session(db_service.engine) as session:
+        add_media_item(session, "a", "a.png")
+        add_media_item(session, "b", "b.png")
+        add_media_item(session, "broken", "broken.jpg")
+        session.commit()
+
+    scanner = NearDuplicateScanner(db_service.engine, media_path, workers=1)
+    first = scanner.run()
+    assert (first.hashed, first.failed, first.pairs) == (2, 1, 0)
+
+    _pattern(1).resize((300, 225)).save(media_path / "a_small.jpg", quality=75)
+    with Session(db_service.engine) as session:
+        add_media_item(session, "c", "a_small.jpg")
+        session.commit()
+
+    second = scanner.run()
+    assert (second.hashed, second.failed, second.pairs) == (1, 0, 1)
+    assert scanner.run().hashed == 0
+
+    with Session(db_service.engine) as session:
+        pairs = session.exec(select(MediaItemDuplicates)).all()
+        assert [(p.first, p.second) for p in pairs] == [("a", "c")]
+        assert pairs[0].distance is not None and pairs[0].distance <= 8
+        assert len(session.exec(select(MediaItemHash)).all()) == 4
+
+
+def test_scanner_matches_hashes_recorded_at_download(tmp_path, db_service):
+    media_path = tmp_path / "media"
+    media_path.mkdir()
+
+    _pattern(3).save(media_path / "a.png")
+    _pattern(3).resize((200, 150)).save(media_path / "b.jpg")
+    with Session(db_service.engine) as session:
+        add_media_item(session, "a", "a.png")
+        add_media_item(session, "b", "b.jpg")
+        phash_b, dhash_b = hash_file(media_path / "b.jpg")
+        session.add(MediaItemHash(media_item_id="b", phash=to_signed(phash_b), dhash=to_signed(dhash_b),
+                                  hashed_at=datetime.now()))
+        session.commit()
+
+    result = NearDuplicateScanner(db_service.engine, media_path, workers=1).run()
+    assert (result.hashed, result.matched, result.pairs) == (1, 2, 1)
+
+    with Session(db_service.engine) as session:
+        assert all(h.matched_at is not None for h in session.exec(select(MediaItemHash)).all())
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from admin.lib.DatabaseService import DatabaseService
+from admin.lib.types import MediaRecord
+
+
+def _capture(db_service: DatabaseService, run) -> list[tuple[str, tuple]]:
+    """Run ``run`` and return the telegram_metadata SELECTs it issued, with their parameters."""
+    statements: list[tuple[str, tuple]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "telegram_metadata" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db_service.engine, "before_cursor_execute", record)
+    try:
+        run()
+    finally:
+        event.remove(db_service.engine, "before_cursor_execute", record)
+    assert statements
+    return statements
+
+
+def _plan(db_service: DatabaseService, statement: str, parameters: tuple) -> list[str]:
+    with db_service.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def _record() -> MediaRecord:
+    return MediaRecord(file_id=1, from_preview=False, channel_id=100, message_id=1, date=datetime.now(),
+                       text="", file_name="1.jpg", file_size=1, media_type="image")
+
+
+@pytest.mark.parametrize("name, run", [
+    ("get_last_seen_post", lambda db: db.get_last_seen_post(100)),
+    ("get_earliest_seen_post", lambda db: db.get_earliest_seen_post(100)),
+    ("find_existing_media", lambda db: db.find_existing_media(1)),
+    ("save_media_items", lambda db: db.save_media_items(SimpleNamespace(write=lambda *args: None), [_record()])),
+])
+def test_updater_queries_use_indexes(db_service, name, run):
+    for statement, parameters in _capture(db_service, lambda: run(db_service)):
+        plan = _plan(db_service, statement, parameters)
+        assert not any(step.startswith("SCAN") for step in plan), f"{name} scans: {plan}"
+        assert not any("TEMP B-TREE" in step for step in plan), f"{name} sorts: {plan}"
+
+
+def test_channel_cursors_read_only_the_index(db_service):
+    statements = _capture(db_service, db_service.get_channel_cursors)
+    plan = _plan(db_service, *statements[0])
+    # Every row is visited, but from the (channel_id, message_id) index alone and already grouped.
+    assert any("COVERING INDEX idx_telegram_metadata_channel_message" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
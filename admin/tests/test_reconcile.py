@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from sqlmodel import Session
+
+from admin.lib.reconcile import reconcile_media
+
+from .conftest import add_media_item
+
+
+def test_reconcile_moves_orphans_and_failed_deletes(tmp_path, db_service):
+    media = tmp_path / "media"
+    orphans = tmp_path / "orphans"
+    recycle = tmp_path / "recycle" / "media"
+    media.mkdir()
+    orphans.mkdir()
+    with Session(db_service.engine) as session:
+        add_media_item(session, "1", "keep.jpg")
+        add_media_item(session, "2", "deleted.jpg", user_deleted=True)
+        add_media_item(session, "3", "gone.jpg", user_deleted=True)
+        # An old deleted row whose name was re-used by a live item.
+        add_media_item(session, "4", "reused.jpg", user_deleted=True)
+        add_media_item(session, "5", "reused.jpg")
+        session.commit()
+    for name in ["keep.jpg", "deleted.jpg", "reused.jpg", "stray.jpg"]:
+        (media / name).write_bytes(b"x")
+    (orphans / "stray.jpg").write_bytes(b"older orphan")
+
+    dry = reconcile_media(db_service.engine, media, orphans, recycle, dry_run=True)
+    assert (dry.scanned, dry.orphans, dry.failed_deletes, dry.moved) == (4, ["stray.jpg"], ["deleted.jpg"], 0)
+    assert (media / "stray.jpg").exists()
+
+    report = reconcile_media(db_service.engine, media, orphans, recycle)
+    assert report.moved == 2 and not report.errors
+    assert sorted(p.name for p in media.iterdir()) == ["keep.jpg", "reused.jpg"]
+    assert (orphans / "stray.jpg").read_bytes() == b"older orphan"
+    assert (orphans / "stray (1).jpg").exists()
+    assert (recycle / "deleted.jpg").exists()
+
+
+def test_reconcile_can_limit_to_orphans(tmp_path, db_service):
+    media = tmp_path / "media"
+    media.mkdir()
+    with Session(db_service.engine) as session:
+        add_media_item(session, "1", "deleted.jpg", user_deleted=True)
+        session.commit()
+    (media / "deleted.jpg").write_bytes(b"x")
+
+    report = reconcile_media(db_service.engine, media, tmp_path / "orphans", tmp_path / "recycle", failed_deletes=False)
+    assert (report.orphans, report.failed_deletes, report.moved) == ([], [], 0)
+    assert (media / "deleted.jpg").exists()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import yaml
+from sqlmodel import Session, select
+
+from admin.lib.DatabaseService import DatabaseService
+from admin.lib.config import DatabaseConfig, TaggingSettings
+from admin.lib.tags import load_tag_vocabulary
+from models.telegram import Tag
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _write_vocabulary(tmp_path, base, extra):
+    tags_path = tmp_path / "tags.json"
+    extra_path = tmp_path / "extra.json"
+    tags_path.write_text(json.dumps(base))
+    extra_path.write_text(json.dumps(extra))
+    return tags_path, extra_path
+
+
+def test_vocabulary_matches_tagger_order(tmp_path):
+    tags_path, extra_path = _write_vocabulary(tmp_path, ["zebra", "apple", "mango"], [[1, "banana"], [-1, "last"]])
+    assert load_tag_vocabulary(tags_path, extra_path) == ["apple", "banana", "mango", "zebra", "last"]
+    assert load_tag_vocabulary(tags_path, tmp_path / "missing.json") == ["apple", "mango", "zebra"]
+
+
+def test_sync_tag_vocabulary_is_idempotent(tmp_path):
+    db = DatabaseService(DatabaseConfig(db_path=tmp_path / "teledeck.db"))
+    with Session(db.engine) as session:
+        session.add(Tag(name="mango"))
+        session.commit()
+
+    assert db.sync_tag_vocabulary(["apple", "mango", "zebra"]) == 2
+    assert db.sync_tag_vocabulary(["apple", "mango", "zebra"]) == 0
+    # A new vocabulary version re-maps positions without touching existing tag ids.
+    assert db.sync_tag_vocabulary(["apple", "kiwi", "mango", "zebra"]) == 1
+
+    with Session(db.engine) as session:
+        ids = {tag.name: tag.id for tag in session.exec(select(Tag)).all()}
+    assert db.get_tag_index_map() == {0: ids["apple"], 1: ids["kiwi"], 2: ids["mango"], 3: ids["zebra"]}
+
+
+def test_default_vocabulary_is_the_ai_service_copy():
+    # The AI service reads MODEL_ROOT (AI/models by default); a second copy of the
+    # vocabulary could drift and silently shift every tag position.
+    model_root = REPO_ROOT / "AI" / "models"
+    defaults = TaggingSettings()
+    with (REPO_ROOT / "config" / "default.yaml").open("r", encoding="utf-8") as fp:
+        configured = TaggingSettings(**yaml.safe_load(fp)["tagging"])
+
+    for settings in (defaults, configured):
+        assert REPO_ROOT / settings.tags_path == model_root / "tags_8041.json"
+        assert REPO_ROOT / settings.extra_tags_path == model_root / "tags_extra.json"
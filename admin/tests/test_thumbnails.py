@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime
+
+from PIL import Image
+from sqlmodel import Session, select
+
+from admin.lib.thumbnails import ThumbnailFilter, regenerate_thumbnails, thumbnail_name, wipe_thumbnails
+from models.telegram import Thumbnail
+
+from .conftest import add_media_item
+
+
+def test_thumbnail_name_matches_server():
+    assert thumbnail_name("my clip.mp4") == "my_clip.jpg"
+    assert thumbnail_name("noext") == "noext.jpg"
+
+
+def test_wipe_deletes_selected_rows_and_files(tmp_path, db_service):
+    thumbs = tmp_path / "thumbnails"
+    thumbs.mkdir()
+    with Session(db_service.engine) as session:
+        add_media_item(session, "old", "old.mp4", media_type="video", created_at=datetime(2023, 1, 1))
+        add_media_item(session, "new", "new.mp4", media_type="video", created_at=datetime(2025, 1, 1))
+        session.add(Thumbnail(media_item_id="old", filename="old.jpg"))
+        session.add(Thumbnail(media_item_id="new", filename="new.jpg"))
+        session.commit()
+    (thumbs / "old.jpg").write_bytes(b"x")
+    (thumbs / "new.jpg").write_bytes(b"x")
+
+    report = wipe_thumbnails(db_service.engine, thumbs, ThumbnailFilter(before=datetime(2024, 1, 1)))
+    assert (report.rows, report.files_removed) == (1, 1)
+    assert [p.name for p in thumbs.iterdir()] == ["new.jpg"]
+
+    report = wipe_thumbnails(db_service.engine, thumbs)
+    assert (report.rows, report.files_removed) == (1, 1)
+    with Session(db_service.engine) as session:
+        assert session.exec(select(Thumbnail)).all() == []
+
+
+def test_regenerate_skips_unchanged_sources(tmp_path, db_service):
+    media = tmp_path / "media"
+    thumbs = tmp_path / "thumbnails"
+    media.mkdir()
+    frames = [Image.new("RGB", (64, 64), color) for color in ("red", "blue")]
+    frames[0].save(media / "anim one.gif", save_all=True, append_images=frames[1:])
+    Image.new("RGB", (64, 64), "green").save(media / "still.webp")
+    Image.new("RGB", (64, 64), "green").save(media / "photo.jpg")
+    with Session(db_service.engine) as session:
+        add_media_item(session, "gif", "anim one.gif", media_type="gif")
+        add_media_item(session, "webp", "still.webp", media_type="webp")
+        add_media_item(session, "photo", "photo.jpg", media_type="photo")
+        session.commit()
+
+    first = regenerate_thumbnails(db_service.engine, media, thumbs, workers=1)
+    assert (first.generated, first.skipped, first.failed) == (2, 0, 0)
+    with Image.open(thumbs / "anim_one.jpg") as thumb:
+        assert thumb.getpixel((32, 32))[0] > 200  # first (red) frame
+
+    second = regenerate_thumbnails(db_service.engine, media, thumbs, workers=1)
+    assert (second.generated, second.skipped) == (0, 2)
+
+    # A newer source is regenerated even though a thumbnail exists.
+    stat = (thumbs / "still.jpg").stat()
+    os.utime(media / "still.webp", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    third = regenerate_thumbnails(db_service.engine, media, thumbs, ThumbnailFilter(media_item_ids=["webp", "gif"]), workers=1)
+    assert (third.generated, third.skipped) == (1, 1)
+
+    with Session(db_service.engine) as session:
+        rows = {t.media_item_id: t.filename for t in session.exec(select(Thumbnail)).all()}
+        assert rows == {"gif": "anim_one.jpg", "webp": "still.jpg"}
@@ -0,0 +1,39 @@
+"""add_perceptual_hashes
+
+Revision ID: 3f2a9c81d6e4
+Revises: da69b4575047
+Create Date: 2026-10-17 10:12:31.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c81d6e4'
+down_revision: Union[str, None] = 'da69b4575047'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'media_item_hashes',
+        sa.Column('media_item_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('phash', sa.BigInteger(), nullable=True),
+        sa.Column('dhash', sa.BigInteger(), nullable=True),
+        sa.Column('hashed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['media_item_id'], ['media_items.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('media_item_id'),
+    )
+
+    # Hamming distance between the pair's perceptual hashes; NULL for legacy rows
+    op.add_column('media_item_duplicates', sa.Column('distance', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('media_item_duplicates', 'distance')
+    op.drop_table('media_item_hashes')
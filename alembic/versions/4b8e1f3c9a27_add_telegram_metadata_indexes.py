@@ -0,0 +1,29 @@
+"""add_telegram_metadata_indexes
+
+Revision ID: 4b8e1f3c9a27
+Revises: e19b6d2a7c40
+Create Date: 2026-10-17 16:02:47.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8e1f3c9a27'
+down_revision: Union[str, None] = 'e19b6d2a7c40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Resume cursors: filter on channel_id, order by message_id
+    op.create_index('idx_telegram_metadata_channel_message', 'telegram_metadata', ['channel_id', 'message_id'])
+    # Known-file checks by Telegram file id
+    op.create_index('idx_telegram_metadata_file_preview', 'telegram_metadata', ['file_id', 'from_preview'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_telegram_metadata_file_preview', table_name='telegram_metadata')
+    op.drop_index('idx_telegram_metadata_channel_message', table_name='telegram_metadata')
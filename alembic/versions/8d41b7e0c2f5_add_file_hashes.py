@@ -0,0 +1,39 @@
+"""add_file_hashes
+
+Revision ID: 8d41b7e0c2f5
+Revises: 3f2a9c81d6e4
+Create Date: 2026-10-17 11:03:48.220917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41b7e0c2f5'
+down_revision: Union[str, None] = '3f2a9c81d6e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'file_hashes',
+        sa.Column('path', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('mtime_ns', sa.BigInteger(), nullable=False),
+        sa.Column('partial_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('full_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.PrimaryKeyConstraint('path'),
+    )
+    op.create_index('ix_file_hashes_size', 'file_hashes', ['size'])
+    op.create_index('ix_file_hashes_full_hash', 'file_hashes', ['full_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_file_hashes_full_hash', table_name='file_hashes')
+    op.drop_index('ix_file_hashes_size', table_name='file_hashes')
+    op.drop_table('file_hashes')
@@ -0,0 +1,35 @@
+"""add_media_item_content_hash
+
+Revision ID: c5e07a3b9f12
+Revises: 8d41b7e0c2f5
+Create Date: 2026-10-17 12:20:05.731455
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e07a3b9f12'
+down_revision: Union[str, None] = '8d41b7e0c2f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SHA-256 of the downloaded file, used to skip content already in the library
+    op.add_column('media_items', sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    op.create_index('ix_media_items_content_hash', 'media_items', ['content_hash'])
+
+    # Hashes can now be written at download time, before the scanner has matched them
+    op.add_column('media_item_hashes', sa.Column('matched_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE media_item_hashes SET matched_at = hashed_at')
+
+
+def downgrade() -> None:
+    op.drop_column('media_item_hashes', 'matched_at')
+    op.drop_index('ix_media_items_content_hash', table_name='media_items')
+    op.drop_column('media_items', 'content_hash')
@@ -0,0 +1,34 @@
+"""add_tag_indexes
+
+Revision ID: e19b6d2a7c40
+Revises: c5e07a3b9f12
+Create Date: 2026-10-17 13:41:19.052377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e19b6d2a7c40'
+down_revision: Union[str, None] = 'c5e07a3b9f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Maps the tagger's output positions to tags.id
+    op.create_table(
+        'tag_indexes',
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('tag_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['tag_id'], ['tags.id']),
+        sa.PrimaryKeyConstraint('position'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('tag_indexes')